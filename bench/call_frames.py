@@ -0,0 +1,48 @@
+"""Per-command host CPU of CALL frame encoding: generic cbor2 path against frame templates.
+
+Run from the repository root:
+    python -m bench.call_frames
+"""
+import timeit
+
+import cbor2
+
+from utils.itmp import itmp_message
+from utils.itmp.itmp_frame_cache import CallFrameCache
+from utils.itmp.utils import crc8, hdlc_byte_stuff
+
+
+COMMANDS = (
+    ("enable", []),
+    ("adc/p", []),
+    ("mot1/go", [1700, 1500, 0]),
+    ("mot1/go", [-2000, 800, 5000]),
+    ("gpio", [12, 8]),
+)
+
+
+def encode_generic(message: itmp_message.ITMPCallMessage, address: int = 0x08) -> bytes:
+    """ITMPMessage.to_hdlc() without templates."""
+    cbor_payload = cbor2.dumps(list(message.to_dict().values()))
+    frame = bytes([address & 0xFF]) + cbor_payload
+    frame += bytes([crc8.crc8_get(frame)])
+    return hdlc_byte_stuff.bytes2hdlc(frame)
+
+
+def best_time(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    cache = CallFrameCache()
+    print(f"{'command':<32}{'generic, us':>14}{'template, us':>14}{'speedup':>10}")
+    for procedure, args in COMMANDS:
+        message = itmp_message.ITMPCallMessage(42, procedure, args)
+        generic = best_time(lambda: encode_generic(message), 20000)
+        template = best_time(lambda: cache.encode(0x08, message.id, message.procedure, message.arguments), 20000)
+        assert encode_generic(message) == cache.encode(0x08, message.id, procedure, args)
+        print(f"{f'{procedure} {args}':<32}{generic * 1e6:>14.2f}{template * 1e6:>14.2f}{generic / template:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
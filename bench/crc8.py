@@ -0,0 +1,43 @@
+"""CRC8 throughput: the old per-byte implementation against crc8_get/crc8_get_many.
+
+Run from the repository root:
+    python -m bench.crc8
+"""
+import os
+import random
+import timeit
+
+from utils.itmp.utils import crc8
+
+
+def crc8_get_legacy(data):
+    crc = 0xFF
+    for i in range(len(data)):
+        crc = crc8.crc8_get_part(crc, data[i])
+    return crc
+
+
+def best_time(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    crc8.crc8_get(bytes(64))  # build the 16-bit table outside of the measurements
+
+    print(f"{'buffer':<16}{'legacy, MB/s':>14}{'crc8_get, MB/s':>16}{'speedup':>10}")
+    for size in (8, 64, 1024, 65536, 1 << 20):
+        data = os.urandom(size)
+        number = max(1, (1 << 20) // size // 4)
+        old = best_time(lambda: crc8_get_legacy(data), number)
+        new = best_time(lambda: crc8.crc8_get(data), number)
+        print(f"{size:<16}{size / old / 1e6:>14.2f}{size / new / 1e6:>16.2f}{old / new:>9.1f}x")
+
+    frames = [os.urandom(random.randint(8, 64)) for _ in range(10000)]
+    old = best_time(lambda: [crc8_get_legacy(f) for f in frames], 1)
+    new = best_time(lambda: crc8.crc8_get_many(frames), 1)
+    print(f"\nBatch of {len(frames)} frames (8-64 bytes): "
+          f"legacy {old * 1e3:.1f} ms, crc8_get_many {new * 1e3:.1f} ms ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
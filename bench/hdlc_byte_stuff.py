@@ -0,0 +1,78 @@
+"""HDLC byte stuffing throughput: the old per-byte loops against the bytes based paths.
+
+Run from the repository root:
+    python -m bench.hdlc_byte_stuff
+"""
+import os
+import random
+import timeit
+
+import cbor2
+
+from utils.itmp.utils import crc8, hdlc_byte_stuff
+
+
+def byte_stuff_legacy(data: bytes):
+    stuffed = bytearray()
+    for byte in data:
+        if byte in (0x7D, 0x7E):
+            stuffed.append(0x7D)
+            stuffed.append(byte ^ 0x20)
+        else:
+            stuffed.append(byte)
+    return bytes(stuffed)
+
+
+def unstuff_bytes_legacy(data: bytes) -> bytes:
+    result = bytearray()
+    i = 0
+    while i < len(data):
+        if data[i] == 0x7D:
+            i += 1
+            result.append(data[i] ^ 0x20)
+        else:
+            result.append(data[i])
+        i += 1
+    return bytes(result)
+
+
+def call_frames() -> list:
+    """Address + CBOR + CRC of typical CALL frames, 8-64 bytes long."""
+    frames = []
+    for procedure, args in (("enable", []), ("adc/p", []), ("mot1/go", [1700, 1500, 0]),
+                            ("mot1/go", [-2000, 800, 5000]), ("pwm1", [126]), ("gpio", [12, 125]),
+                            ("mot1/go", [-32000, 125, 30000]), ("mot2/go", [126000, 1, -126000, 2, 3, 70000, 8000000]),
+                            ("mot1/go", list(range(1000, 1016)))):
+        frame = bytes([0x08]) + cbor2.dumps([8, 1, procedure, args])
+        frames.append(frame + bytes([crc8.crc8_get(frame)]))
+    return frames
+
+
+def best_time(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def report(name: str, buffers: list, number: int):
+    stuffed = [hdlc_byte_stuff.byte_stuff(b) for b in buffers]
+    size = sum(map(len, buffers))
+    for op, old, new, data in (
+            ("stuff", byte_stuff_legacy, hdlc_byte_stuff.byte_stuff, buffers),
+            ("unstuff", unstuff_bytes_legacy, hdlc_byte_stuff.unstuff_bytes, stuffed)):
+        t_old = best_time(lambda: [old(b) for b in data], number)
+        t_new = best_time(lambda: [new(b) for b in data], number)
+        print(f"{name:<28}{op:<10}{size / t_old / 1e6:>12.2f}{size / t_new / 1e6:>12.2f}{t_old / t_new:>9.1f}x")
+
+
+def main():
+    print(f"{'data':<28}{'op':<10}{'old, MB/s':>12}{'new, MB/s':>12}{'speedup':>10}")
+    frames = call_frames()
+    report(f"CALL frames ({min(map(len, frames))}-{max(map(len, frames))} B)", frames, 2000)
+    report("CALL frames w/o escapes", [f for f in frames if hdlc_byte_stuff.byte_stuff(f) == f], 2000)
+    log = os.urandom(4 << 20)
+    report("4 MB capture (random)", [log], 1)
+    log = bytes(random.choice(b'\x00\x01\x7e\x7d\x31\x83') for _ in range(1 << 20))
+    report("1 MB capture (escape heavy)", [log], 1)
+
+
+if __name__ == "__main__":
+    main()
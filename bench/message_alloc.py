@@ -0,0 +1,57 @@
+"""Memory and decode time of buffered RESULT messages (telemetry capture).
+
+Decodes N RESULT frames into a list and reports the memory blocks and bytes
+retained per message and the decode time per frame.
+
+Run from the repository root:
+    python -m bench.message_alloc [--count 200000]
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from utils.itmp import itmp_message
+
+
+def frames(count: int) -> list:
+    return [itmp_message.ITMPResultMessage(i & 0xFFFF, [800 + i % 50]).to_hdlc() for i in range(count)]
+
+
+def measure(count: int) -> dict:
+    data = frames(count)
+    itmp_message.ITMPMessage.from_hdlc(data[0])
+    gc.collect()
+
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    messages = [itmp_message.ITMPMessage.from_hdlc(frame) for frame in data]
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    blocks = sys.getallocatedblocks() - blocks
+    del messages
+
+    start = time.perf_counter()
+    messages = [itmp_message.ITMPMessage.from_hdlc(frame) for frame in data]
+    elapsed = time.perf_counter() - start
+    del messages
+    return {
+        "blocks_per_message": blocks / count,
+        "bytes_per_message": retained / count,
+        "peak_bytes_per_message": peak / count,
+        "decode_us": elapsed / count * 1e6,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args(argv)
+    for name, value in measure(args.count).items():
+        print(f"{name:<28}{value:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""CPU usage and latency of the serial transports over a pty loopback.
+
+Compares PosixSerialPort (poll() + bulk reads) with the old read strategy of
+Win32SerialPort (one byte per syscall in a busy loop).
+
+Run from the repository root:
+    python -m bench.serial_transport [--frames N] [--device-delay SEC]
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from utils.itmp.utils.posix_serial_port import PosixSerialPort
+
+
+REQUEST = b'\x7e\x08\x84\x08\x01\x65\x61\x64\x63\x2f\x70\x80\x5c\x7e'
+RESPONSE = b'\x7e\x08\x83\x09\x01\x81\x19\x03\x20\x42\x7e'
+
+
+class BytewisePort(PosixSerialPort):
+    """Old Win32SerialPort.read() strategy: non-blocking 1-byte reads in a loop."""
+
+    def read(self) -> bytes:
+        data = bytes()
+        ts = time.time()
+        while (time.time() - ts < self.read_timeout) and ((len(data) < 2) or (data[-1] != 0x7E)):
+            try:
+                data += os.read(self.fd, 1)
+            except BlockingIOError:
+                pass
+        return data
+
+
+def responder(master: int, delay: float, frames: int):
+    """Device side of the loopback: answers every request after `delay` seconds."""
+    buffer = bytearray()
+    answered = 0
+    while answered < frames:
+        buffer += os.read(master, 4096)
+        while buffer.count(0x7E) >= 2:
+            end = buffer.find(0x7E, 1)
+            del buffer[:end + 1]
+            time.sleep(delay)
+            os.write(master, RESPONSE)
+            answered += 1
+
+
+def run(port_cls, frames: int, delay: float) -> dict:
+    master, slave = os.openpty()
+    port = port_cls(os.ttyname(slave), 115200, 1.0)
+    os.close(slave)
+    thread = threading.Thread(target=responder, args=(master, delay, frames), daemon=True)
+    thread.start()
+
+    latencies = []
+    cpu_start = time.thread_time()
+    wall_start = time.perf_counter()
+    for _ in range(frames):
+        t = time.perf_counter()
+        port.write(REQUEST)
+        if port.read() != RESPONSE:
+            raise RuntimeError("Unexpected response from the loopback.")
+        latencies.append(time.perf_counter() - t)
+    wall = time.perf_counter() - wall_start
+    cpu = time.thread_time() - cpu_start
+
+    thread.join()
+    port.close()
+    os.close(master)
+
+    latencies.sort()
+    return {
+        "mean_us": statistics.mean(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        "cpu_percent": 100 * cpu / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--device-delay", type=float, default=0.002,
+                        help="simulated device processing time per request, seconds")
+    args = parser.parse_args()
+
+    print(f"{'transport':<16}{'mean, us':>12}{'p99, us':>12}{'reader CPU, %':>16}")
+    for name, cls in (("poll + bulk", PosixSerialPort), ("byte-wise spin", BytewisePort)):
+        res = run(cls, args.frames, args.device_delay)
+        print(f"{name:<16}{res['mean_us']:>12.1f}{res['p99_us']:>12.1f}{res['cpu_percent']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Benchmark suite: codec, CRC8/byte stuffing, pty round trips and script execution.
+
+Every result is a time in seconds (lower is better). Results can be saved as a
+JSON baseline and compared with a later run; the comparison fails (exit code 1)
+if a benchmark got slower than the baseline by more than the threshold.
+
+Run from the repository root:
+    python -m bench.suite --output baseline.json
+    python -m bench.suite --compare baseline.json [--threshold 0.15] [--filter crc8]
+"""
+import argparse
+import contextlib
+import datetime
+import glob
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import head_logic
+from utils import script_timing
+from utils.head_simulator import HeadSimulator, SimulatedHead
+from utils.itmp import itmp_message
+from utils.itmp.itmp_pipeline import ITMPCallPipeline
+from utils.itmp.itmp_serial import ITMPSerialDevice
+from utils.itmp.utils import crc8, hdlc_byte_stuff
+from utils.script_stream import read_script
+
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "scripts", "*.json")
+
+MESSAGES = {
+    "call_enable": itmp_message.ITMPCallMessage(7, "enable", []),
+    "call_mot1_go": itmp_message.ITMPCallMessage(300, "mot1/go", [1700, 1500, 0]),
+    "result_adc_p": itmp_message.ITMPResultMessage(300, [812]),
+    "describe": itmp_message.ITMPDescribeMessage(1, ""),
+}
+
+SIZES = (16, 256, 4096, 65536)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Hides the debug prints (JSON parser, head device) while measuring."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def best_time(func: Callable[[], object], number: int, repeat: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def payload(size: int, seed: int = 0) -> bytes:
+    """Random bytes with the flag and escape bytes ~10 times more often than in uniform data."""
+    rng = random.Random(seed)
+    return bytes(rng.choice((0x7E, 0x7D)) if rng.random() < 0.08 else rng.randrange(256) for _ in range(size))
+
+
+def bench_codec(scale: float) -> Iterator[Tuple[str, float]]:
+    number = max(1, int(5000 * scale))
+    with quiet():
+        for name, message in MESSAGES.items():
+            frame = message.to_hdlc()
+            yield f"codec/to_hdlc/{name}", best_time(message.to_hdlc, number, 5)
+            yield f"codec/from_hdlc/{name}", best_time(lambda: itmp_message.ITMPMessage.from_hdlc(frame), number, 5)
+
+
+def bench_crc8(scale: float) -> Iterator[Tuple[str, float]]:
+    crc8.crc8_get(bytes(64))
+    for size in SIZES:
+        data = payload(size)
+        number = max(1, int((1 << 20) // size * scale / 4))
+        yield f"crc8/get/{size}", best_time(lambda: crc8.crc8_get(data), number, 5)
+
+
+def bench_stuffing(scale: float) -> Iterator[Tuple[str, float]]:
+    for size in SIZES:
+        data = payload(size)
+        stuffed = hdlc_byte_stuff.byte_stuff(data)
+        number = max(1, int((1 << 20) // size * scale / 4))
+        yield f"stuffing/stuff/{size}", best_time(lambda: hdlc_byte_stuff.byte_stuff(data), number, 5)
+        yield f"stuffing/unstuff/{size}", best_time(lambda: hdlc_byte_stuff.unstuff_bytes(stuffed), number, 5)
+
+
+def bench_pty(scale: float) -> Iterator[Tuple[str, float]]:
+    if os.name == 'nt':
+        return
+    count = max(10, int(500 * scale))
+    with HeadSimulator(SimulatedHead()) as simulator, quiet():
+        dev = ITMPSerialDevice(simulator.path)
+        try:
+            pipeline = ITMPCallPipeline(dev, max_in_flight=8)
+            latencies = []
+            for _ in range(count):
+                start = time.perf_counter()
+                pipeline.submit(itmp_message.ITMPCallMessage(pipeline.next_id(), "adc/p", [])).result()
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            yield "pty/round_trip/p50", statistics.median(latencies)
+            yield "pty/round_trip/p99", latencies[max(0, int(len(latencies) * 0.99) - 1)]
+
+            start = time.perf_counter()
+            calls = [pipeline.submit(itmp_message.ITMPCallMessage(pipeline.next_id(), "adc/p", [])) for _ in range(count)]
+            for call in calls:
+                call.result()
+            yield "pty/pipelined/per_call", (time.perf_counter() - start) / count
+        finally:
+            dev.close()
+
+
+def bench_scripts(scale: float) -> Iterator[Tuple[str, float]]:
+    """Host overhead of HeadLogic.script() on the bundled scripts: the wall time
+    beyond the planned script duration, and the p99 step lateness."""
+    if os.name == 'nt' or scale < 1:
+        return
+    for filename in sorted(glob.glob(SCRIPTS)):
+        name = os.path.splitext(os.path.basename(filename))[0]
+        try:
+            planned = script_timing.estimate_script(read_script(filename)).total
+        except Exception:
+            # Not a [procedure, args] script (e.g. the old message list format).
+            continue
+        with HeadSimulator(SimulatedHead()) as simulator, quiet():
+            logic = head_logic.HeadLogic(simulator.path, head_logic.AppMode.SCRIPT, description_cache=None)
+            logic.set_script(filename, cache_dir=None)
+            start = time.perf_counter()
+            stats = logic.start()
+            elapsed = time.perf_counter() - start
+            logic._dev.dev.close()
+        yield f"script/{name}/overhead", max(0.0, elapsed - planned)
+        yield f"script/{name}/lateness_p99", stats.summary()["p99"]
+
+
+BENCHMARKS = {
+    "codec": bench_codec,
+    "crc8": bench_crc8,
+    "stuffing": bench_stuffing,
+    "pty": bench_pty,
+    "script": bench_scripts,
+}
+
+
+def run(scale: float = 1.0, name_filter: Optional[str] = None) -> Dict[str, float]:
+    """Runs the benchmarks whose name (group/...) contains `name_filter`. Groups are
+    selected by the filter text before the first '/' without running the others."""
+    results = {}
+    group_filter = name_filter.split("/")[0] if name_filter else None
+    for group, bench in BENCHMARKS.items():
+        if group_filter and group_filter not in group:
+            continue
+        for name, value in bench(scale):
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = value
+            print(f"{name:<40}{format_time(value):>12}", file=sys.stderr)
+    return results
+
+
+def format_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.3f} us"
+
+
+def save(results: Dict[str, float], path: str) -> None:
+    document = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=1, sort_keys=True)
+
+
+def load(path: str) -> Dict[str, float]:
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)["results"]
+
+
+def compare(baseline: Dict[str, float], results: Dict[str, float], threshold: float) -> Dict[str, float]:
+    """Benchmarks slower than the baseline by more than `threshold` (relative), with their ratio."""
+    regressions = {}
+    for name, value in results.items():
+        old = baseline.get(name)
+        if old is None or old <= 0:
+            continue
+        if value / old > 1 + threshold:
+            regressions[name] = value / old
+    return regressions
+
+
+def print_comparison(baseline: Dict[str, float], results: Dict[str, float], regressions: Dict[str, float]) -> None:
+    print(f"{'benchmark':<40}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name in sorted(results):
+        old, new = baseline.get(name), results[name]
+        change = f"{(new / old - 1) * 100:+.1f}%" if old else "new"
+        mark = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<40}{format_time(old) if old is not None else '-':>12}{format_time(new):>12}{change:>9}{mark}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare the results with a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown reported as a regression (default 0.15)")
+    parser.add_argument("--filter", help="run only the benchmarks whose name contains this text "
+                        "(the text before the first '/' has to match a group: " + ", ".join(BENCHMARKS) + ")")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, no script runs")
+    args = parser.parse_args(argv)
+
+    results = run(0.2 if args.quick else 1.0, args.filter)
+    if args.output:
+        save(results, args.output)
+    if not args.compare:
+        return 0
+
+    baseline = load(args.compare)
+    regressions = compare(baseline, results, args.threshold)
+    print_comparison(baseline, results, regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+"""Runs scripts on several heads at once, one worker process per serial port.
+
+    python fleet.py COM4=resources/scripts/script.json COM5=resources/scripts/script1.json
+    python fleet.py /dev/ttyUSB0=trajectory.jsonl /dev/ttyUSB1=trajectory.jsonl --report report.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import queue
+import time
+import traceback
+from typing import Dict, List, Optional
+
+import head_logic
+
+
+class HeadReport:
+    """Result of one head: completion time, command throughput and errors.
+
+    `timeouts` counts the requests without a response in time (from the device
+    metrics); `errors` counts those plus the failure that stopped the script, if
+    it was not a timeout itself.
+    """
+
+    def __init__(self, port: str, script: str, steps: int = 0, elapsed: float = 0.0,
+                 errors: int = 0, error: str = "", lateness: Optional[dict] = None, timeouts: int = 0):
+        self.port = port
+        self.script = script
+        self.steps = steps
+        self.elapsed = elapsed
+        self.errors = errors
+        self.error = error
+        self.lateness = lateness
+        self.timeouts = timeouts
+
+    @property
+    def throughput(self) -> float:
+        """Commands per second."""
+        return self.steps / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "port": self.port,
+            "script": self.script,
+            "steps": self.steps,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "error": self.error,
+            "lateness": self.lateness,
+        }
+
+
+class FleetReport:
+    def __init__(self, heads: List[HeadReport], elapsed: float):
+        self.heads = heads
+        self.elapsed = elapsed
+
+    @property
+    def steps(self) -> int:
+        return sum(head.steps for head in self.heads)
+
+    @property
+    def timeouts(self) -> int:
+        return sum(head.timeouts for head in self.heads)
+
+    @property
+    def errors(self) -> int:
+        return sum(head.errors for head in self.heads)
+
+    def to_dict(self) -> dict:
+        return {
+            "elapsed": self.elapsed,
+            "steps": self.steps,
+            "throughput": self.steps / self.elapsed if self.elapsed > 0 else 0.0,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "heads": [head.to_dict() for head in self.heads],
+        }
+
+    def format(self) -> str:
+        lines = [f"{'port':<16} {'steps':>8} {'time, s':>9} {'cmd/s':>9} {'timeouts':>8} {'errors':>6}  script"]
+        for head in self.heads:
+            lines.append(f"{head.port:<16} {head.steps:>8} {head.elapsed:>9.3f} {head.throughput:>9.1f} "
+                         f"{head.timeouts:>8} {head.errors:>6}  {head.script}")
+            if head.error:
+                lines.append(f"{'':<16} {head.error}")
+        lines.append(f"{'total':<16} {self.steps:>8} {self.elapsed:>9.3f} "
+                     f"{self.steps / self.elapsed if self.elapsed > 0 else 0.0:>9.1f} {self.timeouts:>8} {self.errors:>6}")
+        return "\n".join(lines)
+
+
+def _set_logger(level: int) -> None:
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s [%(levelname)s] (%(processName)s %(filename)s:%(lineno)d): %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
+
+def _run_head(port: str, script: str, dry_run: bool, log_level: int, ready, go, results) -> None:
+    """Worker process: connects the head, waits for the common start and runs the script."""
+    _set_logger(log_level)
+    report = HeadReport(port, script)
+    logic = None
+    try:
+        logic = head_logic.HeadLogic(port, head_logic.AppMode.SCRIPT, dry_run=dry_run)
+        logic.set_script(script)
+    except Exception as e:
+        report.errors = 1
+        report.error = f"{type(e).__name__}: {e}"
+        if logic is not None:
+            logic.close()
+        results.put(report.to_dict())
+        ready.set()
+        return
+
+    ready.set()
+    go.wait()
+    start = time.perf_counter()
+    failed = False
+    try:
+        result = logic.start()
+        if result is not None:
+            report.steps = len(result)
+        if hasattr(result, "summary"):
+            report.lateness = result.summary()
+    except Exception as e:
+        # A timeout that stops the script is already counted in the metrics.
+        failed = not isinstance(e, TimeoutError)
+        report.error = f"{type(e).__name__}: {e}"
+        logging.getLogger(__name__).log(level=logging.ERROR, msg=traceback.format_exc())
+    finally:
+        report.elapsed = time.perf_counter() - start
+        logic.finalize()
+        if logic._dev is not None:
+            report.timeouts = sum(entry["timeouts"] for entry in logic._dev.metrics.snapshot().values())
+        report.errors = report.timeouts + int(failed)
+        logic.close()
+    results.put(report.to_dict())
+
+
+def run_fleet(scripts: Dict[str, str], dry_run: bool = False, timeout: Optional[float] = None) -> FleetReport:
+    """Runs `scripts` ({port: script file}) on all heads at once, one process per port.
+
+    The scripts start together once every worker has connected its head.
+    """
+    context = multiprocessing.get_context("spawn")
+    go = context.Event()
+    results = context.Queue()
+    workers = []
+    for port, script in scripts.items():
+        ready = context.Event()
+        worker = context.Process(target=_run_head, name=f"head {port}", daemon=True,
+                                 args=(port, script, dry_run, logging.getLogger().getEffectiveLevel(), ready, go, results))
+        worker.start()
+        workers.append((worker, ready))
+    for worker, ready in workers:
+        while not ready.wait(0.1) and worker.is_alive():
+            pass
+
+    start = time.perf_counter()
+    go.set()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    reports = {}
+    while len(reports) < len(workers):
+        wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+        if wait <= 0:
+            break
+        try:
+            report = results.get(timeout=wait)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker, _ in workers) and results.empty():
+                break
+            continue
+        reports[report["port"]] = report
+    elapsed = time.perf_counter() - start
+
+    for worker, _ in workers:
+        if worker.is_alive() and len(reports) < len(workers):
+            worker.terminate()
+        worker.join()
+
+    heads = []
+    for port, script in scripts.items():
+        report = reports.get(port)
+        if report is None:
+            heads.append(HeadReport(port, script, errors=1, error="The worker did not report (crashed or timed out)."))
+            continue
+        head = HeadReport(port, script)
+        for key in ("steps", "elapsed", "timeouts", "errors", "error", "lateness"):
+            setattr(head, key, report[key])
+        heads.append(head)
+    return FleetReport(heads, elapsed)
+
+
+def _port_script(text: str):
+    port, separator, script = text.partition("=")
+    if not separator or not port or not script:
+        raise argparse.ArgumentTypeError(f"Expected PORT=SCRIPT, got {text!r}.")
+    return port, script
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("heads", nargs="+", type=_port_script, metavar="PORT=SCRIPT")
+    parser.add_argument("--dry-run", action="store_true", help="only time the scripts, no devices are connected")
+    parser.add_argument("--timeout", type=float, help="stop the heads that are not done in this many seconds")
+    parser.add_argument("--report", help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    _set_logger(logging.INFO)
+    scripts = dict(args.heads)
+    if len(scripts) != len(args.heads):
+        parser.error("Every port can run one script only.")
+
+    report = run_fleet(scripts, dry_run=args.dry_run, timeout=args.timeout)
+    print(report.format())
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as file:
+            json.dump(report.to_dict(), file, indent=1)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,6 @@
-from utils import head_device, json_parser
+from utils import head_device, script_compiler, script_scheduler, script_stream, script_timing
 from enum import Enum
+from typing import Optional, Union
 import logging
 
 
@@ -11,8 +12,11 @@ class AppMode(Enum):
 
 
 class HeadLogic:
-    def __init__(self, dev_name: str, mode: AppMode = AppMode.DEFAULT):
-        self._dev = head_device.HeadDevice(dev_name=dev_name)
+    def __init__(self, dev_name: str, mode: AppMode = AppMode.DEFAULT, dry_run: bool = False,
+                 description_cache: Optional[str] = head_device.DEFAULT_DESCRIPTION_CACHE):
+        # Dry run: scripts are only timed, no device is connected.
+        self.dry_run = dry_run
+        self._dev = None if dry_run else head_device.HeadDevice(dev_name=dev_name, description_cache=description_cache)
         self.mode = mode
         self.state = None
         self.is_running = False
@@ -21,16 +25,27 @@ class HeadLogic:
         self.set_mode(self.mode)
         self.logger = logging.getLogger()
         self.filename = ""
+        self.script_cache = script_compiler.DEFAULT_SCRIPT_CACHE
+        self.stream = False
+        self.scheduler = script_scheduler.DeadlineScheduler()
     
     def start(self):
         self.is_running = True
-        self.callback()
+        return self.callback()
 
     def finalize(self):
         self.is_running = False
 
-    def set_script(self, filename: str):
+    def close(self):
+        if self._dev is not None:
+            self._dev.close()
+
+    def set_script(self, filename: str, cache_dir: Optional[str] = script_compiler.DEFAULT_SCRIPT_CACHE,
+                   stream: Optional[bool] = None):
+        # JSON Lines and CSV scripts are always streamed, JSON ones are compiled unless asked to stream.
         self.filename = filename
+        self.script_cache = cache_dir
+        self.stream = script_stream.script_format(filename) != "json" if stream is None else stream
 
     def set_mode(self, mode: AppMode) -> None:
         modes = {
@@ -51,21 +66,62 @@ class HeadLogic:
             self._dev.mot1_go(1000, 2000, 0)
         self._dev.mot1_go(0, 2000, 0)
 
-    ''' Executing commands from JSON file. '''
-    def script(self) -> None:
-        parser = json_parser.JSONParser(self.filename, self._dev)
-        command = [0]
-        while 1:
-            command = parser.next()
-            if len(command) == 0:
-                break
-            
-            delay = self._dev.calc_delay(command)
-            self._dev.send_call(
-                procedure=command[0],
-                args=command[1],
-                delay=delay
-            )
+    ''' Executing commands from JSON file (compiled and cached on the first run) or streamed from JSON Lines/CSV/JSON file.
+        Returns the ScriptTiming of a dry run, the LatenessStats of a run on deadlines (MotionWait.SLEEP)
+        or None when moves are completed by polling (MotionWait.POLL). '''
+    def script(self) -> Optional[Union[script_timing.ScriptTiming, script_scheduler.LatenessStats]]:
+        if self.dry_run:
+            if self.stream:
+                timing = script_timing.estimate_stream(script_stream.ScriptStream(self.filename))
+            else:
+                timing = script_timing.estimate_script(script_stream.read_script(self.filename))
+            self.logger.log(level=logging.INFO, msg=f"Dry run of {self.filename}: {len(timing)} steps, {timing.total:.3f} s.")
+            return timing
+
+        return self._run(self._script_steps())
+
+    def _script_steps(self):
+        """(procedure, args, delay) of every step of the current script."""
+        if self.stream:
+            for command in script_stream.ScriptStream(self.filename):
+                yield command[0], command[1], self._dev.calc_delay(command)
+            return
+
+        try:
+            compiled = script_compiler.load_or_compile(self.filename, self.script_cache)
+        except script_compiler.UncompilableScriptError as e:
+            self.logger.log(level=logging.WARNING, msg=f"Script {self.filename} is not compiled, streaming it instead: {e}")
+            for command in script_stream.ScriptStream(self.filename, "json"):
+                yield command[0], command[1], self._dev.calc_delay(command)
+            return
+
+        # Compiled delays assume that the motors start at 0.
+        precomputed = not any(self._dev.positions.values())
+        for step in range(len(compiled)):
+            procedure, args = compiled.command(step)
+            if precomputed:
+                delay = float(compiled.delays[step])
+            else:
+                delay = self._dev.calc_delay([procedure, args])
+            yield procedure, args, delay
+
+    def _run(self, steps) -> Optional[script_scheduler.LatenessStats]:
+        if self._dev.motion_wait == head_device.MotionWait.POLL:
+            # Moves are completed by polling the position, there is no timeline to keep.
+            for procedure, args, delay in steps:
+                self._dev.send_call(procedure=procedure, args=args, delay=delay)
+            return None
+
+        # Every step starts at its planned deadline, delays are not chained.
+        self.scheduler.start()
+        for procedure, args, delay in steps:
+            self.scheduler.wait()
+            self._dev.send_call(procedure=procedure, args=args)
+            self.scheduler.advance(delay)
+        self.scheduler.wait(record=False)
+        stats = self.scheduler.stats
+        self.logger.log(level=logging.INFO, msg=f"Script {self.filename} finished: {stats}")
+        return stats
 
     ''' Executing command from argument. '''
     def repl(self, command: str):
@@ -0,0 +1,55 @@
+import os
+import select
+import threading
+
+from utils.itmp import itmp_message
+from utils.itmp.utils.hdlc_deframer import HDLCDeframer
+
+
+class PtyDevice:
+    """Device side of a pty pair for tests.
+
+    `handler(message)` returns the response message, a (delay, response) tuple
+    or None for no response.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.master, self.slave = os.openpty()
+        self.path = os.ttyname(self.slave)
+        self._stop = threading.Event()
+        self._timers = []
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        for timer in self._timers:
+            timer.cancel()
+            timer.join()
+        os.close(self.slave)
+        os.close(self.master)
+
+    def _serve(self):
+        deframer = HDLCDeframer()
+        while not self._stop.is_set():
+            if not select.select([self.master], [], [], 0.05)[0]:
+                continue
+            for frame in deframer.feed(os.read(self.master, 4096)):
+                response = self.handler(itmp_message.ITMPMessage.from_frame(frame))
+                if response is None:
+                    continue
+                delay, response = response if isinstance(response, tuple) else (0, response)
+                if delay:
+                    timer = threading.Timer(delay, self._write, (response,))
+                    self._timers.append(timer)
+                    timer.start()
+                else:
+                    self._write(response)
+
+    def _write(self, message):
+        with self._write_lock:
+            if not self._stop.is_set():
+                os.write(self.master, message.to_hdlc())
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import time
+import unittest
+
+from utils.itmp import itmp_message
+
+if os.name != 'nt':
+    from pty_device import PtyDevice
+    from utils.async_head_device import AsyncHeadDevice
+    from utils.head_simulator import HeadSimulator, SimulatedHead
+    from utils.itmp.itmp_async import AsyncITMPDevice
+    from utils.itmp.utils.posix_serial_port import PosixSerialPort
+
+
+@unittest.skipIf(os.name == 'nt', "uses a pty")
+class TestAsyncHeadDevice(unittest.TestCase):
+    def setUp(self):
+        # Answers CALLs with [procedure] after a per-procedure delay, or never if it is None.
+        self.delays = {"adc/p": 0.2}
+        self.device = PtyDevice(self.respond)
+
+    def tearDown(self):
+        self.device.close()
+
+    def respond(self, call):
+        delay = self.delays.get(call.procedure, 0)
+        if delay is None:
+            return None
+        return delay, itmp_message.ITMPResultMessage(call.id, [call.procedure])
+
+    def test_concurrent_calls(self):
+        async def run():
+            async with AsyncHeadDevice(self.device.path, description_cache=None) as head:
+                start = time.monotonic()
+                results = await asyncio.gather(head.adc_p(), head.pwm(1, 100), head.enable())
+                return results, time.monotonic() - start
+
+        results, elapsed = asyncio.run(run())
+        self.assertEqual(results, [["adc/p"], ["pwm1"], ["enable"]])
+        self.assertLess(elapsed, 0.35)
+
+    def test_timeout(self):
+        self.delays["enable"] = None
+
+        async def run():
+            async with AsyncHeadDevice(self.device.path, timeout=0.1, description_cache=None) as head:
+                await head.enable()
+
+        with self.assertRaises(TimeoutError):
+            asyncio.run(run())
+
+    def test_send_call_waits_out_the_move(self):
+        async def run(path):
+            async with AsyncHeadDevice(path, description_cache=None) as head:
+                delay = head.calc_delay(["mot1/go", [200, 1000, 0]])
+                start = time.monotonic()
+                await head.send_call("mot1/go", [200, 1000, 0], delay=delay)
+                return delay, time.monotonic() - start, head.positions, head.calc_delay(["mot1/go", [200, 1000, 0]])
+
+        with HeadSimulator(SimulatedHead()) as simulator:
+            delay, elapsed, positions, next_delay = asyncio.run(run(simulator.path))
+        self.assertGreater(delay, 0.2)
+        self.assertGreaterEqual(elapsed, delay)
+        self.assertEqual(positions["mot1"], 200)
+        self.assertEqual(next_delay, 0)
+
+    def test_events_are_not_responses(self):
+        def respond(call):
+            # An event numbered like the pending call arrives first.
+            self.device._write(itmp_message.ITMPEventMessage(call.id, "adc/p", [120]))
+            return 0.05, itmp_message.ITMPResultMessage(call.id, [call.procedure])
+        self.device.handler = respond
+
+        async def run():
+            dev = AsyncITMPDevice(PosixSerialPort(self.device.path, 115200, 1.0))
+            events = []
+            dev.on_event = events.append
+            try:
+                response = await dev.request(itmp_message.ITMPCallMessage(5, "adc/p", []))
+            finally:
+                dev.close()
+            return response, events
+
+        response, events = asyncio.run(run())
+        self.assertEqual(response.result, ["adc/p"])
+        self.assertEqual([event.arguments for event in events], [[120]])
+
+if __name__ == '__main__':
+    unittest.main()
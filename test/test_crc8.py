@@ -1,6 +1,15 @@
+import os
 import unittest
 from utils import crc8
 
+
+def crc8_reference(data):
+    crc = 0xFF
+    for byte in data:
+        crc = crc8.crc8_table[crc ^ byte]
+    return crc
+
+
 class TestCRC8(unittest.TestCase):
     def test_known_crc(self):
         data = b'\x04\x83\x06\x01`'
@@ -11,5 +20,18 @@ class TestCRC8(unittest.TestCase):
     def test_crc_identity(self):
         self.assertEqual(crc8.crc8_get(b''), 0xFF)
 
+    def test_wide_table_matches_reference(self):
+        for size in (15, 16, 17, 64, 1001):
+            data = os.urandom(size)
+            self.assertEqual(crc8.crc8_get(data), crc8_reference(data))
+
+    def test_batch(self):
+        buffers = [os.urandom(size % 70) for size in range(500)]
+        self.assertEqual(crc8.crc8_get_many(buffers), [crc8_reference(b) for b in buffers])
+
+    def test_check_frames(self):
+        frames = [b'\x04\x83\x06\x01`\xf7'] * 40 + [b'\x04\x83\x06\x01`\xf6']
+        self.assertEqual(crc8.crc8_check_frames(frames), [True] * 40 + [False])
+
 if __name__ == '__main__':
     unittest.main()
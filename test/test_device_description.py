@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+from utils.device_description import DeviceDescription, DescriptionCache
+
+class TestDeviceDescription(unittest.TestCase):
+    def test_parse_string(self):
+        description = DeviceDescription.from_description("enable&mot1/go&[pos, vel, acc]\nadc/p&")
+        self.assertEqual(set(description.procedures), {"enable", "mot1/go", "adc/p"})
+        self.assertEqual(description.procedures["mot1/go"], "[pos, vel, acc]")
+
+    def test_no_prefix_match(self):
+        description = DeviceDescription.from_description("mot1/go&adc/p&")
+        self.assertIn("mot1/go", description)
+        self.assertNotIn("go", description)
+        self.assertNotIn("1/go", description)
+
+    def test_parse_list(self):
+        description = DeviceDescription.from_description(["enable&", "gpio"])
+        self.assertEqual(set(description.procedures), {"enable", "gpio"})
+
+    def test_cache_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DescriptionCache(os.path.join(tmp, "sub", "descriptions.json"))
+            self.assertIsNone(cache.load("COM4", "0483:5740:1"))
+            cache.store("COM4", "0483:5740:1", DeviceDescription({"enable": ""}))
+            self.assertIn("enable", cache.load("COM4", "0483:5740:1"))
+            self.assertIsNone(cache.load("COM4", "0483:5740:2"))
+
+if __name__ == '__main__':
+    unittest.main()
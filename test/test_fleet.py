@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import unittest
+
+import fleet
+from utils.head_simulator import HeadSimulator, SimulatedHead
+
+SCRIPT = [
+    ["enable", []],
+    ["mot1/go", [1000, 1000, 0]],
+    ["mot1/go", [0, 1000, 0]],
+]
+
+class TestFleet(unittest.TestCase):
+    def test_dry_run_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = os.path.join(tmp, "first.json")
+            with open(first, 'w') as file:
+                json.dump({"script": SCRIPT}, file)
+            second = os.path.join(tmp, "second.jsonl")
+            with open(second, 'w') as file:
+                file.write("\n".join(json.dumps(command) for command in SCRIPT * 2))
+
+            report = fleet.run_fleet({"A": first, "B": second, "C": os.path.join(tmp, "missing.jsonl")},
+                                     dry_run=True, timeout=60)
+
+        heads = {head.port: head for head in report.heads}
+        self.assertEqual(heads["A"].steps, 3)
+        self.assertEqual(heads["B"].steps, 6)
+        self.assertEqual((heads["A"].errors, heads["B"].errors, heads["C"].errors), (0, 0, 1))
+        self.assertIn("FileNotFoundError", heads["C"].error)
+        self.assertEqual(report.steps, 9)
+        self.assertEqual(report.errors, 1)
+        self.assertEqual(len(report.to_dict()["heads"]), 3)
+
+    @unittest.skipIf(os.name == 'nt', "uses a pty")
+    def test_timeouts_are_reported(self):
+        with tempfile.TemporaryDirectory() as tmp, HeadSimulator(SimulatedHead(drop_rate=1.0)) as simulator:
+            script = os.path.join(tmp, "script.json")
+            with open(script, 'w') as file:
+                json.dump({"script": SCRIPT[:1]}, file)
+            report = fleet.run_fleet({simulator.path: script}, timeout=60)
+
+        head = report.heads[0]
+        self.assertIn("TimeoutError", head.error)
+        self.assertEqual((head.timeouts, head.errors), (1, 1))
+        self.assertEqual(report.to_dict()["timeouts"], 1)
+
+    def test_port_script_argument(self):
+        self.assertEqual(fleet._port_script("COM4=a=b.json"), ("COM4", "a=b.json"))
+        with self.assertRaises(Exception):
+            fleet._port_script("COM4")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import threading
+import unittest
+from utils.frame_pipeline import LatestSlot, StageStats
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLatestSlot(unittest.TestCase):
+    def test_latest_wins(self):
+        slot = LatestSlot()
+        for i in range(5):
+            slot.put(i)
+        self.assertEqual(slot.get(timeout=0), 4)
+        self.assertEqual(slot.dropped, 4)
+        self.assertIsNone(slot.get_nowait())
+        slot.put(None)
+        self.assertEqual(slot.dropped, 4)
+
+    def test_get_waits_for_producer(self):
+        slot = LatestSlot()
+        threading.Timer(0.02, slot.put, ("frame",)).start()
+        self.assertEqual(slot.get(timeout=1.0), "frame")
+        self.assertIsNone(slot.get(timeout=0.01))
+
+    def test_close_wakes_consumer(self):
+        slot = LatestSlot()
+        threading.Timer(0.02, slot.close).start()
+        self.assertIsNone(slot.get(timeout=1.0))
+        # Items put before close are still handed over.
+        slot.put(1)
+        self.assertEqual(slot.get(), 1)
+
+
+class TestStageStats(unittest.TestCase):
+    def test_fps_over_window(self):
+        clock = FakeClock()
+        stats = StageStats(window=1.0, clock=clock)
+        for _ in range(30):
+            clock.now += 0.02
+            stats.tick()
+        self.assertEqual(stats.fps, 0.0)
+        for _ in range(30):
+            clock.now += 0.02
+            stats.tick()
+        self.assertAlmostEqual(stats.fps, 50.0)
+        self.assertEqual(stats.frames, 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
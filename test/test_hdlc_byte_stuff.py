@@ -8,6 +8,25 @@ class TestHDLCByteStuff(unittest.TestCase):
         unstuffed = hdlc_byte_stuff.unstuff_bytes(stuffed)
         self.assertEqual(data, unstuffed)
 
+    def test_escaped_bytes(self):
+        data = b'\x04\x7e\x7d\x5e\x7d\x7d'
+        stuffed = hdlc_byte_stuff.byte_stuff(data)
+        self.assertEqual(stuffed, b'\x04\x7d\x5e\x7d\x5d\x5e\x7d\x5d\x7d\x5d')
+        self.assertEqual(hdlc_byte_stuff.unstuff_bytes(stuffed), data)
+
+    def test_unstuff_other_escaped_bytes(self):
+        self.assertEqual(hdlc_byte_stuff.unstuff_bytes(b'\x01\x7d\x31\x7d\x5e'), b'\x01\x11\x7e')
+
+    def test_unstuff_truncated(self):
+        self.assertEqual(hdlc_byte_stuff.unstuff_bytes(b'\x01\x7d\x5e\x7d'), b'\x01\x7e')
+
+    def test_unstuff_view(self):
+        buffer = bytearray(b'\x00\x01\x02\x03')
+        view = hdlc_byte_stuff.unstuff_view(memoryview(buffer)[1:])
+        self.assertIs(view.obj, buffer)
+        self.assertEqual(bytes(view), b'\x01\x02\x03')
+        self.assertEqual(bytes(hdlc_byte_stuff.unstuff_view(memoryview(b'\x01\x7d\x5e')[:])), b'\x01\x7e')
+
     def test_bytes2hdlc_format(self):
         payload = b'\x04\x83\x06\x01`\xf7'
         hdlc = hdlc_byte_stuff.bytes2hdlc(payload)
@@ -0,0 +1,33 @@
+import unittest
+from utils.itmp.utils import hdlc_byte_stuff
+from utils.itmp.utils.hdlc_deframer import HDLCDeframer
+
+class TestHDLCDeframer(unittest.TestCase):
+    def test_back_to_back_frames(self):
+        deframer = HDLCDeframer()
+        frames = deframer.feed(b'\x7e\x01\x02\x7e\x03\x04\x7e\x7e\x05\x7e')
+        self.assertEqual(frames, [b'\x01\x02', b'\x03\x04', b'\x05'])
+
+    def test_frame_split_across_chunks(self):
+        payload = b'\x04\x7e\x83\x7d\x06'
+        stream = hdlc_byte_stuff.bytes2hdlc(payload)
+        deframer = HDLCDeframer()
+        frames = []
+        for i in range(len(stream)):
+            frames += deframer.feed(stream[i:i + 1])
+        self.assertEqual(frames, [payload])
+
+    def test_resync_after_garbage(self):
+        deframer = HDLCDeframer()
+        frames = deframer.feed(b'\x11\x22\x33\x7e\x01\x7d\x7e\x02\x03\x7e')
+        self.assertEqual(frames, [b'\x02\x03'])
+        self.assertEqual(deframer.dropped_bytes, 5)
+        self.assertEqual(deframer.dropped_frames, 1)
+
+    def test_oversized_frame_is_dropped(self):
+        deframer = HDLCDeframer(max_frame_size=4)
+        self.assertEqual(deframer.feed(b'\x7e' + bytes(16)), [])
+        self.assertEqual(deframer.feed(b'\x00\x7e\x01\x7e'), [b'\x01'])
+
+if __name__ == '__main__':
+    unittest.main()
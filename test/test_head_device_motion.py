@@ -0,0 +1,59 @@
+import os
+import time
+import unittest
+
+from utils.itmp import itmp_message
+
+if os.name != 'nt':
+    from pty_device import PtyDevice
+    from utils.head_device import HeadDevice, MotionWait
+
+
+class MovingMotor:
+    """mot1 that reaches the target `move_time` seconds after mot1/go."""
+
+    def __init__(self, move_time: float):
+        self.move_time = move_time
+        self.pos = 0
+        self.target = 0
+        self.started = 0
+
+    def respond(self, call):
+        if call.procedure == "mot1/go":
+            self.pos, self.target, self.started = self.position(), call.arguments[0], time.monotonic()
+            return itmp_message.ITMPResultMessage(call.id, [])
+        if call.procedure == "mot1/pos":
+            return itmp_message.ITMPResultMessage(call.id, [self.position()])
+        return itmp_message.ITMPResultMessage(call.id, [])
+
+    def position(self):
+        return self.target if time.monotonic() - self.started >= self.move_time else self.pos
+
+
+@unittest.skipIf(os.name == 'nt', "uses a pty")
+class TestHeadDeviceMotion(unittest.TestCase):
+    def setUp(self):
+        self.motor = MovingMotor(0.05)
+        self.device = PtyDevice(self.motor.respond)
+
+    def tearDown(self):
+        self.head.dev.close()
+        self.device.close()
+
+    def test_poll_finishes_before_estimate(self):
+        self.head = HeadDevice(self.device.path, description_cache=None, motion_wait=MotionWait.POLL)
+        start = time.monotonic()
+        self.head.mot1_go(1000, 2000, 0)
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertLess(elapsed, 0.5)
+
+    def test_estimate_bounds_the_wait(self):
+        self.motor.move_time = 10
+        self.head = HeadDevice(self.device.path, description_cache=None, motion_wait=MotionWait.POLL)
+        start = time.monotonic()
+        self.head.mot1_go(100, 2000, 0)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import threading
+import time
+import unittest
+from utils.head_device import HeadDevice, MotionWait, calc_move_time
+from utils.head_simulator import HeadSimulator, SimulatedHead
+from utils.itmp import itmp_message
+from utils.itmp.itmp_pipeline import ITMPCallPipeline
+from utils.itmp.itmp_serial import ITMPSerialDevice
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSimulatedHead(unittest.TestCase):
+    def test_move_follows_trapezoid(self):
+        clock = FakeClock()
+        head = SimulatedHead(clock=clock)
+        self.assertEqual(head.call("mot1/go", [1000, 1000, 10000]), [])
+        duration = calc_move_time(1000, 1000, 10000)
+        clock.now = duration / 2
+        self.assertEqual(head.call("mot1/pos", []), [500])
+        clock.now = duration
+        self.assertEqual(head.call("mot1/pos", []), [1000])
+        # A new move starts from where the motor is.
+        head.call("mot1/go", [0, 1000, 0])
+        clock.now += 0.25
+        self.assertEqual(head.call("mot1/pos", []), [750])
+
+    def test_pressure_follows_position(self):
+        head = SimulatedHead(time_scale=0)
+        before = head.call("adc/p", [])[0]
+        head.call("mot1/go", [2000, 1000, 0])
+        self.assertGreater(head.call("adc/p", [])[0], before)
+
+    def test_unknown_procedure(self):
+        self.assertIsNone(SimulatedHead().call("mot1/fly", []))
+
+
+class TestHeadSimulator(unittest.TestCase):
+    def test_head_device_over_pty(self):
+        with HeadSimulator(SimulatedHead(time_scale=0.1)) as simulator:
+            head = HeadDevice(simulator.path, description_cache=None, motion_wait=MotionWait.POLL)
+            try:
+                self.assertIn("mot1/go", head.description)
+                self.assertEqual(head.enable(), [])
+                head.send_call("mot1/go", [300, 1000, 0], delay=head.calc_delay(["mot1/go", [300, 1000, 0]]))
+                self.assertEqual(head.mot1_pos(), [300])
+            finally:
+                head.dev.close()
+
+    def test_head_device_over_socket(self):
+        with HeadSimulator(SimulatedHead(), ("127.0.0.1", 0)) as simulator:
+            self.assertTrue(simulator.path.startswith("socket://127.0.0.1:"))
+            head = HeadDevice(simulator.path, description_cache=None)
+            try:
+                self.assertEqual(head.adc_p(), [100])
+            finally:
+                head.dev.close()
+
+    def test_subscription(self):
+        with HeadSimulator(SimulatedHead(event_period=0.005)) as simulator:
+            head = HeadDevice(simulator.path, description_cache=None)
+            try:
+                events = []
+                head.subscribe("adc/p", lambda topic, arguments: events.append((topic, arguments)))
+                # Calls keep working while the reader thread delivers events.
+                for _ in range(20):
+                    self.assertEqual(head.mot1_pos(), [0])
+                time.sleep(0.05)
+                head.unsubscribe("adc/p")
+                count = len(events)
+                self.assertGreater(count, 3)
+                self.assertEqual(events[0], ("adc/p", [100]))
+                time.sleep(0.05)
+                self.assertEqual(len(events), count)
+                self.assertEqual(simulator.head.subscriptions, {})
+            finally:
+                head.close()
+
+    def test_unsubscribe_from_callback(self):
+        with HeadSimulator(SimulatedHead(event_period=0.005)) as simulator:
+            head = HeadDevice(simulator.path, description_cache=None)
+            try:
+                events = []
+                unsubscribed = threading.Event()
+
+                def first_reading(topic, arguments):
+                    events.append(arguments)
+                    head.unsubscribe(topic)
+                    unsubscribed.set()
+
+                head.subscribe("adc/p", first_reading)
+                self.assertTrue(unsubscribed.wait(1.0))
+                time.sleep(0.05)
+                self.assertEqual(events, [[100]])
+                self.assertEqual(simulator.head.subscriptions, {})
+                self.assertFalse(head.calls.reader_running)
+                # Calls are read by the caller again.
+                self.assertEqual(head.mot1_pos(), [0])
+            finally:
+                head.close()
+
+    def call(self, head: SimulatedHead, timeout: float = 0.2):
+        with HeadSimulator(head) as simulator:
+            dev = ITMPSerialDevice(simulator.path)
+            try:
+                pipeline = ITMPCallPipeline(dev, timeout=timeout)
+                start = time.monotonic()
+                result = pipeline.submit(itmp_message.ITMPCallMessage(1, "adc/p", [])).result()
+                return result, time.monotonic() - start
+            finally:
+                dev.close()
+
+    def test_latency(self):
+        result, elapsed = self.call(SimulatedHead(latency=0.05, jitter=0.01, seed=1))
+        self.assertEqual(result.result, [100])
+        self.assertGreaterEqual(elapsed, 0.05)
+
+    def test_dropped_response(self):
+        head = SimulatedHead(drop_rate=1.0)
+        with self.assertRaises(TimeoutError):
+            self.call(head)
+        self.assertEqual(head.stats["dropped"], 1)
+
+    def test_corrupted_response(self):
+        head = SimulatedHead(corrupt_rate=1.0, seed=3)
+        with self.assertRaises(TimeoutError):
+            self.call(head)
+        self.assertEqual(head.stats["corrupted"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
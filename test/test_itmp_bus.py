@@ -0,0 +1,130 @@
+import threading
+import time
+import unittest
+from utils.head_device import HeadDevice
+from utils.itmp import itmp_message
+from utils.itmp.itmp_bus import ITMPBus
+from utils.itmp.utils.hdlc_deframer import HDLCDeframer
+from utils.itmp.utils.serial_port import SerialPort
+
+
+class MultiDropLine(SerialPort):
+    """Serial line with several devices: `devices[address](message)` returns
+    (delay, result) or None for no response."""
+
+    def __init__(self, devices):
+        super().__init__(read_timeout=1)
+        self.devices = devices
+        self.sent = []
+        self._deframer = HDLCDeframer()
+        self._responses = []
+        self._cond = threading.Condition()
+
+    def write(self, data):
+        for frame in self._deframer.feed(data):
+            address, message = frame[0], itmp_message.ITMPMessage.from_frame(frame)
+            self.sent.append((address, getattr(message, "procedure", message.type.name)))
+            response = self.devices[address](message)
+            if response is not None:
+                delay, result = response
+                with self._cond:
+                    self._responses.append((time.monotonic() + delay,
+                                            itmp_message.ITMPResultMessage(message.id, result).to_hdlc(address)))
+                    self._cond.notify()
+
+    def read_bytes(self, timeout):
+        end = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                due = [r for r in self._responses if r[0] <= now]
+                if due:
+                    self._responses = [r for r in self._responses if r[0] > now]
+                    return b''.join(data for _, data in due)
+                if now >= end:
+                    return b''
+                self._cond.wait(min([end] + [r[0] for r in self._responses]) - now)
+
+    def publish(self, address, topic, arguments):
+        with self._cond:
+            self._responses.append((time.monotonic(), itmp_message.ITMPEventMessage(1, topic, arguments).to_hdlc(address)))
+            self._cond.notify()
+
+    def close(self):
+        pass
+
+
+def call(handle, procedure, args=()):
+    return handle.submit(itmp_message.ITMPCallMessage(handle.next_id(), procedure, list(args)))
+
+
+class TestITMPBus(unittest.TestCase):
+    def setUp(self):
+        self.line = MultiDropLine({
+            1: lambda m: (0.3, ["slow", m.procedure]),
+            2: lambda m: (0.0, ["fast", m.procedure]),
+            3: lambda m: None,
+        })
+        self.bus = ITMPBus(self.line, timeout=0.5)
+
+    def tearDown(self):
+        self.bus.close()
+
+    def test_routes_by_address(self):
+        slow, fast = self.bus.device(1), self.bus.device(2)
+        calls = [call(slow, "adc/p"), call(fast, "adc/p")]
+        self.assertEqual(calls[1].result().result, ["fast", "adc/p"])
+        self.assertEqual(calls[0].result().result, ["slow", "adc/p"])
+
+    def test_slow_device_does_not_block_others(self):
+        slow, fast = self.bus.device(1), self.bus.device(2)
+        pending = call(slow, "mot1/pos")
+        start = time.monotonic()
+        for i in range(20):
+            self.assertEqual(call(fast, f"gpio{i}").result().result, ["fast", f"gpio{i}"])
+        self.assertLess(time.monotonic() - start, 0.3)
+        self.assertFalse(pending.done())
+        self.assertEqual(pending.result().result, ["slow", "mot1/pos"])
+
+    def test_round_robin(self):
+        bus = ITMPBus(MultiDropLine({a: (lambda m: (0.01, [])) for a in (4, 5)}), max_in_flight=1)
+        try:
+            first, second = bus.device(4), bus.device(5)
+            calls = [call(first, f"a{i}") for i in range(3)] + [call(second, f"b{i}") for i in range(3)]
+            for c in calls:
+                c.result()
+            # a0 went out at once, the rest alternate between the addresses.
+            self.assertEqual([p for _, p in bus.port.sent], ["a0", "b0", "a1", "b1", "a2", "b2"])
+        finally:
+            bus.close()
+
+    def test_timeout(self):
+        silent = self.bus.device(3)
+        with self.assertRaises(TimeoutError):
+            call(silent, "enable").result()
+        self.assertEqual(self.bus.in_flight(), 0)
+
+    def test_head_device_on_bus(self):
+        head = HeadDevice("bus", description_cache=None, address=2, bus=self.bus)
+        self.assertEqual(head.enable(), ["fast", "enable"])
+
+    def test_events_by_address(self):
+        line = MultiDropLine({4: lambda m: (0.0, []), 5: lambda m: (0.0, [])})
+        bus = ITMPBus(line)
+        try:
+            received = []
+            head = HeadDevice("bus", description_cache=None, address=4, bus=bus)
+            head.subscribe("adc/p", lambda topic, arguments: received.append(arguments))
+            self.assertEqual(line.sent, [(4, "SUBSCRIBE")])
+            line.publish(5, "adc/p", [1])
+            line.publish(4, "adc/p", [2])
+            self.assertEqual(head.mot1_pos(), [])
+            deadline = time.monotonic() + 1
+            while not received and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(received, [[2]])
+        finally:
+            bus.close()
+
+if __name__ == '__main__':
+    unittest.main()
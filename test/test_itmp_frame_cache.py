@@ -0,0 +1,63 @@
+import threading
+import unittest
+import cbor2
+from utils.itmp import itmp_message
+from utils.itmp.itmp_frame_cache import CallFrameCache, cbor_int
+from utils.itmp.utils import crc8, hdlc_byte_stuff
+
+
+def encode_reference(address, msg_id, procedure, arguments):
+    frame = bytes([address]) + cbor2.dumps([8, msg_id, procedure, list(arguments)])
+    return hdlc_byte_stuff.bytes2hdlc(frame + bytes([crc8.crc8_get(frame)]))
+
+
+class TestCallFrameCache(unittest.TestCase):
+    def test_cbor_int(self):
+        for value in (0, 23, 24, 255, 256, 65535, 65536, 2 ** 32, 2 ** 64, -1, -24, -25, -257, -2 ** 64 - 1):
+            self.assertEqual(cbor_int(value), cbor2.dumps(value))
+
+    def test_matches_generic_encoder(self):
+        cache = CallFrameCache()
+        for msg_id in (1, 23, 24, 126, 300, 65535):
+            for procedure, args in (("enable", []), ("mot1/go", [1700, -2000, 126]),
+                                    ("pwm1", [125]), ("gpio", (12, 4)), ("x", ["abc", 1.5, True])):
+                self.assertEqual(cache.encode(0x08, msg_id, procedure, args),
+                                 encode_reference(0x08, msg_id, procedure, args))
+
+    def test_lru_bound(self):
+        cache = CallFrameCache(maxsize=2)
+        cache.encode(4, 1, "a", [])
+        cache.encode(4, 1, "b", [])
+        cache.encode(4, 1, "a", [1])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+        cache.encode(4, 2, "a", [5])
+        self.assertEqual(cache.hits, 1)
+
+    def test_concurrent_eviction(self):
+        cache = CallFrameCache(maxsize=2)
+        errors = []
+
+        def encode_many(address):
+            try:
+                for i in range(2000):
+                    cache.encode(address, 1, "p" + str(i % 3), [])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=encode_many, args=(address,)) for address in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.hits + cache.misses, 4 * 2000)
+
+    def test_call_message_round_trip(self):
+        frame = itmp_message.ITMPCallMessage(7, "mot1/go", [126, 700, 0]).to_hdlc(4)
+        message = itmp_message.ITMPMessage.from_hdlc(frame)
+        self.assertEqual(message.to_list(), [8, 7, "mot1/go", [126, 700, 0]])
+
+if __name__ == '__main__':
+    unittest.main()
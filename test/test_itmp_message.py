@@ -0,0 +1,69 @@
+import unittest
+from utils.itmp import itmp_message
+from utils.itmp.utils import crc8, hdlc_byte_stuff
+
+
+class TestITMPMessageDecode(unittest.TestCase):
+    def test_from_hdlc_memoryview(self):
+        frame = itmp_message.ITMPResultMessage(300, [812]).to_hdlc()
+        buffer = bytearray(b'\x7e\x7e') + frame + bytearray(b'\x55')
+        message = itmp_message.ITMPMessage.from_hdlc(memoryview(buffer)[2:2 + len(frame)])
+        self.assertEqual(message.to_list(), [9, 300, [812]])
+        # The decoded message keeps no view of the buffer, so it can be reused.
+        buffer.clear()
+
+    def test_from_hdlc_escaped(self):
+        # Id 126 is the flag byte in the CBOR payload.
+        frame = itmp_message.ITMPResultMessage(126, [125]).to_hdlc()
+        self.assertIn(b'\x7d\x5e', frame)
+        message = itmp_message.ITMPMessage.from_hdlc(bytearray(frame))
+        self.assertEqual((message.id, message.result), (126, [125]))
+
+    def test_from_hdlc_without_opening_flag(self):
+        frame = itmp_message.ITMPDescribeMessage(1, "").to_hdlc()
+        self.assertEqual(itmp_message.ITMPMessage.from_hdlc(frame[1:]).to_list(), [6, 1, ""])
+
+    def test_bad_crc(self):
+        frame = bytearray(itmp_message.ITMPResultMessage(5, [1]).to_hdlc())
+        frame[-2] ^= 0x01
+        with self.assertRaises(ValueError):
+            itmp_message.ITMPMessage.from_hdlc(frame)
+        with self.assertRaises(ValueError):
+            itmp_message.ITMPMessage.from_hdlc(b'\x7e\x7e')
+
+
+class TestITMPMessageClasses(unittest.TestCase):
+    def test_dispatch_table(self):
+        types = itmp_message.ITMPMessageType
+        self.assertIs(itmp_message.MESSAGE_CLASSES[types.CALL], itmp_message.ITMPCallMessage)
+        self.assertIs(itmp_message.MESSAGE_CLASSES[types.RESULT], itmp_message.ITMPResultMessage)
+        self.assertNotIn(types.CONNECT, itmp_message.MESSAGE_CLASSES)
+
+    def test_unsupported_type(self):
+        frame = itmp_message.ITMPResultMessage(1, []).to_hdlc()
+        # CONNECT (0) instead of RESULT (9) as the message type; the CRC is fixed up.
+        content = bytearray(hdlc_byte_stuff.unstuff_bytes(frame[1:-1]))
+        content[2] = 0x00
+        content[-1] = crc8.crc8_get(bytes(content[:-1]))
+        with self.assertRaises(ValueError):
+            itmp_message.ITMPMessage.from_frame(bytes(content))
+
+    def test_subscription_messages(self):
+        for message in (itmp_message.ITMPSubscribeMessage(3, "adc/p"),
+                        itmp_message.ITMPUnsubscribeMessage(4, "adc/p"),
+                        itmp_message.ITMPEventMessage(5, "adc/p", [812])):
+            decoded = itmp_message.ITMPMessage.from_hdlc(message.to_hdlc())
+            self.assertIs(type(decoded), type(message))
+            self.assertEqual(decoded.to_list(), message.to_list())
+        # Options are accepted and ignored.
+        self.assertEqual(itmp_message.ITMPEventMessage.from_list([13, 1, "t", [2], {}]).arguments, [2])
+
+    def test_slots(self):
+        message = itmp_message.ITMPResultMessage(1, [2])
+        self.assertFalse(hasattr(message, "__dict__"))
+        with self.assertRaises(AttributeError):
+            message.extra = 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from utils.head_device import HeadDevice
+from utils.head_simulator import HeadSimulator, SimulatedHead
+from utils.itmp import itmp_message
+from utils.itmp.itmp_metrics import BUCKETS, Histogram, ITMPMetrics
+from utils.itmp.itmp_pipeline import ITMPCallPipeline
+from utils.itmp.itmp_serial import ITMPSerialDevice
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_and_quantiles(self):
+        histogram = Histogram()
+        for _ in range(99):
+            histogram.observe(0.0008)
+        histogram.observe(0.3)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.counts[BUCKETS.index(1e-3)], 99)
+        self.assertTrue(5e-4 < histogram.quantile(0.5) <= 1e-3)
+        self.assertTrue(0.25 < histogram.quantile(0.999) <= 0.5)
+        self.assertIsNone(Histogram().quantile(0.5))
+
+    def test_overflow_bucket(self):
+        histogram = Histogram()
+        histogram.observe(100.0)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.quantile(0.99), BUCKETS[-1])
+
+
+class TestITMPMetrics(unittest.TestCase):
+    def test_prometheus_text(self):
+        metrics = ITMPMetrics()
+        metrics.observe("mot1/go", "read", 0.002)
+        metrics.observe("mot1/go", "read", 0.004)
+        metrics.timeout("adc/p")
+        text = metrics.to_prometheus()
+        self.assertIn('itmp_stage_seconds_bucket{procedure="mot1/go",stage="read",le="+Inf"} 2', text)
+        self.assertIn('itmp_stage_seconds_count{procedure="mot1/go",stage="read"} 2', text)
+        self.assertIn('itmp_timeouts_total{procedure="adc/p"} 1', text)
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {})
+
+    def test_head_device_stages(self):
+        with HeadSimulator(SimulatedHead(latency=0.002)) as simulator:
+            head = HeadDevice(simulator.path, description_cache=None)
+            try:
+                for _ in range(5):
+                    head.adc_p()
+                head.descr("")
+            finally:
+                head.dev.close()
+
+        snapshot = head.metrics.snapshot()
+        stages = snapshot["adc/p"]["stages"]
+        self.assertEqual(set(stages), {"encode", "write", "first_byte", "read", "decode"})
+        self.assertTrue(all(histogram.count == 5 for histogram in stages.values()))
+        self.assertGreaterEqual(stages["read"].sum, stages["first_byte"].sum)
+        self.assertGreaterEqual(stages["read"].sum, 5 * 0.002)
+        self.assertIn("describe", snapshot)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            head.export_metrics(os.path.join(tmp, "metrics.json"))
+            with open(os.path.join(tmp, "metrics.json")) as file:
+                self.assertEqual(json.load(file)["procedures"]["adc/p"]["stages"]["read"]["count"], 5)
+            head.export_metrics(os.path.join(tmp, "metrics.prom"))
+            with open(os.path.join(tmp, "metrics.prom")) as file:
+                self.assertIn('stage="first_byte"', file.read())
+
+    def test_timeouts(self):
+        metrics = ITMPMetrics()
+        with HeadSimulator(SimulatedHead(drop_rate=1.0)) as simulator:
+            dev = ITMPSerialDevice(simulator.path, metrics=metrics)
+            try:
+                pipeline = ITMPCallPipeline(dev, timeout=0.05)
+                with self.assertRaises(TimeoutError):
+                    pipeline.submit(itmp_message.ITMPCallMessage(1, "mot1/pos", [])).result()
+            finally:
+                dev.close()
+        self.assertEqual(metrics.snapshot()["mot1/pos"]["timeouts"], 1)
+
+    def test_late_reads_have_no_arrival_time(self):
+        with HeadSimulator(SimulatedHead(latency=0.005)) as simulator:
+            head = HeadDevice(simulator.path, description_cache=None)
+            try:
+                head.adc_p()
+                call = head.call_async("adc/p", [])
+                # The response is buffered while the caller is busy.
+                time.sleep(0.05)
+                call.result()
+            finally:
+                head.dev.close()
+
+        stages = head.metrics.snapshot()["adc/p"]["stages"]
+        self.assertEqual(stages["decode"].count, 2)
+        self.assertEqual(stages["first_byte"].count, 1)
+        self.assertEqual(stages["read"].count, 1)
+        self.assertLess(stages["first_byte"].sum, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
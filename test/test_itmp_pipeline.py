@@ -0,0 +1,80 @@
+import unittest
+from collections import deque
+from utils.itmp import itmp_message
+from utils.itmp.itmp_pipeline import ITMPCallPipeline
+
+
+class ReversedEchoDevice:
+    """Answers buffered CALLs in reverse order, returning the procedure name as result."""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = deque()
+
+    def write(self, message):
+        self.requests.append(message)
+
+    def read(self, timeout=None):
+        if not self.responses:
+            while self.requests:
+                call = self.requests.pop()
+                self.responses.append(itmp_message.ITMPResultMessage(call.id, [call.procedure]))
+        return self.responses.popleft() if self.responses else None
+
+
+class TestITMPCallPipeline(unittest.TestCase):
+    def test_ids_wrap_and_skip_pending(self):
+        pipeline = ITMPCallPipeline(ReversedEchoDevice())
+        pipeline._last_id = ITMPCallPipeline.MAX_ID - 1
+        pipeline.submit(itmp_message.ITMPCallMessage(ITMPCallPipeline.MAX_ID, "a", []))
+        pipeline._last_id = ITMPCallPipeline.MAX_ID - 1
+        self.assertEqual(pipeline.next_id(), 1)
+
+    def test_out_of_order_results(self):
+        pipeline = ITMPCallPipeline(ReversedEchoDevice())
+        calls = [pipeline.submit(itmp_message.ITMPCallMessage(pipeline.next_id(), name, []))
+                 for name in ("adc/p", "gpio", "pwm1")]
+        self.assertEqual(pipeline.in_flight, 3)
+        self.assertEqual([c.result().result for c in calls], [["adc/p"], ["gpio"], ["pwm1"]])
+        self.assertEqual(pipeline.in_flight, 0)
+
+    def test_window_limit(self):
+        dev = ReversedEchoDevice()
+        pipeline = ITMPCallPipeline(dev, max_in_flight=2)
+        calls = [pipeline.submit(itmp_message.ITMPCallMessage(pipeline.next_id(), str(i), []))
+                 for i in range(5)]
+        self.assertLessEqual(pipeline.in_flight, 2)
+        self.assertEqual([c.result().result for c in calls], [[str(i)] for i in range(5)])
+
+    def test_timeout(self):
+        pipeline = ITMPCallPipeline(ReversedEchoDevice(), timeout=0.01)
+        call = pipeline.submit(itmp_message.ITMPCallMessage(1, "x", []))
+        pipeline.dev.requests.clear()
+        with self.assertRaises(TimeoutError):
+            call.result()
+        self.assertEqual(pipeline.in_flight, 0)
+
+    def test_events_are_not_responses(self):
+        dev = ReversedEchoDevice()
+        pipeline = ITMPCallPipeline(dev)
+        events = []
+        pipeline.on_event = events.append
+        call = pipeline.submit(itmp_message.ITMPCallMessage(5, "adc/p", []))
+        # An event numbered like the pending call arrives first.
+        dev.responses.append(itmp_message.ITMPEventMessage(5, "adc/p", [120]))
+        self.assertEqual(call.result().result, ["adc/p"])
+        self.assertEqual([event.arguments for event in events], [[120]])
+
+    def test_reader_thread(self):
+        pipeline = ITMPCallPipeline(ReversedEchoDevice())
+        pipeline.start_reader()
+        try:
+            self.assertTrue(pipeline.reader_running)
+            calls = [pipeline.submit(itmp_message.ITMPCallMessage(pipeline.next_id(), str(i), [])) for i in range(3)]
+            self.assertEqual([c.result().result for c in calls], [["0"], ["1"], ["2"]])
+        finally:
+            pipeline.stop_reader()
+        self.assertFalse(pipeline.reader_running)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import time
+import unittest
+from utils.head_device import HeadDevice
+from utils.head_simulator import HeadSimulator, SimulatedHead
+from utils.itmp import itmp_message
+from utils.itmp.utils import hdlc_byte_stuff
+from utils.itmp.itmp_recorder import ITMPRecorder, ITMPRecording, RX, TX, UNKNOWN_TYPE, summarize
+from utils.traffic_replay import TrafficReplayer
+
+
+class TestITMPRecorder(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "session.itmplog")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def record_session(self):
+        with HeadSimulator(SimulatedHead()) as simulator:
+            head = HeadDevice(simulator.path, description_cache=None, record=self.path)
+            try:
+                head.enable()
+                for _ in range(3):
+                    head.adc_p()
+                head.mot1_pos()
+            finally:
+                head.dev.close()
+                head.recorder.close()
+
+    def test_search_by_procedure(self):
+        self.record_session()
+        recording = ITMPRecording(self.path)
+        try:
+            requests = recording.by_procedure("adc/p", TX)
+            responses = recording.by_procedure("adc/p", RX)
+            self.assertEqual(len(requests), 3)
+            self.assertEqual(len(responses), 3)
+            for request, response in zip(requests, responses):
+                self.assertEqual(recording.index['id'][request], recording.index['id'][response])
+            messages = [message for _, _, message in recording.messages(recording.by_procedure("adc/p"))]
+            self.assertEqual(messages[0].procedure, "adc/p")
+            self.assertEqual(messages[1].result, [100])
+            self.assertEqual(len(recording.by_procedure("mot9/go")), 0)
+            self.assertEqual(dict(summarize(recording))["adc/p"], 3)
+            self.assertEqual(summarize(recording, requests[:2]), [("adc/p", 2)])
+        finally:
+            recording.close()
+
+    def test_search_by_time(self):
+        self.record_session()
+        recording = ITMPRecording(self.path)
+        try:
+            times = recording.index['time']
+            self.assertTrue((times[1:] >= times[:-1]).all())
+            self.assertEqual(len(recording.between(times[0], times[-1] + 1)), len(recording))
+            self.assertEqual(len(recording.between(times[-1] + 1, times[-1] + 2)), 0)
+        finally:
+            recording.close()
+
+    def test_replay_into_simulator(self):
+        self.record_session()
+        recording = ITMPRecording(self.path)
+        try:
+            responses, stats = TrafficReplayer(recording, speed=0).play_to_simulator(SimulatedHead())
+            self.assertEqual(len(responses), int((recording.index['direction'] == TX).sum()))
+            self.assertEqual(stats.summary()["steps"], 0)
+        finally:
+            recording.close()
+
+    def test_replay_keeps_spacing(self):
+        recorder = ITMPRecorder(self.path)
+        for i in range(3):
+            message = itmp_message.ITMPCallMessage(i, "adc/p", [])
+            recorder.record(TX, hdlc_byte_stuff.unstuff_bytes(message.to_hdlc()[1:-1]), message)
+            time.sleep(0.02)
+        recorder.close()
+        recording = ITMPRecording(self.path)
+        try:
+            frames = []
+            start = time.perf_counter()
+            TrafficReplayer(recording, speed=2).play(frames.append)
+            self.assertGreaterEqual(time.perf_counter() - start, 0.018)
+            self.assertEqual([itmp_message.ITMPMessage.from_hdlc(frame).id for frame in frames], [0, 1, 2])
+        finally:
+            recording.close()
+
+    def test_bad_frame_is_recorded(self):
+        recorder = ITMPRecorder(self.path)
+        recorder.record(RX, b'\x08\x00\x00')
+        recorder.close()
+        recording = ITMPRecording(self.path)
+        try:
+            self.assertEqual(recording.index['type'][0], UNKNOWN_TYPE)
+            self.assertIsNone(recording.procedure(0))
+            self.assertEqual(recording.frame(0), b'\x08\x00\x00')
+            self.assertIsNone(next(recording.messages())[2])
+        finally:
+            recording.close()
+
+    def test_open_while_recording(self):
+        recorder = ITMPRecorder(self.path)
+        try:
+            recording = ITMPRecording(self.path)
+            self.assertEqual(len(recording), 0)
+            self.assertEqual(summarize(recording), [])
+            recording.close()
+        finally:
+            recorder.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import time
+import unittest
+
+if os.name != 'nt':
+    from utils.itmp.utils import posix_serial_port
+
+
+@unittest.skipIf(os.name == 'nt', "POSIX only")
+class TestPosixSerialPort(unittest.TestCase):
+    def setUp(self):
+        self.master, slave = os.openpty()
+        self.port = posix_serial_port.PosixSerialPort(os.ttyname(slave), 115200, 0.2)
+        os.close(slave)
+
+    def tearDown(self):
+        self.port.close()
+        os.close(self.master)
+
+    def test_write(self):
+        self.port.write(b'\x7e\x04\x83\x06\x01`\xf7\x7e')
+        self.assertEqual(os.read(self.master, 64), b'\x7e\x04\x83\x06\x01`\xf7\x7e')
+
+    def test_read_frames_from_one_chunk(self):
+        os.write(self.master, b'\x7e\x01\x02\x7e\x7e\x03\x7e')
+        self.assertEqual(self.port.read_frame(), b'\x01\x02')
+        self.assertEqual(self.port.read_frame(), b'\x03')
+
+    def test_read_timeout(self):
+        start = time.monotonic()
+        self.assertEqual(self.port.read_frame(), b'')
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import time
+import unittest
+import numpy as np
+from utils.head_device import HeadDevice
+from utils.head_simulator import HeadSimulator, SimulatedHead
+from utils.pressure_sampler import PressureSampler, SampleRing
+
+
+class TestSampleRing(unittest.TestCase):
+    def test_wraps_in_order(self):
+        ring = SampleRing(4)
+        self.assertIsNone(ring.latest())
+        for i in range(6):
+            ring.append(float(i), 10.0 * i)
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(ring.count, 6)
+        self.assertEqual(ring.latest(), (5.0, 50.0))
+        times, values = ring.last()
+        self.assertEqual(times.tolist(), [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(values.tolist(), [20.0, 30.0, 40.0, 50.0])
+        self.assertEqual(ring.last(2)[0].tolist(), [4.0, 5.0])
+
+    def test_window(self):
+        ring = SampleRing(100)
+        for i in range(50):
+            ring.append(i * 0.1, float(i))
+        times, values = ring.window(0.5)
+        self.assertEqual(values.tolist(), [44.0, 45.0, 46.0, 47.0, 48.0, 49.0])
+        self.assertEqual(len(ring.window(1.0, now=100.0)[0]), 0)
+
+    def test_decimated(self):
+        ring = SampleRing(100)
+        for i in range(10):
+            ring.append(float(i), float(i))
+        times, values = ring.decimated(3)
+        # Blocks of 4: the oldest 2 samples do not fill a block.
+        self.assertEqual(times.tolist(), [5.0, 9.0])
+        self.assertEqual(values.tolist(), [3.5, 7.5])
+        self.assertEqual(len(ring.decimated(20)[0]), 10)
+
+
+class TestPressureSampler(unittest.TestCase):
+    def test_samples_simulated_head(self):
+        with HeadSimulator(SimulatedHead(latency=0.002)) as simulator:
+            head = HeadDevice(simulator.path, description_cache=None)
+            try:
+                with PressureSampler(head, rate=200, in_flight=4) as sampler:
+                    first = sampler.wait_sample(timeout=1.0)
+                    self.assertIsNotNone(first)
+                    self.assertEqual(first[1], 100.0)
+                    time.sleep(0.2)
+                    # Other calls share the pipeline with the sampler.
+                    self.assertEqual(head.mot1_pos(), [0])
+                    after = time.monotonic()
+                    sample = sampler.wait_sample(after, timeout=1.0)
+                    self.assertGreater(sample[0], after)
+                self.assertFalse(sampler.running)
+                self.assertGreater(len(sampler.samples), 20)
+                self.assertEqual(sampler.timeouts, 0)
+                times, values = sampler.window(0.1)
+                self.assertTrue(np.all(np.diff(times) > 0))
+                self.assertTrue(np.all(values == 100.0))
+            finally:
+                head.dev.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
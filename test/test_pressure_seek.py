@@ -0,0 +1,89 @@
+import contextlib
+import io
+import unittest
+from utils.head_device import HeadDevice, MotionWait
+from utils.head_simulator import HeadSimulator, SimulatedHead
+from utils.pressure_seek import SeekStrategy, seek_threshold
+
+
+class FakeAxis:
+    """Pressure 1000 above the contact position, 700 at and below it."""
+
+    def __init__(self, contact: int, position: int = 1500):
+        self.contact = contact
+        self.position = position
+        self.moves = []
+
+    def move(self, position):
+        self.moves.append(position)
+        self.position = position
+
+    def read(self):
+        return 700 if self.position <= self.contact else 1000
+
+
+class TestSeekThreshold(unittest.TestCase):
+    def test_strategies_find_contact(self):
+        for strategy in SeekStrategy:
+            axis = FakeAxis(contact=613)
+            result = seek_threshold(axis.move, axis.read, 800, 1500, 20, strategy=strategy)
+            self.assertTrue(result.found)
+            self.assertEqual(result.position, 613)
+            self.assertEqual(result.pressure, 700)
+            self.assertEqual(axis.position, 613)
+            # Plus at most one move back to the found position.
+            self.assertIn(len(axis.moves) - result.iterations, (0, 1))
+            # A fixed 1-step walk from 1500 would take 887 moves.
+            self.assertLessEqual(result.iterations, 16)
+
+    def test_coarse_steps_do_not_overshoot(self):
+        axis = FakeAxis(contact=1300)
+        seek_threshold(axis.move, axis.read, 800, 1500, 20, tolerance=10, coarse_steps=8)
+        # One coarse step is 185: nothing goes below the first crossed position.
+        self.assertGreaterEqual(min(axis.moves), 1500 - 2 * 185)
+
+    def test_tolerance(self):
+        axis = FakeAxis(contact=613)
+        result = seek_threshold(axis.move, axis.read, 800, 1500, 20, tolerance=10, strategy=SeekStrategy.BISECT)
+        self.assertLessEqual(result.position, 613)
+        self.assertGreater(result.position, 603)
+        self.assertLessEqual(result.iterations, 9)
+
+    def test_rising_pressure(self):
+        axis = FakeAxis(contact=0)
+        axis.read = lambda: 100 + axis.position
+        result = seek_threshold(axis.move, axis.read, 400, 0, 1000, below=False)
+        self.assertEqual(result.position, 301)
+
+    def test_not_found(self):
+        for strategy in SeekStrategy:
+            axis = FakeAxis(contact=0)
+            result = seek_threshold(axis.move, axis.read, 800, 1500, 20, strategy=strategy)
+            self.assertFalse(result.found)
+            self.assertEqual(result.position, 20)
+        with self.assertRaises(ValueError):
+            seek_threshold(axis.move, axis.read, 800, 1500, 20, tolerance=0)
+
+
+class TestHeadDeviceSeek(unittest.TestCase):
+    def test_seek_on_simulated_head(self):
+        head_model = SimulatedHead(time_scale=0, pressure=lambda positions: 700 if positions.get("mot1", 0) <= 640 else 1000)
+        with HeadSimulator(head_model) as simulator:
+            head = HeadDevice(simulator.path, description_cache=None, motion_wait=MotionWait.POLL)
+            try:
+                head.send_call("mot1/go", [1500, 100000, 0])
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    result = head.seek_pressure(800, start=1500, end=20, velocity=100000, tolerance=4)
+                # No debug output per probe move.
+                self.assertEqual(output.getvalue(), "")
+                self.assertTrue(result.found)
+                self.assertTrue(636 <= result.position <= 640)
+                self.assertEqual(head.positions["mot1"], result.position)
+                self.assertEqual(head.mot1_pos(), [result.position])
+            finally:
+                head.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import head_logic
+from utils import script_compiler
+from utils.head_simulator import HeadSimulator, SimulatedHead
+from utils.script_timing import estimate_script
+
+SCRIPT = [
+    ["enable", []],
+    ["mot1/go", [1700, 1500, 0]],
+    ["mot2/go", [-2000, 800, 5000]],
+    ["adc/p", []],
+    ["mot1/go", [0, 1500, 0]],
+]
+
+class TestScriptCompiler(unittest.TestCase):
+    def test_commands(self):
+        compiled = script_compiler.CompiledScript.compile(SCRIPT)
+        self.assertEqual(len(compiled), len(SCRIPT))
+        self.assertEqual([list(compiled.command(i)) for i in range(len(compiled))], SCRIPT)
+        self.assertEqual(compiled.procedures, ["enable", "mot1/go", "mot2/go", "adc/p"])
+        self.assertEqual(compiled.delays.tolist(), estimate_script(SCRIPT).durations.tolist())
+
+    def test_non_integer_arguments(self):
+        with self.assertRaises(script_compiler.UncompilableScriptError):
+            script_compiler.CompiledScript.compile([["mot1/go", [1.5, 1, 0]]])
+
+    def test_non_integer_script_is_streamed(self):
+        head_model = SimulatedHead(time_scale=0)
+        with tempfile.TemporaryDirectory() as tmp, HeadSimulator(head_model) as simulator:
+            filename = os.path.join(tmp, "script.json")
+            with open(filename, 'w') as file:
+                json.dump({"script": [["enable", []], ["pwm1", [0.5]], ["adc/p", []]]}, file)
+            logic = head_logic.HeadLogic(simulator.path, head_logic.AppMode.SCRIPT, description_cache=None)
+            try:
+                logic.set_script(filename, cache_dir=os.path.join(tmp, "cache"))
+                stats = logic.script()
+                self.assertEqual(len(stats), 3)
+                self.assertEqual(head_model.outputs["pwm1"], [0.5])
+                self.assertFalse(os.path.exists(os.path.join(tmp, "cache")))
+            finally:
+                logic._dev.close()
+
+    def test_compiled_run_is_quiet(self):
+        with tempfile.TemporaryDirectory() as tmp, HeadSimulator(SimulatedHead(time_scale=0)) as simulator:
+            filename = os.path.join(tmp, "script.json")
+            with open(filename, 'w') as file:
+                json.dump({"script": [["enable", []], ["mot1/go", [30, 1500, 0]], ["adc/p", []]]}, file)
+            logic = head_logic.HeadLogic(simulator.path, head_logic.AppMode.SCRIPT, description_cache=None)
+            try:
+                logic.set_script(filename, cache_dir=os.path.join(tmp, "cache"))
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    stats = logic.script()
+                self.assertEqual(len(stats), 3)
+                # No per-step debug output on the script path.
+                self.assertEqual(output.getvalue(), "")
+            finally:
+                logic._dev.close()
+
+    def test_cache_by_content_hash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "script.json")
+            with open(filename, 'w') as file:
+                json.dump({"script": SCRIPT}, file)
+            cache_dir = os.path.join(tmp, "cache")
+
+            first = script_compiler.load_or_compile(filename, cache_dir)
+            self.assertEqual(os.listdir(cache_dir), [script_compiler.script_hash(filename) + ".hcs"])
+
+            cached = script_compiler.load_or_compile(filename, cache_dir)
+            self.assertFalse(cached.args.flags.writeable)
+            self.assertEqual([cached.command(i) for i in range(len(cached))],
+                             [first.command(i) for i in range(len(first))])
+            self.assertEqual(cached.delays.tolist(), first.delays.tolist())
+
+if __name__ == '__main__':
+    unittest.main()
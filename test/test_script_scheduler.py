@@ -0,0 +1,77 @@
+import unittest
+from utils.script_scheduler import DeadlineScheduler, LatenessStats
+
+class FakeTime:
+    """Clock and sleep for the scheduler: a coarse sleep oversleeps by `oversleep`,
+    a spin (sleep(0)) advances the clock by 0.1 ms."""
+
+    def __init__(self, oversleep: float = 0.0005):
+        self.now = 0.0
+        self.oversleep = oversleep
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds + self.oversleep if seconds else 0.0001
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+    def test_work_does_not_accumulate(self):
+        fake = FakeTime()
+        scheduler = DeadlineScheduler(clock=fake.clock, sleep=fake.sleep)
+        scheduler.start(0.0)
+        for _ in range(20):
+            scheduler.wait()
+            # Serial I/O of the step.
+            fake.now += 0.002
+            scheduler.advance(0.005)
+        scheduler.wait(record=False)
+        # Chained sleeps would take 20 * (5 + 2) ms.
+        self.assertGreaterEqual(fake.now, 0.100)
+        self.assertLess(fake.now, 0.100 + 0.001)
+        self.assertEqual(len(scheduler.stats), 20)
+        self.assertLess(scheduler.stats.summary()["max"], 0.0002)
+
+    def test_overrun_is_caught_up(self):
+        fake = FakeTime()
+        scheduler = DeadlineScheduler(clock=fake.clock, sleep=fake.sleep)
+        scheduler.start(0.0)
+        scheduler.wait()
+        fake.now += 0.03
+        scheduler.advance(0.01)
+        # The second step is 20 ms late and starts at once, the third one is back on time.
+        self.assertAlmostEqual(scheduler.wait(), 0.02)
+        scheduler.advance(0.03)
+        self.assertTrue(0 <= scheduler.wait() < 0.0002)
+
+    def test_spin_tail_with_fake_clock(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            # The coarse sleep oversleeps by 1 ms, the spin advances the clock by 0.1 ms.
+            now[0] += seconds + 0.001 if seconds else 0.0001
+
+        scheduler = DeadlineScheduler(spin=0.002, clock=lambda: now[0], sleep=sleep)
+        scheduler.start(0.0)
+        scheduler.advance(0.1)
+        lateness = scheduler.wait()
+        self.assertAlmostEqual(sleeps[0], 0.098)
+        self.assertTrue(0 <= lateness < 0.0002)
+        self.assertGreater(scheduler.oversleep, 0)
+
+class TestLatenessStats(unittest.TestCase):
+    def test_summary(self):
+        stats = LatenessStats()
+        self.assertEqual(stats.summary(), {"steps": 0})
+        for value in (0.0, 0.0005, 0.002, 0.004):
+            stats.add(value)
+        summary = stats.summary()
+        self.assertEqual(summary["steps"], 4)
+        self.assertAlmostEqual(summary["max"], 0.004)
+        self.assertEqual(summary["late_1ms"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
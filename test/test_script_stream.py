@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+from utils.script_stream import ScriptStream, read_json, script_format
+from utils.script_timing import estimate_script, estimate_stream
+
+import head_logic
+
+SCRIPT = [
+    ["enable", []],
+    ["mot1/go", [1700, 1500, 0]],
+    ["mot2/go", [-2000, 800, 5000]],
+    ["adc/p", []],
+    ["mot1/go", [0, 1500, 0]],
+]
+
+class TestScriptStream(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, text: str) -> str:
+        filename = os.path.join(self.tmp.name, name)
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write(text)
+        return filename
+
+    def test_formats(self):
+        files = [
+            self.write("script.jsonl", "\n".join(json.dumps(command) for command in SCRIPT)),
+            self.write("script.csv", "procedure,position,velocity,acceleration\n"
+                       + "\n".join(",".join(map(str, [command[0]] + command[1])) for command in SCRIPT)),
+            self.write("script.json", json.dumps({"addr": 4, "name": "x" * 100, "script": SCRIPT})),
+            self.write("array.json", json.dumps(SCRIPT, indent=4)),
+        ]
+        for filename in files:
+            with self.subTest(filename=os.path.basename(filename)):
+                self.assertEqual(list(ScriptStream(filename)), SCRIPT)
+
+    def test_json_across_chunks(self):
+        filename = self.write("script.json", json.dumps({"other": [12345, 67890], "script": SCRIPT}))
+        for chunk_size in (1, 3, 7):
+            with open(filename, 'r', encoding='utf-8') as file:
+                self.assertEqual(list(read_json(file, chunk_size)), SCRIPT)
+
+    def test_missing_script(self):
+        filename = self.write("script.json", json.dumps({"addr": 4}))
+        with self.assertRaises(ValueError):
+            list(ScriptStream(filename))
+
+    def test_malformed_line(self):
+        filename = self.write("script.jsonl", json.dumps(SCRIPT[0]) + "\n[\"mot1/go\", 10]\n")
+        stream = iter(ScriptStream(filename))
+        self.assertEqual(next(stream), SCRIPT[0])
+        with self.assertRaises(ValueError):
+            next(stream)
+
+    def test_malformed_csv(self):
+        # Over the csv module's field size limit: csv.Error, reported as a ValueError.
+        filename = self.write("script.csv", "mot1/go,10,1000,0\nmot1/go,\"" + "1" * 200000 + "\"\n")
+        stream = iter(ScriptStream(filename))
+        self.assertEqual(next(stream), ["mot1/go", [10, 1000, 0]])
+        with self.assertRaisesRegex(ValueError, "Line 2"):
+            next(stream)
+
+    def test_read_ahead_is_bounded(self):
+        filename = self.write("long.jsonl", "".join(json.dumps(["mot1/go", [i, 1000, 0]]) + "\n" for i in range(10000)))
+        stream = ScriptStream(filename, read_ahead=8)
+        commands = iter(stream)
+        self.assertEqual(next(commands), ["mot1/go", [0, 1000, 0]])
+        self.assertLessEqual(stream.parsed, 8 + 2)
+        commands.close()
+
+    def test_format_by_extension(self):
+        self.assertEqual(script_format("a.JSONL"), "jsonl")
+        self.assertEqual(script_format("a.csv"), "csv")
+        self.assertEqual(script_format("a.txt"), "json")
+
+    def test_estimate_stream_matches_estimate_script(self):
+        script = SCRIPT * 5
+        expected = estimate_script(script).durations.tolist()
+        self.assertEqual(estimate_stream(iter(script), chunk_size=3).durations.tolist(), expected)
+
+    def test_dry_run_streams_jsonl(self):
+        filename = self.write("script.jsonl", "\n".join(json.dumps(command) for command in SCRIPT))
+        logic = head_logic.HeadLogic("", head_logic.AppMode.SCRIPT, dry_run=True)
+        logic.set_script(filename, cache_dir=None)
+        self.assertTrue(logic.stream)
+        self.assertAlmostEqual(logic.start().total, estimate_script(SCRIPT).total)
+
+if __name__ == '__main__':
+    unittest.main()
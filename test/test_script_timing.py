@@ -0,0 +1,40 @@
+import unittest
+from utils.head_device import calc_move_time, MOVE_TIME_MARGIN
+from utils.script_timing import estimate_script, move_times
+
+import head_logic
+
+class TestScriptTiming(unittest.TestCase):
+    def test_move_times_match_scalar(self):
+        cases = [(0, 100, 0), (100, 100, 0), (100, 1000, 10), (5000, 1000, 10000), (1, 1, 1)]
+        expected = [calc_move_time(*case) for case in cases]
+        result = move_times(*zip(*cases))
+        for r, e in zip(result, expected):
+            self.assertAlmostEqual(r, e)
+
+    def test_motors_are_tracked_separately(self):
+        script = [
+            ["enable", []],
+            ["mot1/go", [1000, 1000, 0]],
+            ["mot2/go", [500, 1000, 0]],
+            ["mot1/go", [1000, 1000, 0]],
+            ["mot2/go", [0, 500, 0]],
+        ]
+        timing = estimate_script(script)
+        self.assertEqual(len(timing), 5)
+        for r, e in zip(timing.durations, [0, 1 + MOVE_TIME_MARGIN, 0.5 + MOVE_TIME_MARGIN, 0, 1 + MOVE_TIME_MARGIN]):
+            self.assertAlmostEqual(r, e)
+
+    def test_invalid_velocity(self):
+        with self.assertRaises(ValueError):
+            estimate_script([["mot1/go", [10, 0, 0]]])
+
+    def test_dry_run_without_device(self):
+        logic = head_logic.HeadLogic("COM-missing", head_logic.AppMode.SCRIPT, dry_run=True)
+        logic.set_script("resources/scripts/script.json")
+        timing = logic.start()
+        self.assertEqual(len(timing), 7)
+        self.assertGreater(timing.total, 0)
+
+if __name__ == '__main__':
+    unittest.main()
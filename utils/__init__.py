@@ -1,3 +1,10 @@
 from . import com
 from . import itmp_serial
 from . import head_device
+from . import async_head_device
+from . import script_timing
+from . import script_compiler
+from . import script_stream
+from . import script_scheduler
+from . import pressure_sampler
+from . import frame_pipeline
@@ -0,0 +1,162 @@
+from .itmp import *
+from . import com
+from .device_description import DeviceDescription, DescriptionCache, DEFAULT_DESCRIPTION_CACHE
+from .head_device import calc_move_time, MOTION_PROCEDURES, MOVE_TIME_MARGIN
+
+import asyncio
+import logging
+from typing import List, Any, Optional
+
+
+class AsyncHeadDevice:
+    """asyncio version of HeadDevice.
+
+    All commands are coroutines and motion waits are awaited, so one event loop
+    can drive several heads (and other I/O) concurrently:
+
+        async with AsyncHeadDevice("/dev/ttyUSB0") as head:
+            await head.enable()
+            await asyncio.gather(head.mot1_go(1000, 700, 0), head.adc_p())
+    """
+
+    def __init__(
+            self,
+            dev_name: str,
+            baudrate: int = 115200,
+            timeout: float = 1.0,
+            description_cache: Optional[str] = DEFAULT_DESCRIPTION_CACHE
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.dev_name = dev_name
+        try:
+            port = utils.serial_port.open_serial_port(dev_name, baudrate, timeout)
+        except Exception:
+            self.logger.log(logging.FATAL, msg="Failed to connect the head device.")
+            raise Exception("Failed to connect the head device.")
+        self.logger.log(level=logging.INFO, msg="Head device was connected successfully.")
+        self.dev = itmp_async.AsyncITMPDevice(port, timeout)
+        self._positions = {motor: 0 for motor in MOTION_PROCEDURES.values()}
+
+        self.description_cache = DescriptionCache(description_cache) if description_cache else None
+        self._description = None
+        self._description_from_cache = False
+        if self.description_cache is not None:
+            self._description = self.description_cache.load(dev_name, com.port_identity(dev_name))
+            self._description_from_cache = self._description is not None
+
+    @property
+    def positions(self) -> dict:
+        """Last commanded position of every motor."""
+        return dict(self._positions)
+
+    @property
+    def _current_pos(self) -> int:
+        return self._positions["mot1"]
+
+    @_current_pos.setter
+    def _current_pos(self, pos: int) -> None:
+        self._positions["mot1"] = pos
+
+    def calc_delay(self, command) -> float:
+        if not (command[0] in MOTION_PROCEDURES):
+            return 0
+        procedure, (pos, velocity, accs) = command[0], command[1][:3]
+        d_x = abs(pos - self._positions[MOTION_PROCEDURES[procedure]])
+        if d_x == 0:
+            return 0
+        return calc_move_time(d_x, velocity, accs) + MOVE_TIME_MARGIN
+
+    async def __aenter__(self) -> "AsyncHeadDevice":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.dev.close()
+
+    async def refresh_description(self) -> DeviceDescription:
+        """Requests the description from the device and updates the cache."""
+        self._description = DeviceDescription.from_description((await self.descr(""))['description'])
+        self._description_from_cache = False
+        if self.description_cache is not None:
+            self.description_cache.store(self.dev_name, com.port_identity(self.dev_name), self._description)
+        return self._description
+
+    async def _knows_procedure(self, procedure: str) -> bool:
+        if self._description is None:
+            await self.refresh_description()
+        elif procedure not in self._description and self._description_from_cache:
+            # The cached description may be older than the device firmware.
+            await self.refresh_description()
+        return procedure in self._description
+
+    async def _send_call_and_get_result(self, procedure: str, args: List[int], timeout: float = None) -> itmp_message.ITMPMessage:
+        self.logger.log(level=logging.DEBUG, msg=f"PROC: {procedure} // ARGS: {args}")
+        call_msg = itmp_message.ITMPCallMessage(self.dev.next_id(), procedure, args)
+        return await self.dev.request(call_msg, timeout)
+
+    async def send_call(
+            self,
+            procedure: str,
+            args: list,
+            delay: float = 0
+    ) -> itmp_message.ITMPResultMessage:
+        if not await self._knows_procedure(procedure):
+            self.logger.log(level=logging.ERROR, msg=f"Unknown command: {procedure}.")
+            raise Exception(f"Unknown command: {procedure}.")
+
+        call = asyncio.ensure_future(self._send_call_and_get_result(procedure, args, delay + self.dev.timeout))
+        # As HeadDevice.send_call: the move (or `delay`) is waited out before the result.
+        await asyncio.sleep(delay)
+        res = await call
+        if procedure in MOTION_PROCEDURES:
+            self._positions[MOTION_PROCEDURES[procedure]] = args[0]
+        return res
+
+    async def adc_p(self) -> List[Any]:
+        res = await self._send_call_and_get_result("adc/p", [])
+        return res.to_list()[2]
+
+    async def enable(self) -> List[Any]:
+        res = await self._send_call_and_get_result("enable", [])
+        return res.to_list()[2]
+
+    async def mot1_pos(self) -> List[Any]:
+        res = await self._send_call_and_get_result("mot1/pos", [])
+        return res.to_list()[2]
+
+    async def pwm(self, pwm_id: int, val: int) -> List[Any]:
+        res = await self._send_call_and_get_result(f"pwm{pwm_id}", [val])
+        return res.to_list()[2]
+
+    async def set_valves(self, valve1: int, valve2: int) -> List[Any]:
+        to_send = (12, (valve1 * 2 + valve2) * 4)
+        res = await self._send_call_and_get_result("gpio", to_send)
+        return res.to_list()
+
+    async def descr(self, topic) -> dict:
+        describe_msg = itmp_message.ITMPDescribeMessage(self.dev.next_id(), topic)
+        result_msg = await self.dev.request(describe_msg)
+        return result_msg.to_dict()
+
+    async def mot1_go(self, pos: int, velocity: int, accs: int) -> List[Any]:
+        if velocity <= 0:
+            raise ValueError("Velocity must be positive.")
+        if accs < 0:
+            raise ValueError("Accseleration must be positive.")
+
+        delta = abs(pos - self._current_pos)
+        if delta == 0:
+            return
+
+        move_time = calc_move_time(delta, velocity, accs) + MOVE_TIME_MARGIN
+        call = asyncio.ensure_future(self._send_call_and_get_result(
+            "mot1/go", [pos, velocity, accs], move_time + self.dev.timeout))
+
+        await asyncio.sleep(move_time)
+
+        res = await call
+        self._current_pos = pos
+
+        return res.to_list()[2]
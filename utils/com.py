@@ -12,3 +12,13 @@ def open_serial_port(port: str, baudrate=115200, timeout=0.1) -> serial.Serial:
     ser = serial.Serial(port, baudrate=baudrate, timeout=timeout)
     time.sleep(2) 
     return ser
+
+
+def port_identity(port: str) -> str:
+    """USB identity (VID:PID:serial) of the device behind the port, or "" if unknown."""
+    for info in serial.tools.list_ports.comports():
+        if info.device == port or info.name == port:
+            if info.vid is not None:
+                return f"{info.vid:04X}:{info.pid:04X}:{info.serial_number or ''}"
+            return info.hwid or ""
+    return ""
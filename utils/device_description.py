@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Optional
+
+
+DEFAULT_DESCRIPTION_CACHE = os.path.join(os.path.expanduser("~"), ".head_controller", "descriptions.json")
+
+# Procedure names are terminated with '&' in the device description.
+_PROCEDURE = re.compile(r'([^&\s,;]+)&')
+
+
+class DeviceDescription:
+    """Procedure table built from the root DESCRIPTION of the device."""
+
+    def __init__(self, procedures: Dict[str, str]):
+        self.procedures = procedures
+
+    @classmethod
+    def from_description(cls, description: Any) -> "DeviceDescription":
+        """Parses the `description` field of a DESCRIPTION message (a string or a list of strings)."""
+        entries = [description] if isinstance(description, str) else list(description)
+        procedures = {}
+        for entry in entries:
+            entry = str(entry)
+            matches = list(_PROCEDURE.finditer(entry))
+            if not matches and entry.strip():
+                procedures[entry.strip()] = ""
+            for i, match in enumerate(matches):
+                end = matches[i + 1].start(1) if i + 1 < len(matches) else len(entry)
+                procedures[match.group(1)] = entry[match.end():end].strip()
+        return cls(procedures)
+
+    def __contains__(self, procedure: str) -> bool:
+        return procedure in self.procedures
+
+    def __len__(self) -> int:
+        return len(self.procedures)
+
+
+class DescriptionCache:
+    """Device descriptions persisted in a JSON file, keyed by port and device identity."""
+
+    def __init__(self, path: str = DEFAULT_DESCRIPTION_CACHE):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+
+    @staticmethod
+    def key(port: str, identity: str) -> str:
+        return f"{port}|{identity}"
+
+    def load(self, port: str, identity: str) -> Optional[DeviceDescription]:
+        entry = self._read().get(self.key(port, identity))
+        if entry is None:
+            return None
+        return DeviceDescription(entry)
+
+    def store(self, port: str, identity: str, description: DeviceDescription) -> None:
+        data = self._read()
+        data[self.key(port, identity)] = description.procedures
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.log(level=logging.WARNING, msg=f"Failed to save the device description cache: {self.path} ({e})")
+
+    def _read(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.log(level=logging.WARNING, msg=f"Failed to read the device description cache: {self.path} ({e})")
+            return {}
+        return data if isinstance(data, dict) else {}
@@ -0,0 +1,70 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class LatestSlot:
+    """Hand-over point between two pipeline stages holding a single item.
+
+    put() never blocks: a new item replaces the one the consumer has not taken
+    yet (counted in `dropped`), so a slow consumer always gets the latest item
+    and nothing piles up behind it.
+    """
+
+    def __init__(self):
+        self.dropped = 0
+        self._item = None
+        self._full = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item: Any) -> None:
+        with self._cond:
+            if self._full:
+                self.dropped += 1
+            self._item = item
+            self._full = True
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Takes the item, waiting up to `timeout` for one. None on timeout or once closed."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._full or self._closed, timeout) or not self._full:
+                return None
+            return self._take()
+
+    def get_nowait(self) -> Any:
+        with self._cond:
+            return self._take() if self._full else None
+
+    def close(self) -> None:
+        """Wakes up the consumer; get() returns None from now on when empty."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _take(self) -> Any:
+        item = self._item
+        self._item = None
+        self._full = False
+        return item
+
+
+class StageStats:
+    """Frame count and frame rate (measured over `window` seconds) of one pipeline stage."""
+
+    def __init__(self, window: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.clock = clock
+        self.frames = 0
+        self.fps = 0.0
+        self._mark = clock()
+        self._mark_frames = 0
+
+    def tick(self) -> None:
+        self.frames += 1
+        now = self.clock()
+        if now - self._mark >= self.window:
+            self.fps = (self.frames - self._mark_frames) / (now - self._mark)
+            self._mark = now
+            self._mark_frames = self.frames
@@ -1,60 +1,262 @@
 from .itmp import *
+from . import com
+from .device_description import DeviceDescription, DescriptionCache, DEFAULT_DESCRIPTION_CACHE
+from .pressure_seek import SeekResult, SeekStrategy, seek_threshold
 
 import logging
 import math
 import time
-import pywintypes
-from typing import List, Any
+from enum import Enum
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+
+# Extra wait after the estimated end of a move before reading the result.
+MOVE_TIME_MARGIN = 0.08
+
+
+def calc_move_time(distance: int, velocity: int, accs: int) -> float:
+    """Duration of a trapezoid velocity profile move (without the margin)."""
+    if distance == 0:
+        return 0
+    if accs == 0:
+        return distance / velocity
+
+    t_acc = velocity / accs
+    d_acc = (velocity ** 2) / (2 * accs)
+    if distance <= 2 * d_acc:
+        return 2 * math.sqrt(distance / accs)
+    return 2 * t_acc + (distance - 2 * d_acc) / velocity
+
+
+class MotionWait(Enum):
+    # Sleep for the estimated move time.
+    SLEEP = 0
+    # Poll the motor position until the target is reached (the estimate is the timeout).
+    POLL = 1
+
+
+# Motion procedures and the motor they move.
+MOTION_PROCEDURES = {"mot1/go": "mot1", "mot2/go": "mot2"}
 
 
 class HeadDevice:
-    def __init__(self, dev_name: str):
+    def __init__(
+            self,
+            dev_name: str,
+            description_cache: Optional[str] = DEFAULT_DESCRIPTION_CACHE,
+            motion_wait: MotionWait = MotionWait.SLEEP,
+            poll_rate: float = 100.0,
+            position_tolerance: int = 0,
+            address: int = 0x08,
+            bus: Optional[itmp_bus.ITMPBus] = None,
+            record: Optional[str] = None
+    ):
         self.logger = logging.getLogger(__name__)
-        try:
-            self.dev = itmp_serial.ITMPSerialDevice(dev_name)
-        except pywintypes.error:
-            self.logger.log(logging.FATAL, msg="Failed to connect the head device.")
-            raise Exception("Failed to connect the head device.")
+        self.dev_name = dev_name
+        self.description_cache = DescriptionCache(description_cache) if description_cache else None
+        self.motion_wait = motion_wait
+        self.poll_rate = poll_rate
+        self.position_tolerance = position_tolerance
+        # Several heads may share one serial line (bus), each with its own HDLC address.
+        self.address = address
+        self.bus = bus
+        # Per-procedure latency histograms (kept across reconnects; not collected on a bus).
+        self.metrics = itmp_metrics.ITMPMetrics()
+        # Binary log of the serial traffic (see utils.traffic_replay; not recorded on a bus).
+        self.recorder = itmp_recorder.ITMPRecorder(record) if record else None
+        # Callbacks of the subscribed topics (kept across reconnects).
+        self._subscriptions: Dict[str, List[Callable[[str, List[Any]], None]]] = {}
+        self._connect()
+        self._positions = {motor: 0 for motor in MOTION_PROCEDURES.values()}
+
+    @property
+    def positions(self) -> dict:
+        """Last commanded position of every motor."""
+        return dict(self._positions)
+
+    @property
+    def _current_pos(self) -> int:
+        return self._positions["mot1"]
+
+    @_current_pos.setter
+    def _current_pos(self, pos: int) -> None:
+        self._positions["mot1"] = pos
+
+    def _connect(self) -> None:
+        if self.bus is not None:
+            self.dev = None
+            self.calls = self.bus.device(self.address)
+        else:
+            try:
+                self.dev = itmp_serial.ITMPSerialDevice(self.dev_name, address=self.address,
+                                                         metrics=self.metrics, recorder=self.recorder)
+            except itmp_serial.SerialPortError:
+                self.logger.log(logging.FATAL, msg="Failed to connect the head device.")
+                raise Exception("Failed to connect the head device.")
+            self.calls = itmp_pipeline.ITMPCallPipeline(self.dev, timeout=self.dev.read_timeout)
+        self.calls.on_event = self._on_event
         self.logger.log(level=logging.INFO, msg="Head device was connected successfully.")
-        self._next_id = 0
-        self._current_pos = 0
+        self._description = None
+        self._description_from_cache = False
+
+    def reconnect(self) -> None:
+        """Reopens the port; the device description is resolved again on next use
+        and the subscribed topics are subscribed again."""
+        self._stop_reader()
+        if self.dev is not None:
+            self.dev.close()
+        self._connect()
+        if self._subscriptions:
+            self._start_reader()
+            for topic in self._subscriptions:
+                self._send_subscription(itmp_message.ITMPSubscribeMessage, topic)
+
+    def close(self) -> None:
+        self._stop_reader()
+        if self.dev is not None:
+            self.dev.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def subscribe(self, topic: str, callback: Callable[[str, List[Any]], None]) -> None:
+        """Calls `callback(topic, arguments)` for every EVENT the head publishes on
+        `topic` (SUBSCRIBE is sent for the first callback of a topic). Callbacks run
+        on the reader thread: they must return quickly and must not wait for calls."""
+        if topic in self._subscriptions:
+            self._subscriptions[topic].append(callback)
+            return
+        # Registered first: events may arrive right after the acknowledgement.
+        self._subscriptions[topic] = [callback]
+        self._start_reader()
+        try:
+            self._send_subscription(itmp_message.ITMPSubscribeMessage, topic)
+        except Exception:
+            del self._subscriptions[topic]
+            if not self._subscriptions:
+                self._stop_reader()
+            raise
+
+    def unsubscribe(self, topic: str, callback: Optional[Callable[[str, List[Any]], None]] = None) -> None:
+        """Removes `callback` (all callbacks if None) of `topic`; UNSUBSCRIBE is sent
+        when no callback is left."""
+        callbacks = self._subscriptions.get(topic)
+        if callbacks is None:
+            return
+        if callback is not None and callback in callbacks:
+            callbacks.remove(callback)
+        if callback is None or not callbacks:
+            del self._subscriptions[topic]
+            self._send_subscription(itmp_message.ITMPUnsubscribeMessage, topic)
+        if not self._subscriptions:
+            self._stop_reader()
+
+    def _send_subscription(self, message_class, topic: str) -> itmp_message.ITMPMessage:
+        return self.calls.submit(message_class(self._get_next_id(), topic)).result()
+
+    def _on_event(self, message: itmp_message.ITMPEventMessage) -> None:
+        for callback in list(self._subscriptions.get(message.topic, ())):
+            try:
+                callback(message.topic, message.arguments)
+            except Exception as e:
+                self.logger.log(level=logging.ERROR, msg=f"Subscriber of {message.topic} failed: {e}")
+
+    def _start_reader(self) -> None:
+        # Bus devices are read by the bus reader thread.
+        if hasattr(self.calls, "start_reader"):
+            self.calls.start_reader()
+
+    def _stop_reader(self) -> None:
+        if hasattr(self.calls, "stop_reader"):
+            self.calls.stop_reader()
+
+    @property
+    def description(self) -> DeviceDescription:
+        """Procedure table of the device: loaded from the description cache
+        (by port and device identity) or requested with DESCRIBE once."""
+        if self._description is None:
+            if self.description_cache is not None:
+                self._description = self.description_cache.load(*self._description_key())
+                self._description_from_cache = self._description is not None
+            if self._description is None:
+                self.refresh_description()
+        return self._description
+
+    def refresh_description(self) -> DeviceDescription:
+        """Requests the description from the device and updates the cache."""
+        self._description = DeviceDescription.from_description(self.descr("")['description'])
+        self._description_from_cache = False
+        if self.description_cache is not None:
+            self.description_cache.store(*self._description_key(), self._description)
+        return self._description
+
+    def _description_key(self) -> Tuple[str, str]:
+        port = self.dev_name if self.bus is None else f"{self.dev_name}@{self.address:#04x}"
+        return port, com.port_identity(self.dev_name)
+
+    def _knows_procedure(self, procedure: str) -> bool:
+        if procedure in self.description:
+            return True
+        if self._description_from_cache:
+            # The cached description may be older than the device firmware.
+            return procedure in self.refresh_description()
+        return False
+
+    def export_metrics(self, path: str) -> None:
+        """Writes the request metrics to `path` (JSON for *.json, Prometheus text otherwise)."""
+        self.metrics.export(path)
 
     def _get_next_id(self) -> int:
-        return 1
+        return self.calls.next_id()
 
-    def _send_call_and_get_result(self, procedure: str, args: List[int]) -> itmp_message.ITMPMessage:
+    def call_async(self, procedure: str, args: List[int]) -> itmp_pipeline.ITMPPendingCall:
+        """Sends a CALL without waiting for its RESULT; several calls may be in flight at once."""
         self.logger.log(level=logging.DEBUG, msg=f"PROC: {procedure} // ARGS: {args}")
-        msg_id = self._get_next_id()
-        call_msg = itmp_message.ITMPCallMessage(msg_id, procedure, args)
-        self.dev.write(call_msg)
-        result_msg = self.dev.read()
+        call_msg = itmp_message.ITMPCallMessage(self._get_next_id(), procedure, args)
+        return self.calls.submit(call_msg)
 
-        return result_msg
+    def call_many(self, calls: List[Tuple[str, List[int]]]) -> List[List[Any]]:
+        """Pipelines several CALLs and returns their results in the same order."""
+        pending = [self.call_async(procedure, args) for procedure, args in calls]
+        return [call.result().to_list()[2] for call in pending]
+
+    def _send_call_and_get_result(self, procedure: str, args: List[int]) -> itmp_message.ITMPMessage:
+        return self.call_async(procedure, args).result()
     
-    def _calc_mot_delay(self, pos: int, velocity: int, accs: int) -> 0:
-        d_x = abs(pos - self._current_pos)
+    def _calc_mot_delay(self, pos: int, velocity: int, accs: int, motor: str = "mot1") -> 0:
+        d_x = abs(pos - self._positions[motor])
         if d_x == 0:
             return 0
-        
-        if accs == 0:
-            move_time = d_x / velocity
-        else:
-            t_acc = velocity / accs
-            d_acc = (velocity ** 2) / (2 * accs)
-            if d_x <= 2 * d_acc:
-                move_time = 2 * math.sqrt(d_x / accs)
-            else:
-                move_time = 2 * t_acc + (d_x - 2 * d_acc) / velocity
-
-        move_time += 0.08
-        return move_time
+        return calc_move_time(d_x, velocity, accs) + MOVE_TIME_MARGIN
 
     def calc_delay(self, command) -> float:
-        print("COMMAND LOL: ", command)
-        delay_sens = ["mot1/go", "mot2/go"]
-        if not (command[0] in delay_sens):
+        if not (command[0] in MOTION_PROCEDURES):
             return 0
-        return self._calc_mot_delay(command[1][0], command[1][1], command[1][2])
+        return self._calc_mot_delay(command[1][0], command[1][1], command[1][2], MOTION_PROCEDURES[command[0]])
+
+    def _wait_move(self, motor: str, target: int, move_time: float) -> None:
+        if move_time <= 0:
+            return
+        if self.motion_wait == MotionWait.POLL:
+            self.wait_position(motor, target, move_time)
+        else:
+            time.sleep(move_time)
+
+    def wait_position(self, motor: str, target: int, timeout: float) -> bool:
+        """Polls `<motor>/pos` at `poll_rate` until it is within `position_tolerance`
+        of `target`. Returns False if the motor did not get there within `timeout`."""
+        deadline = time.monotonic() + timeout
+        period = 1 / self.poll_rate
+        while True:
+            result = self._send_call_and_get_result(f"{motor}/pos", []).to_list()[2]
+            pos = result[0] if isinstance(result, list) else result
+            if abs(pos - target) <= self.position_tolerance:
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.logger.log(level=logging.WARNING, msg=f"{motor} did not reach {target} in {timeout:.3f} s (at {pos}).")
+                return False
+            time.sleep(min(period, remaining))
     
     def send_call(
             self,
@@ -62,19 +264,44 @@ class HeadDevice:
             args: list,
             delay: float = 0
     ) -> itmp_message.ITMPResultMessage:
-        msg_id = self._next_id
-
-        commands_list = self.descr("")['description']
-        if not ((procedure + '&') in commands_list):
-            self.logger(level=logging.ERROR, msg=f"Unknown command: {procedure}.")
+        if not self._knows_procedure(procedure):
+            self.logger.log(level=logging.ERROR, msg=f"Unknown command: {procedure}.")
             raise Exception(f"Unknown command: {procedure}.")
         
-        call_msg = itmp_message.ITMPCallMessage(msg_id, procedure, args)
-        self.dev.write(call_msg)
-        time.sleep(delay)
-        print(delay)
-        
-        return self.dev.read()
+        call = self.call_async(procedure, args)
+        if procedure in MOTION_PROCEDURES:
+            self._wait_move(MOTION_PROCEDURES[procedure], args[0], delay)
+            self._positions[MOTION_PROCEDURES[procedure]] = args[0]
+        else:
+            time.sleep(delay)
+
+        return call.result()
+
+    def seek_pressure(
+            self,
+            threshold: float,
+            start: int,
+            end: int,
+            velocity: int,
+            accs: int = 0,
+            tolerance: int = 1,
+            strategy: SeekStrategy = SeekStrategy.COARSE_FINE,
+            read: Optional[Callable[[], float]] = None,
+            motor: str = "mot1",
+            below: bool = True
+    ) -> SeekResult:
+        """Moves `motor` between `start` and `end` to find where the pressure crosses
+        `threshold` (see pressure_seek.seek_threshold). The pressure is read with one
+        adc/p call per move, or with `read` (e.g. from a PressureSampler)."""
+        def move(position: int) -> None:
+            self.send_call(f"{motor}/go", [position, velocity, accs],
+                           delay=self._calc_mot_delay(position, velocity, accs, motor))
+
+        if read is None:
+            read = lambda: self.adc_p()[0]
+        result = seek_threshold(move, read, threshold, start, end, tolerance, strategy, below=below)
+        self.logger.log(level=logging.INFO, msg=f"Pressure seek: {result}")
+        return result
 
     def adc_p(self) -> List[Any]:
         res = self._send_call_and_get_result("adc/p", [])
@@ -98,10 +325,8 @@ class HeadDevice:
         return res.to_list()
 
     def descr(self, topic) -> dict:
-        msg_id = 1
-        describe_msg = itmp_message.ITMPDescribeMessage(msg_id, topic)
-        self.dev.write(describe_msg)
-        result_msg = self.dev.read()
+        describe_msg = itmp_message.ITMPDescribeMessage(self._get_next_id(), topic)
+        result_msg = self.calls.submit(describe_msg).result()
         return result_msg.to_dict()
 
     def mot1_go(self, pos: int, velocity: int, accs: int) -> itmp_message.ITMPMessage:
@@ -114,25 +339,13 @@ class HeadDevice:
         if delta == 0:
             return
         
-        if accs == 0:
-            move_time = delta / velocity
-        else:
-            t_acc = velocity / accs
-            d_acc = (velocity ** 2) / (2 * accs)
-            if delta <= 2 * d_acc:
-                move_time = 2 * math.sqrt(delta / accs)
-            else:
-                move_time = 2 * t_acc + (delta - 2 * d_acc) / velocity
-
-        move_time += 0.08
+        move_time = calc_move_time(delta, velocity, accs) + MOVE_TIME_MARGIN
 
-        msg_id = 1
-        call_msg = itmp_message.ITMPCallMessage(msg_id, "mot1/go", [pos, velocity, accs])
-        self.dev.write(call_msg)
+        call = self.call_async("mot1/go", [pos, velocity, accs])
 
-        time.sleep(move_time)
+        self._wait_move("mot1", pos, move_time)
 
-        res = self.dev.read()
+        res = call.result()
         self._current_pos = pos
 
         return res.to_list()[2]
\ No newline at end of file
@@ -0,0 +1,359 @@
+"""Simulated head speaking ITMP (HDLC + CBOR) over a pty or a TCP socket.
+
+    python -m utils.head_simulator                      # prints the pty path to connect to
+    python -m utils.head_simulator --socket 127.0.0.1:5555 --latency 0.002 --jitter 0.001
+"""
+import argparse
+import heapq
+import logging
+import math
+import os
+import random
+import re
+import select
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cbor2
+
+from .head_device import calc_move_time
+from .itmp import itmp_message
+from .itmp.utils import crc8, hdlc_byte_stuff
+from .itmp.utils.hdlc_deframer import HDLCDeframer
+
+
+# Root description in the format of the real head ("procedure&arguments").
+DESCRIPTION = "\n".join([
+    "enable&[]",
+    "mot1/go&[pos, vel, acc]",
+    "mot1/pos&[]",
+    "mot2/go&[pos, vel, acc]",
+    "mot2/pos&[]",
+    "adc/p&[]",
+    "gpio&[pin, value]",
+    "pwm1&[duty]",
+    "pwm2&[duty]",
+    "pwm3&[duty]",
+    "pwm4&[duty]",
+])
+
+_MOTOR = re.compile(r'^(mot\d+)/(go|pos)$')
+# Topics that can be subscribed to: readings, published as EVENTs with the procedure result.
+_TOPIC = re.compile(r'^(adc/p|mot\d+/pos)$')
+
+
+def travelled(distance: float, velocity: float, accs: float, t: float) -> float:
+    """Distance covered `t` seconds into a move along the calc_move_time() profile."""
+    if distance <= 0 or t <= 0:
+        return 0.0
+    if accs == 0:
+        return min(distance, velocity * t)
+
+    if distance <= velocity ** 2 / accs:
+        # Triangle profile: the top speed is reached in the middle of the move.
+        velocity = math.sqrt(distance * accs)
+    t_acc = velocity / accs
+    d_acc = velocity ** 2 / (2 * accs)
+    t_total = 2 * t_acc + (distance - 2 * d_acc) / velocity
+    if t >= t_total:
+        return distance
+    if t < t_acc:
+        return accs * t ** 2 / 2
+    if t < t_total - t_acc:
+        return d_acc + velocity * (t - t_acc)
+    return distance - accs * (t_total - t) ** 2 / 2
+
+
+class _Move:
+    def __init__(self, start: int, target: int, velocity: int, accs: int, started: float, time_scale: float):
+        self.start = start
+        self.target = target
+        self.velocity = velocity
+        self.accs = accs
+        self.started = started
+        self.time_scale = time_scale
+
+    def position(self, now: float) -> int:
+        if self.time_scale <= 0:
+            return self.target
+        distance = abs(self.target - self.start)
+        covered = travelled(distance, self.velocity, self.accs, (now - self.started) / self.time_scale)
+        return self.start + int(round(math.copysign(covered, self.target - self.start)))
+
+
+def default_pressure(positions: Dict[str, int]) -> float:
+    """Pressure seen by the sensor: rises linearly with the mot1 position."""
+    return 100.0 + 0.05 * positions.get("mot1", 0)
+
+
+class SimulatedHead:
+    """Protocol and motion model of the head, without any transport.
+
+    feed() takes raw bytes from the host and returns the (delay, bytes) of the
+    responses. Moves follow the same trapezoid profile as calc_move_time()
+    (stretched by `time_scale`, instant with 0). Responses are delayed by
+    `latency` plus a uniform random `jitter`; with `drop_rate` a response is
+    not sent and with `corrupt_rate` one of its bytes is flipped (failing CRC).
+    Subscribed topics are published every `event_period` by events().
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, drop_rate: float = 0.0,
+                 corrupt_rate: float = 0.0, time_scale: float = 1.0, pressure_noise: float = 0.0,
+                 pressure: Callable[[Dict[str, int]], float] = default_pressure, event_period: float = 0.01,
+                 seed: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        self.logger = logging.getLogger(__name__)
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.corrupt_rate = corrupt_rate
+        self.time_scale = time_scale
+        self.pressure_noise = pressure_noise
+        self.pressure = pressure
+        self.event_period = event_period
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.deframer = HDLCDeframer()
+
+        self.enabled = False
+        self.moves: Dict[str, _Move] = {}
+        self.outputs: Dict[str, List[int]] = {}
+        # Subscribed topic: [address, time of the next event].
+        self.subscriptions: Dict[str, list] = {}
+        self._event_id = 0
+        self.stats = {"requests": 0, "responses": 0, "dropped": 0, "corrupted": 0, "bad_frames": 0, "events": 0}
+
+    def positions(self) -> Dict[str, int]:
+        now = self.clock()
+        return {motor: move.position(now) for motor, move in self.moves.items()}
+
+    def feed(self, data: bytes) -> List[Tuple[float, bytes]]:
+        responses = []
+        for frame in self.deframer.feed(data):
+            try:
+                request = itmp_message.ITMPMessage.from_frame(frame)
+            except ValueError as e:
+                self.stats["bad_frames"] += 1
+                self.logger.log(level=logging.WARNING, msg=f"Simulated head dropped a bad frame: {e}")
+                continue
+            self.stats["requests"] += 1
+            response = self.handle(request, frame[0])
+            if response is None:
+                continue
+            if self.random.random() < self.drop_rate:
+                self.stats["dropped"] += 1
+                continue
+            responses.append((self._delay(), self._encode(frame[0], response)))
+            self.stats["responses"] += 1
+        return responses
+
+    def handle(self, request: itmp_message.ITMPMessage, address: int = 0x08) -> Optional[itmp_message.ITMPMessage]:
+        if isinstance(request, itmp_message.ITMPDescribeMessage):
+            return itmp_message.ITMPDescriptionMessage(request.id, DESCRIPTION)
+        if isinstance(request, itmp_message.ITMPSubscribeMessage):
+            if not _TOPIC.match(request.topic):
+                self.logger.log(level=logging.WARNING, msg=f"Simulated head: unknown topic {request.topic}.")
+                return None
+            self.subscriptions[request.topic] = [address, self.clock()]
+            return itmp_message.ITMPResultMessage(request.id, [])
+        if isinstance(request, itmp_message.ITMPUnsubscribeMessage):
+            self.subscriptions.pop(request.topic, None)
+            return itmp_message.ITMPResultMessage(request.id, [])
+        if not isinstance(request, itmp_message.ITMPCallMessage):
+            self.logger.log(level=logging.WARNING, msg=f"Simulated head ignored {request.to_list()}.")
+            return None
+        result = self.call(request.procedure, list(request.arguments))
+        if result is None:
+            self.logger.log(level=logging.WARNING, msg=f"Simulated head: unknown procedure {request.procedure}.")
+            return None
+        return itmp_message.ITMPResultMessage(request.id, result)
+
+    def call(self, procedure: str, args: list) -> Optional[list]:
+        motor = _MOTOR.match(procedure)
+        if motor is not None:
+            name, action = motor.groups()
+            if action == "pos":
+                return [self.positions().get(name, 0)]
+            start = self.positions().get(name, 0)
+            target, velocity, accs = (list(args) + [0, 0, 0])[:3]
+            if velocity <= 0 or accs < 0:
+                return None
+            self.moves[name] = _Move(start, int(target), velocity, accs, self.clock(), self.time_scale)
+            return []
+        if procedure == "enable":
+            self.enabled = True
+            return []
+        if procedure == "adc/p":
+            noise = self.random.gauss(0, self.pressure_noise) if self.pressure_noise else 0.0
+            return [int(round(self.pressure(self.positions()) + noise))]
+        if procedure == "gpio" or procedure.startswith("pwm"):
+            self.outputs[procedure] = args
+            return []
+        return None
+
+    def next_event(self) -> Optional[float]:
+        """Time (`clock`) of the next event due, None without subscriptions."""
+        return min((due for _, due in self.subscriptions.values()), default=None)
+
+    def events(self) -> List[bytes]:
+        """EVENT frames of the subscribed topics that are due."""
+        now = self.clock()
+        frames = []
+        for topic, subscription in self.subscriptions.items():
+            address, due = subscription
+            if due > now:
+                continue
+            self._event_id = self._event_id % 0xFFFF + 1
+            event = itmp_message.ITMPEventMessage(self._event_id, topic, self.call(topic, []))
+            frames.append(self._encode(address, event))
+            self.stats["events"] += 1
+            # Missed periods are skipped, not published in a burst.
+            subscription[1] = max(due + self.event_period, now)
+        return frames
+
+    def _delay(self) -> float:
+        return self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _encode(self, address: int, message: itmp_message.ITMPMessage) -> bytes:
+        content = bytes([address]) + cbor2.dumps(message.to_list())
+        content += bytes([crc8.crc8_get(content)])
+        if self.random.random() < self.corrupt_rate:
+            self.stats["corrupted"] += 1
+            position = self.random.randrange(len(content))
+            content = content[:position] + bytes([content[position] ^ (1 << self.random.randrange(8))]) + content[position + 1:]
+        return hdlc_byte_stuff.bytes2hdlc(content)
+
+
+class HeadSimulator:
+    """Serves a SimulatedHead on a pty (`path` is the device to open) or a TCP
+    socket (`path` is the socket://host:port URL) from a background thread."""
+
+    def __init__(self, head: Optional[SimulatedHead] = None, socket_address: Optional[Tuple[str, int]] = None):
+        self.head = head or SimulatedHead()
+        self._stop = threading.Event()
+        self._pending = []
+        self._order = 0
+        self._clients = []
+        self._listener = None
+        self._master = self._slave = None
+
+        if socket_address is None:
+            self._master, self._slave = os.openpty()
+            self.path = os.ttyname(self._slave)
+            self._clients.append(self._master)
+        else:
+            self._listener = socket.create_server(socket_address)
+            host, port = self._listener.getsockname()[:2]
+            self.path = f"socket://{host}:{port}"
+
+        self._thread = threading.Thread(target=self._serve, name="head simulator", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "HeadSimulator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        for client in self._clients:
+            self._close(client)
+        if self._listener is not None:
+            self._listener.close()
+        if self._slave is not None:
+            os.close(self._slave)
+
+    def _serve(self) -> None:
+        while not self._stop.is_set():
+            timeout = 0.05
+            if self._pending:
+                timeout = min(timeout, max(0.0, self._pending[0][0] - time.monotonic()))
+            next_event = self.head.next_event()
+            if next_event is not None:
+                timeout = min(timeout, max(0.0, next_event - self.head.clock()))
+            sources = self._clients + ([self._listener] if self._listener is not None else [])
+            readable = select.select(sources, [], [], timeout)[0]
+            for source in readable:
+                if source is self._listener:
+                    client, _ = self._listener.accept()
+                    client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    self._clients.append(client)
+                    continue
+                data = self._read(source)
+                if not data:
+                    self._clients.remove(source)
+                    self._close(source)
+                    continue
+                now = time.monotonic()
+                for delay, response in self.head.feed(data):
+                    self._order += 1
+                    heapq.heappush(self._pending, (now + delay, self._order, source, response))
+
+            now = time.monotonic()
+            while self._pending and self._pending[0][0] <= now:
+                _, _, client, response = heapq.heappop(self._pending)
+                if client in self._clients:
+                    self._write(client, response)
+
+            events = self.head.events()
+            if events:
+                for client in list(self._clients):
+                    self._write(client, b''.join(events))
+
+    @staticmethod
+    def _read(source) -> bytes:
+        try:
+            return source.recv(4096) if isinstance(source, socket.socket) else os.read(source, 4096)
+        except OSError:
+            return b''
+
+    @staticmethod
+    def _write(client, data: bytes) -> None:
+        try:
+            if isinstance(client, socket.socket):
+                client.sendall(data)
+            else:
+                os.write(client, data)
+        except OSError:
+            pass
+
+    def _close(self, client) -> None:
+        if isinstance(client, socket.socket):
+            client.close()
+        else:
+            os.close(client)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", metavar="HOST:PORT", help="listen on TCP instead of a pty")
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency, s")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random latency, s")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="probability of not answering")
+    parser.add_argument("--corrupt-rate", type=float, default=0.0, help="probability of flipping a bit in a response")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="move time multiplier (0: instant moves)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    head = SimulatedHead(latency=args.latency, jitter=args.jitter, drop_rate=args.drop_rate,
+                         corrupt_rate=args.corrupt_rate, time_scale=args.time_scale, seed=args.seed)
+    address = None
+    if args.socket:
+        host, _, port = args.socket.rpartition(":")
+        address = (host or "127.0.0.1", int(port))
+    with HeadSimulator(head, address) as simulator:
+        print(f"Simulated head: {simulator.path}", flush=True)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    print(f"Stats: {head.stats}")
+
+
+if __name__ == "__main__":
+    main()
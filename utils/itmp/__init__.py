@@ -1,3 +1,9 @@
 from . import utils
+from . import itmp_frame_cache
 from . import itmp_message
-from . import itmp_serial
\ No newline at end of file
+from . import itmp_serial
+from . import itmp_pipeline
+from . import itmp_async
+from . import itmp_bus
+from . import itmp_metrics
+from . import itmp_recorder
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from .itmp_message import ITMPMessage, ITMPMessageType
+from .itmp_pipeline import ITMPCallPipeline
+from .utils.hdlc_deframer import HDLCDeframer
+from .utils.serial_port import SerialPort, SerialPortError
+
+
+class AsyncITMPDevice:
+    """ITMP device driven by an asyncio event loop.
+
+    Transports with a file descriptor (PosixSerialPort) are watched with the loop's
+    add_reader(), so any number of devices share one thread. Other transports
+    (Win32SerialPort) fall back to a reader thread that hands data to the loop.
+    Responses are routed to the waiting requests by ITMP id; EVENT messages are
+    not responses: they go to `on_event`.
+    """
+
+    def __init__(self, port: SerialPort, timeout: float = 1.0):
+        self.logger = logging.getLogger(__name__)
+        self.port = port
+        self.timeout = timeout
+        self.deframer = HDLCDeframer()
+
+        self._last_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._loop = None
+        self._fd = None
+        self._reader_thread = None
+        self._closed = False
+        # Called with every EVENT message, on the event loop.
+        self.on_event: Optional[Callable[[ITMPMessage], None]] = None
+
+    def next_id(self) -> int:
+        for _ in range(ITMPCallPipeline.MAX_ID):
+            self._last_id = self._last_id % ITMPCallPipeline.MAX_ID + 1
+            if self._last_id not in self._pending:
+                return self._last_id
+        raise RuntimeError("No free ITMP message id.")
+
+    async def request(self, message: ITMPMessage, timeout: Optional[float] = None) -> ITMPMessage:
+        """Sends the request and waits for the response with the same id."""
+        self._start()
+        if message.id in self._pending:
+            raise ValueError(f"ITMP message id {message.id} is already in flight.")
+
+        future = self._loop.create_future()
+        self._pending[message.id] = future
+        try:
+            self.port.write(message.to_hdlc())
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No response to ITMP request {message.id}.")
+        finally:
+            if self._pending.get(message.id) is future:
+                del self._pending[message.id]
+
+    def close(self) -> None:
+        self._closed = True
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+        if self._reader_thread is not None:
+            self._reader_thread.join()
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self.port.close()
+
+    def _start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        if hasattr(self.port, 'fileno'):
+            try:
+                self._loop.add_reader(self.port.fileno(), self._on_readable)
+                self._fd = self.port.fileno()
+                return
+            except NotImplementedError:
+                pass
+        self._reader_thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader_thread.start()
+
+    def _on_readable(self) -> None:
+        try:
+            data = self.port.read_bytes(0)
+        except SerialPortError as e:
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+            self._on_error(e)
+            return
+        self._on_data(data)
+
+    def _read_loop(self) -> None:
+        while not self._closed:
+            try:
+                data = self.port.read_bytes(0.1)
+            except SerialPortError as e:
+                if not self._closed:
+                    self._loop.call_soon_threadsafe(self._on_error, e)
+                return
+            if data:
+                self._loop.call_soon_threadsafe(self._on_data, data)
+
+    def _on_error(self, error: Exception) -> None:
+        self.logger.log(level=logging.ERROR, msg=f"ITMP device read failed: {error}")
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def _on_data(self, data: bytes) -> None:
+        for frame in self.deframer.feed(data):
+            try:
+                message = ITMPMessage.from_frame(frame)
+            except ValueError as e:
+                self.logger.log(level=logging.ERROR, msg=f"Dropped malformed ITMP frame: {e}")
+                continue
+            if message.type is ITMPMessageType.EVENT:
+                self._deliver_event(message)
+                continue
+
+            future = self._pending.pop(message.id, None)
+            if future is None or future.done():
+                self.logger.log(level=logging.WARNING, msg=f"Unexpected ITMP message id {message.id}: {message.to_list()}")
+                continue
+            future.set_result(message)
+
+    def _deliver_event(self, message: ITMPMessage) -> None:
+        handler = self.on_event
+        if handler is None:
+            self.logger.log(level=logging.DEBUG, msg=f"Unhandled ITMP event: {message.to_list()}")
+            return
+        try:
+            handler(message)
+        except Exception as e:
+            self.logger.log(level=logging.ERROR, msg=f"ITMP event handler failed: {e}")
@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .itmp_message import ITMPMessage, ITMPMessageType
+from .utils.hdlc_deframer import HDLCDeframer
+from .utils.serial_port import SerialPort, SerialPortError
+
+
+class ITMPBusCall:
+    """Request queued on the bus for one address; completed by the bus reader."""
+
+    def __init__(self, address: int, message: ITMPMessage):
+        self.address = address
+        self.message = message
+        self.response = None
+        self.error = None
+        self.sent_at = None
+        self._done = threading.Event()
+
+    @property
+    def id(self) -> int:
+        return self.message.id
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout: Optional[float] = None) -> ITMPMessage:
+        """Waits for the response. Raises TimeoutError if the device did not answer
+        within the bus timeout (or `timeout`, if given, passed first)."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"No response to ITMP request {self.id} (address {self.address:#04x}).")
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+    def _finish(self, response: Optional[ITMPMessage] = None, error: Optional[Exception] = None) -> None:
+        self.response = response
+        self.error = error
+        self._done.set()
+
+
+class ITMPBusDevice:
+    """Handle of one addressed device on the bus (same interface as ITMPCallPipeline)."""
+
+    def __init__(self, bus: "ITMPBus", address: int):
+        self.bus = bus
+        self.address = address
+        self._last_id = 0
+        # Called with every EVENT message from this address, on the bus reader thread.
+        self.on_event: Optional[Callable[[ITMPMessage], None]] = None
+
+    @property
+    def in_flight(self) -> int:
+        return self.bus.in_flight(self.address)
+
+    def next_id(self) -> int:
+        """Allocates the next ITMP id of this address, skipping ids still in flight."""
+        with self.bus._lock:
+            for _ in range(self.bus.MAX_ID):
+                self._last_id = self._last_id % self.bus.MAX_ID + 1
+                if not self.bus._is_pending(self.address, self._last_id):
+                    return self._last_id
+        raise RuntimeError("No free ITMP message id.")
+
+    def submit(self, message: ITMPMessage) -> ITMPBusCall:
+        return self.bus.submit(self.address, message)
+
+    def request(self, message: ITMPMessage, timeout: Optional[float] = None) -> ITMPMessage:
+        return self.submit(message).result(timeout)
+
+
+class ITMPBus:
+    """Several addressed ITMP devices sharing one serial line (e.g. an RS-485 segment).
+
+    Requests are queued per address and sent in round-robin order over the
+    addresses with work, at most `per_device` outstanding per address and
+    `max_in_flight` on the whole line. While one device is busy with a request,
+    the line is used for the others, so a slow device does not starve the rest.
+    A reader thread routes responses by (address, id) and expires requests
+    that got no response within `timeout`.
+    """
+
+    MAX_ID = 0xFFFF
+
+    def __init__(self, port: SerialPort, timeout: float = 1.0, max_in_flight: int = 8, per_device: int = 1):
+        self.logger = logging.getLogger(__name__)
+        self.port = port
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.per_device = per_device
+        self.deframer = HDLCDeframer()
+
+        self._lock = threading.Lock()
+        self._devices: Dict[int, ITMPBusDevice] = {}
+        self._queues: Dict[int, Deque[ITMPBusCall]] = {}
+        self._addresses: List[int] = []
+        self._turn = 0
+        self._sent: Dict[Tuple[int, int], ITMPBusCall] = {}
+        self._sent_by_address: Dict[int, int] = {}
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="ITMP bus reader", daemon=True)
+        self._reader.start()
+
+    def device(self, address: int) -> ITMPBusDevice:
+        with self._lock:
+            if address not in self._devices:
+                self._devices[address] = ITMPBusDevice(self, address)
+                self._queues[address] = deque()
+                self._addresses.append(address)
+                self._sent_by_address[address] = 0
+            return self._devices[address]
+
+    def in_flight(self, address: Optional[int] = None) -> int:
+        """Requests queued or waiting for a response (of one address or of the whole bus)."""
+        with self._lock:
+            if address is not None:
+                return len(self._queues.get(address, ())) + self._sent_by_address.get(address, 0)
+            return sum(len(queue) for queue in self._queues.values()) + len(self._sent)
+
+    def submit(self, address: int, message: ITMPMessage) -> ITMPBusCall:
+        """Queues the request for `address` and returns without waiting for the response."""
+        if address not in self._devices:
+            self.device(address)
+        call = ITMPBusCall(address, message)
+        with self._lock:
+            if self._closed:
+                raise SerialPortError("The ITMP bus is closed.")
+            if self._is_pending(address, message.id):
+                raise ValueError(f"ITMP message id {message.id} is already in flight (address {address:#04x}).")
+            self._queues[address].append(call)
+            self._dispatch()
+        return call
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        self._reader.join()
+        self._fail_all(SerialPortError("The ITMP bus is closed."))
+        self.port.close()
+
+    def _is_pending(self, address: int, msg_id: int) -> bool:
+        if (address, msg_id) in self._sent:
+            return True
+        return any(call.id == msg_id for call in self._queues.get(address, ()))
+
+    def _dispatch(self) -> None:
+        """Sends queued requests while the line has free slots (called with the lock held)."""
+        count = len(self._addresses)
+        while len(self._sent) < self.max_in_flight:
+            for i in range(count):
+                address = self._addresses[(self._turn + i) % count]
+                queue = self._queues[address]
+                if queue and self._sent_by_address[address] < self.per_device:
+                    break
+            else:
+                return
+
+            self._turn = (self._turn + i + 1) % count
+            call = queue.popleft()
+            try:
+                self.port.write(call.message.to_hdlc(address))
+            except SerialPortError as e:
+                call._finish(error=e)
+                continue
+            call.sent_at = time.monotonic()
+            self._sent[(address, call.id)] = call
+            self._sent_by_address[address] += 1
+
+    def _complete(self, call: ITMPBusCall, response: Optional[ITMPMessage] = None,
+                  error: Optional[Exception] = None) -> None:
+        """Frees the slot of a sent request (called with the lock held)."""
+        del self._sent[(call.address, call.id)]
+        self._sent_by_address[call.address] -= 1
+        call._finish(response, error)
+
+    def _read_loop(self) -> None:
+        while not self._closed:
+            try:
+                data = self.port.read_bytes(0.02)
+            except SerialPortError as e:
+                self.logger.log(level=logging.ERROR, msg=f"ITMP bus read failed: {e}")
+                with self._lock:
+                    self._closed = True
+                self._fail_all(e)
+                return
+
+            frames = self.deframer.feed(data) if data else []
+            events = []
+            with self._lock:
+                for frame in frames:
+                    self._route(frame, events)
+                self._expire()
+                self._dispatch()
+            # Outside the lock: handlers may submit requests.
+            for device, message in events:
+                self._deliver_event(device, message)
+
+    def _route(self, frame: bytes, events: List[Tuple[ITMPBusDevice, ITMPMessage]]) -> None:
+        try:
+            message = ITMPMessage.from_frame(frame)
+        except ValueError as e:
+            self.logger.log(level=logging.ERROR, msg=f"Dropped malformed ITMP frame: {e}")
+            return
+        if message.type is ITMPMessageType.EVENT:
+            device = self._devices.get(frame[0])
+            if device is None:
+                self.logger.log(level=logging.WARNING, msg=f"ITMP event from unknown address {frame[0]:#04x}: {message.to_list()}")
+            else:
+                events.append((device, message))
+            return
+        call = self._sent.get((frame[0], message.id))
+        if call is None:
+            self.logger.log(level=logging.WARNING, msg=f"Unexpected ITMP message (address {frame[0]:#04x}, id {message.id}): {message.to_list()}")
+            return
+        self._complete(call, message)
+
+    def _deliver_event(self, device: ITMPBusDevice, message: ITMPMessage) -> None:
+        handler = device.on_event
+        if handler is None:
+            self.logger.log(level=logging.DEBUG, msg=f"Unhandled ITMP event (address {device.address:#04x}): {message.to_list()}")
+            return
+        try:
+            handler(message)
+        except Exception as e:
+            self.logger.log(level=logging.ERROR, msg=f"ITMP event handler failed: {e}")
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for call in [call for call in self._sent.values() if now - call.sent_at >= self.timeout]:
+            self._complete(call, error=TimeoutError(f"No response to ITMP request {call.id} (address {call.address:#04x})."))
+
+    def _fail_all(self, error: Exception) -> None:
+        with self._lock:
+            calls = list(self._sent.values())
+            for queue in self._queues.values():
+                calls.extend(queue)
+                queue.clear()
+            self._sent.clear()
+            for address in self._sent_by_address:
+                self._sent_by_address[address] = 0
+        for call in calls:
+            call._finish(error=error)
@@ -0,0 +1,134 @@
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Sequence
+
+import cbor2
+
+from .utils import crc8, hdlc_byte_stuff
+
+
+ITMP_CALL = 8
+
+
+_HEAD8 = struct.Struct('>BB').pack
+_HEAD16 = struct.Struct('>BH').pack
+_HEAD32 = struct.Struct('>BI').pack
+_HEAD64 = struct.Struct('>BQ').pack
+
+
+def _cbor_head(major: int, value: int) -> bytes:
+    if value < 24:
+        return bytes([major | value])
+    if value < 0x100:
+        return _HEAD8(major | 24, value)
+    if value < 0x10000:
+        return _HEAD16(major | 25, value)
+    if value < 0x100000000:
+        return _HEAD32(major | 26, value)
+    return _HEAD64(major | 27, value)
+
+
+_CBOR_SMALL_INTS = [bytes([value]) for value in range(24)]
+
+
+def cbor_int(value: int) -> bytes:
+    """Shortest CBOR encoding of an integer (same bytes as cbor2.dumps)."""
+    if 0 <= value < 24:
+        return _CBOR_SMALL_INTS[value]
+    if not -0x10000000000000000 <= value < 0x10000000000000000:
+        return cbor2.dumps(value)
+    if value < 0:
+        return _cbor_head(0x20, -1 - value)
+    return _cbor_head(0x00, value)
+
+
+_CRC_BYTES = [bytes([value]) for value in range(256)]
+
+
+def _crc8_update(crc: int, data: bytes) -> int:
+    for byte in data:
+        crc = crc8.crc8_table[crc ^ byte]
+    return crc
+
+
+class CallFrameTemplate:
+    """Pre-encoded parts of the HDLC frame of one CALL (address, procedure, argument types).
+
+    The CBOR array header, type and procedure name are encoded, stuffed and run
+    through CRC8 once; per call only the id and the arguments are encoded.
+    """
+
+    def __init__(self, address: int, procedure: str, arg_types: tuple):
+        self.arg_types = arg_types
+        self.int_args = all(t is int for t in arg_types)
+
+        prefix = bytes([address & 0xFF, 0x84]) + cbor_int(ITMP_CALL)
+        self.prefix = b'\x7e' + hdlc_byte_stuff.byte_stuff(prefix)
+        self.prefix_crc = _crc8_update(0xFF, prefix)
+
+        body = cbor2.dumps(procedure) + _cbor_head(0x80, len(arg_types))
+        self.body = hdlc_byte_stuff.byte_stuff(body)
+        # CRC8 state after the constant body for every state before it.
+        self.body_crc = bytes(_crc8_update(state, body) for state in range(256))
+
+    def encode(self, msg_id: int, arguments: Sequence[Any]) -> bytes:
+        table = crc8.crc8_table
+        id_bytes = cbor_int(msg_id)
+        if self.int_args:
+            args_bytes = b''.join([cbor_int(arg) for arg in arguments])
+        else:
+            args_bytes = b''.join([cbor_int(arg) if t is int else cbor2.dumps(arg)
+                                   for arg, t in zip(arguments, self.arg_types)])
+
+        crc = self.prefix_crc
+        for byte in id_bytes:
+            crc = table[crc ^ byte]
+        crc = self.body_crc[crc]
+        for byte in args_bytes:
+            crc = table[crc ^ byte]
+
+        tail = args_bytes + _CRC_BYTES[crc]
+        if 0x7E in id_bytes or 0x7D in id_bytes:
+            id_bytes = hdlc_byte_stuff.byte_stuff(id_bytes)
+        if 0x7E in tail or 0x7D in tail:
+            tail = hdlc_byte_stuff.byte_stuff(tail)
+        return b''.join((self.prefix, id_bytes, self.body, tail, b'\x7e'))
+
+
+class CallFrameCache:
+    """LRU cache of CallFrameTemplate keyed by (address, procedure, argument types).
+
+    Shared by every device and used from several threads (callers, samplers,
+    event callbacks): the LRU bookkeeping is done under a lock.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, address: int, msg_id: int, procedure: str, arguments: Sequence[Any]) -> bytes:
+        """HDLC frame of [CALL, msg_id, procedure, arguments]."""
+        key = (address, procedure, tuple(map(type, arguments)))
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                self.misses += 1
+                template = CallFrameTemplate(address, procedure, key[2])
+                self._templates[key] = template
+                if len(self._templates) > self.maxsize:
+                    self._templates.popitem(last=False)
+            else:
+                self.hits += 1
+                self._templates.move_to_end(key)
+        return template.encode(msg_id, arguments)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+    def __len__(self) -> int:
+        return len(self._templates)
@@ -2,10 +2,14 @@ import cbor2
 import logging
 
 from .utils import hdlc_byte_stuff, crc8
+from .itmp_frame_cache import CallFrameCache
 from abc import ABC, abstractmethod
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Type
+
+
+logger = logging.getLogger(__name__)
 
 
 class ITMPMessageType(Enum):
@@ -41,12 +45,27 @@ class ITMPMessageType(Enum):
 	MAX_TYPE = 19
 
 
+# Decoder class of every message type, filled in as the message classes are defined.
+MESSAGE_CLASSES: Dict[ITMPMessageType, Type['ITMPMessage']] = {}
+
+
 class ITMPMessage(ABC):
+	# Messages are small records (no per-instance __dict__): telemetry captures
+	# buffer hundreds of thousands of them.
+	__slots__ = ("_type", "_id")
+
 	def __init__(self, msg_type: ITMPMessageType, id: int):
-		self.logger = logging.getLogger()
 		self._type = msg_type
 		self._id = id
 
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		if getattr(cls._supports_type, "__isabstractmethod__", False):
+			return
+		for msg_type in ITMPMessageType:
+			if cls._supports_type(msg_type):
+				MESSAGE_CLASSES[msg_type] = cls
+
 	@property
 	def type(self) -> ITMPMessageType:
 		return self._type
@@ -81,36 +100,33 @@ class ITMPMessage(ABC):
 		payload_dict = list(self.to_dict().values())
 		cbor_payload = cbor2.dumps(payload_dict)
 		
-		escaped_payload = self._escape(cbor_payload)
-		frame = bytes([address & 0xFF]) + escaped_payload
+		frame = bytes([address & 0xFF]) + cbor_payload
 		frame += bytes([crc8.crc8_get(frame)])
-		frame = hdlc_byte_stuff.bytes2hdlc(frame)
-
-		print(f"FRAME: {bytes(frame)}")
-
-		return frame
+		return hdlc_byte_stuff.bytes2hdlc(frame)
 
 	@staticmethod
 	def from_hdlc(frame: bytes) -> 'ITMPMessage':
-		"""Build ITMP message from HDLC packet"""
-		if len(frame) < 2 or frame[-1] != 0x7E:
+		"""Build ITMP message from HDLC packet. Accepts any buffer (e.g. a memoryview
+		of the receive buffer); frames without escapes are decoded without copies."""
+		view = memoryview(frame)
+		if len(view) < 2 or view[-1] != hdlc_byte_stuff.FLAG:
 			raise ValueError(f"[{datetime.now()}] ERROR: Failed to unpack HDLC frame: wrong packet format.\n")
-		content = frame[:-1]
-		if (content[0] == 0x7E):
-			content = content[1:]
+		content = view[1:-1] if view[0] == hdlc_byte_stuff.FLAG else view[:-1]
 
 		if len(content) == 0:
 			raise ValueError(f"[{datetime.now()}] ERROR: HDLC frame is too short ({len(content)} bytes).")
-		
-		print(f"frame: {frame}")
-		print(f"content: {content}")
-		cbor_payload = ITMPMessage._unescape(content)
-		print(f"cbor payload: {cbor_payload}")
-		if (crc8.crc8_get(cbor_payload[:-1]) != cbor_payload[-1]):
-			raise ValueError(f"[{datetime.now()}] ERROR: Failed to unpack HDLC frame: failed CRC ({crc8.crc8_get(cbor_payload[:-1])} != {cbor_payload[-1]})\nFrame: {frame}")
-		cbor_payload = cbor_payload[1:-1]
-		payload_list = cbor2.loads(cbor_payload)
-		
+		return ITMPMessage.from_frame(hdlc_byte_stuff.unstuff_view(content))
+
+	@staticmethod
+	def from_frame(frame: bytes) -> 'ITMPMessage':
+		"""Build ITMP message from unstuffed HDLC frame content (address, CBOR payload, CRC)."""
+		view = memoryview(frame)
+		if len(view) < 3:
+			raise ValueError(f"[{datetime.now()}] ERROR: HDLC frame is too short ({len(view)} bytes).")
+		# CRC8 over the data followed by its own CRC is zero.
+		if crc8.crc8_get(view) != 0:
+			raise ValueError(f"[{datetime.now()}] ERROR: Failed to unpack HDLC frame: failed CRC ({crc8.crc8_get(view[:-1])} != {view[-1]})\nFrame: {bytes(view)}")
+		payload_list = cbor2.loads(view[1:-1])
 
 		if not isinstance(payload_list, list) or len(payload_list) < 1:
 			raise ValueError("Failed to unpack HDLC frame: CBOR payload is not a list.")
@@ -121,11 +137,10 @@ class ITMPMessage(ABC):
 		except ValueError:
 			raise ValueError(f"Unknown ITMP message type: {msg_type_value}")
 
-		for cls in ITMPMessage.__subclasses__():
-			if cls._supports_type(msg_type):
-				return cls.from_list(payload_list)
-
-		raise ValueError(f"Faille to find {msg_type} class.")
+		cls = MESSAGE_CLASSES.get(msg_type)
+		if cls is None:
+			raise ValueError(f"Faille to find {msg_type} class.")
+		return cls.from_list(payload_list)
 
 	@staticmethod
 	def _escape(data: bytes) -> bytes:
@@ -145,11 +160,19 @@ class ITMPMessage(ABC):
 
 
 class ITMPCallMessage(ITMPMessage):
+	__slots__ = ("procedure", "arguments")
+
+	# Frames of repeated procedures are built from pre-encoded templates.
+	frame_cache = CallFrameCache()
+
 	def __init__(self, id: int, procedure: str, arguments: List[int]):
 		super().__init__(ITMPMessageType.CALL, id)
 		self.procedure = procedure
 		self.arguments = arguments
 
+	def to_hdlc(self, address: int = 0x08) -> bytes:
+		return ITMPCallMessage.frame_cache.encode(address, self.id, self.procedure, self.arguments)
+
 	def to_list(self) -> List[Any]:
 		return [self.type.value, self.id, self.procedure, self.arguments]
 
@@ -180,6 +203,8 @@ class ITMPCallMessage(ITMPMessage):
 
 
 class ITMPResultMessage(ITMPMessage):
+	__slots__ = ("result",)
+
 	def __init__(self, id: int, result: List[int]):
 		super().__init__(ITMPMessageType.RESULT, id)
 		self.result = result
@@ -212,6 +237,8 @@ class ITMPResultMessage(ITMPMessage):
 
 
 class ITMPDescribeMessage(ITMPMessage):
+	__slots__ = ("topic",)
+
 	def __init__(self, id: int, topic: str):
 		super().__init__(ITMPMessageType.DESCRIBE, id)
 		self.topic = topic
@@ -244,6 +271,8 @@ class ITMPDescribeMessage(ITMPMessage):
 
 
 class ITMPDescriptionMessage(ITMPMessage):
+	__slots__ = ("description",)
+
 	def __init__(self, id: int, description: List[str]):
 		super().__init__(ITMPMessageType.DESCRIPTION, id)
 		self.description = description
@@ -274,3 +303,112 @@ class ITMPDescriptionMessage(ITMPMessage):
 	def _supports_type(msg_type: ITMPMessageType) -> bool:
 		return msg_type == ITMPMessageType.DESCRIPTION
 
+
+
+class ITMPSubscribeMessage(ITMPMessage):
+	__slots__ = ("topic",)
+
+	def __init__(self, id: int, topic: str):
+		super().__init__(ITMPMessageType.SUBSCRIBE, id)
+		self.topic = topic
+
+	def to_list(self) -> List[Any]:
+		return [self.type.value, self.id, self.topic]
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			'type': self.type.value,
+			'id': self.id,
+			'topic': self.topic
+		}
+
+	@classmethod
+	def from_list(cls, data: List[Any]) -> 'ITMPSubscribeMessage':
+		# Subscription options (4th element) are not used.
+		if len(data) not in (3, 4) or data[0] != ITMPMessageType.SUBSCRIBE.value:
+			raise ValueError("Wrong list format for ITMPSubscribeMessage.")
+		return cls(data[1], data[2])
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any]) -> 'ITMPSubscribeMessage':
+		if 'topic' not in data:
+			raise ValueError("Missing field 'topic'.")
+		return cls(data['id'], data['topic'])
+
+	@staticmethod
+	def _supports_type(msg_type: ITMPMessageType) -> bool:
+		return msg_type == ITMPMessageType.SUBSCRIBE
+
+
+class ITMPUnsubscribeMessage(ITMPMessage):
+	__slots__ = ("topic",)
+
+	def __init__(self, id: int, topic: str):
+		super().__init__(ITMPMessageType.UNSUBSCRIBE, id)
+		self.topic = topic
+
+	def to_list(self) -> List[Any]:
+		return [self.type.value, self.id, self.topic]
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			'type': self.type.value,
+			'id': self.id,
+			'topic': self.topic
+		}
+
+	@classmethod
+	def from_list(cls, data: List[Any]) -> 'ITMPUnsubscribeMessage':
+		if len(data) != 3 or data[0] != ITMPMessageType.UNSUBSCRIBE.value:
+			raise ValueError("Wrong list format for ITMPUnsubscribeMessage.")
+		return cls(data[1], data[2])
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any]) -> 'ITMPUnsubscribeMessage':
+		if 'topic' not in data:
+			raise ValueError("Missing field 'topic'.")
+		return cls(data['id'], data['topic'])
+
+	@staticmethod
+	def _supports_type(msg_type: ITMPMessageType) -> bool:
+		return msg_type == ITMPMessageType.UNSUBSCRIBE
+
+
+class ITMPEventMessage(ITMPMessage):
+	"""Data published by the device on a subscribed topic. Its id numbers the
+	publications and does not answer any request."""
+
+	__slots__ = ("topic", "arguments")
+
+	def __init__(self, id: int, topic: str, arguments: List[Any]):
+		super().__init__(ITMPMessageType.EVENT, id)
+		self.topic = topic
+		self.arguments = arguments
+
+	def to_list(self) -> List[Any]:
+		return [self.type.value, self.id, self.topic, self.arguments]
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			'type': self.type.value,
+			'id': self.id,
+			'topic': self.topic,
+			'arguments': self.arguments
+		}
+
+	@classmethod
+	def from_list(cls, data: List[Any]) -> 'ITMPEventMessage':
+		# Event options (5th element) are not used.
+		if len(data) not in (4, 5) or data[0] != ITMPMessageType.EVENT.value:
+			raise ValueError("Wrong list format for ITMPEventMessage.")
+		return cls(data[1], data[2], data[3])
+
+	@classmethod
+	def from_dict(cls, data: Dict[str, Any]) -> 'ITMPEventMessage':
+		if 'topic' not in data or 'arguments' not in data:
+			raise ValueError("Missing field 'topic' or 'arguments'.")
+		return cls(data['id'], data['topic'], data['arguments'])
+
+	@staticmethod
+	def _supports_type(msg_type: ITMPMessageType) -> bool:
+		return msg_type == ITMPMessageType.EVENT
@@ -0,0 +1,160 @@
+import bisect
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from .itmp_message import ITMPMessage
+
+
+# Bucket upper bounds in seconds: 1-2.5-5 steps from 1 us to 10 s.
+BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1, 2.5, 5)) + (10.0,)
+
+STAGES = ("encode", "write", "first_byte", "read", "decode")
+
+
+def procedure_name(message: ITMPMessage) -> str:
+    """Metrics key of a request: the procedure of a CALL, the message type otherwise."""
+    procedure = getattr(message, "procedure", None)
+    return procedure if procedure is not None else message.type.name.lower()
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations (seconds)."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate of the q-quantile, interpolated inside its bucket."""
+        return quantile(self.counts, q)
+
+    def copy(self) -> "Histogram":
+        histogram = Histogram()
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+
+def quantile(counts: List[int], q: float) -> Optional[float]:
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = q * total
+    cumulative = 0
+    for i, count in enumerate(counts):
+        if count and cumulative + count >= rank:
+            if i == len(BUCKETS):
+                return BUCKETS[-1]
+            lower = BUCKETS[i - 1] if i > 0 else 0.0
+            return lower + (BUCKETS[i] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return BUCKETS[-1]
+
+
+class ITMPMetrics:
+    """Per-procedure latency histograms of the ITMP stack.
+
+    Stages: encode (message to HDLC frame), write (port write), first_byte and
+    read (time from the end of the write to the first and to the last byte of
+    the response frame), decode (frame to message). first_byte and read are only
+    recorded for responses that arrived while a reader was waiting for them: a
+    response that was already buffered when it was read (the caller was busy or
+    sleeping) has no arrival time. Timeouts are counted per procedure. Recording is a bisect and a few additions under a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}
+        self._timeouts: Dict[str, int] = {}
+
+    def observe(self, procedure: str, stage: str, seconds: float) -> None:
+        with self._lock:
+            stages = self._histograms.get(procedure)
+            if stages is None:
+                stages = self._histograms[procedure] = {}
+            histogram = stages.get(stage)
+            if histogram is None:
+                histogram = stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def timeout(self, procedure: str) -> None:
+        with self._lock:
+            self._timeouts[procedure] = self._timeouts.get(procedure, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms = {}
+            self._timeouts = {}
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Copy of the current state: {procedure: {"timeouts": n, "stages": {stage: Histogram}}}."""
+        with self._lock:
+            histograms = {procedure: {stage: histogram.copy() for stage, histogram in stages.items()}
+                          for procedure, stages in self._histograms.items()}
+            timeouts = dict(self._timeouts)
+        return {procedure: {"timeouts": timeouts.get(procedure, 0), "stages": histograms.get(procedure, {})}
+                for procedure in sorted(set(histograms) | set(timeouts))}
+
+    def to_json(self) -> dict:
+        result = {"buckets": list(BUCKETS), "procedures": {}}
+        for procedure, entry in self.snapshot().items():
+            stages = {}
+            for stage, histogram in entry["stages"].items():
+                stages[stage] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.sum / histogram.count if histogram.count else None,
+                    "p50": histogram.quantile(0.5),
+                    "p99": histogram.quantile(0.99),
+                    "counts": histogram.counts,
+                }
+            result["procedures"][procedure] = {"timeouts": entry["timeouts"], "stages": stages}
+        return result
+
+    def to_prometheus(self, prefix: str = "itmp") -> str:
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent in each stage of an ITMP request.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for procedure, entry in snapshot.items():
+            for stage, histogram in entry["stages"].items():
+                labels = f'procedure="{_escape(procedure)}",stage="{stage}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {histogram.sum!r}")
+                lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {histogram.count}")
+        lines.append(f"# HELP {prefix}_timeouts_total ITMP requests without a response in time.")
+        lines.append(f"# TYPE {prefix}_timeouts_total counter")
+        for procedure, entry in snapshot.items():
+            lines.append(f'{prefix}_timeouts_total{{procedure="{_escape(procedure)}"}} {entry["timeouts"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """Writes the metrics to `path`: JSON for *.json, Prometheus text format otherwise."""
+        if path.endswith(".json"):
+            text = json.dumps(self.to_json(), indent=1)
+        else:
+            text = self.to_prometheus()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
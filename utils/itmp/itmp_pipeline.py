@@ -0,0 +1,210 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .itmp_message import ITMPMessage, ITMPMessageType
+from .itmp_serial import ITMPSerialDevice
+
+
+class ITMPPendingCall:
+    """Request sent to the device and waiting for its response (matched by ITMP id)."""
+
+    def __init__(self, pipeline: "ITMPCallPipeline", message: ITMPMessage):
+        self._pipeline = pipeline
+        self.message = message
+        self.response = None
+        self.sent_at = time.monotonic()
+
+    @property
+    def id(self) -> int:
+        return self.message.id
+
+    def done(self) -> bool:
+        return self.response is not None
+
+    def result(self, timeout: Optional[float] = None) -> ITMPMessage:
+        """Waits for the response message. Raises TimeoutError if it did not arrive in time."""
+        return self._pipeline.wait(self, timeout)
+
+
+class ITMPCallPipeline:
+    """Keeps several requests in flight on one ITMP device.
+
+    Every request gets its own id from a wrapping allocator. Responses are read by
+    whichever caller is waiting and routed to their requests through the table of
+    pending calls, so they may arrive in any order. EVENT messages are not
+    responses: they go to `on_event`.
+    """
+
+    MAX_ID = 0xFFFF
+    # Read timeout of the reader thread (how soon it sees stop_reader()).
+    READER_CHECK = 0.05
+
+    def __init__(self, dev: ITMPSerialDevice, max_in_flight: int = 8, timeout: float = 1.0):
+        self.logger = logging.getLogger(__name__)
+        self.dev = dev
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+
+        self._last_id = 0
+        self._pending: Dict[int, ITMPPendingCall] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Reentrant: event handlers run on the reader thread, which holds it, and may wait for calls.
+        self._read_lock = threading.RLock()
+
+        # Called with every EVENT message, from the thread that read it.
+        self.on_event: Optional[Callable[[ITMPMessage], None]] = None
+        self._routed = threading.Condition()
+        self._reader = None
+        self._stop_reader = threading.Event()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def next_id(self) -> int:
+        """Allocates the next ITMP id in 1..MAX_ID, skipping ids still in flight."""
+        with self._lock:
+            for _ in range(self.MAX_ID):
+                self._last_id = self._last_id % self.MAX_ID + 1
+                if self._last_id not in self._pending:
+                    return self._last_id
+        raise RuntimeError("No free ITMP message id.")
+
+    def submit(self, message: ITMPMessage) -> ITMPPendingCall:
+        """Sends the request without waiting for its response. Blocks (reading
+        responses) while `max_in_flight` requests are already pending."""
+        while len(self._pending) >= self.max_in_flight:
+            # Under the lock: the reader thread and other waiters pop from the table.
+            with self._lock:
+                oldest = next(iter(self._pending.values()), None)
+            if oldest is None:
+                break
+            self.wait(oldest)
+
+        call = ITMPPendingCall(self, message)
+        with self._lock:
+            if message.id in self._pending:
+                raise ValueError(f"ITMP message id {message.id} is already in flight.")
+            self._pending[message.id] = call
+        with self._write_lock:
+            call.sent_at = time.monotonic()
+            self.dev.write(message)
+        return call
+
+    def start_reader(self) -> None:
+        """Starts a thread that reads every incoming frame, so that events are
+        delivered while no call is waiting. Waiting callers then sleep until the
+        reader routes their response."""
+        if self._reader is not None:
+            return
+        # A new event per thread: a reader stopped by its own event handler may still be finishing.
+        self._stop_reader = threading.Event()
+        self._reader = threading.Thread(target=self._read_loop, args=(self._stop_reader,), name="ITMP reader", daemon=True)
+        self._reader.start()
+
+    def stop_reader(self) -> None:
+        if self._reader is None:
+            return
+        self._stop_reader.set()
+        # Called from an event handler: the reader exits once the handler returns.
+        if threading.current_thread() is not self._reader:
+            self._reader.join()
+        self._reader = None
+
+    @property
+    def reader_running(self) -> bool:
+        return self._reader is not None and self._reader.is_alive()
+
+    def _routed_by_reader(self) -> bool:
+        """True if responses are read by the reader thread for the current thread."""
+        return self.reader_running and threading.current_thread() is not self._reader
+
+    def wait(self, call: ITMPPendingCall, timeout: Optional[float] = None) -> ITMPMessage:
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while not call.done():
+            remaining = deadline - time.monotonic()
+            if remaining > 0 and self._routed_by_reader():
+                with self._routed:
+                    if not call.done():
+                        # Bounded, to read again ourselves if the reader stops.
+                        self._routed.wait(min(remaining, self.READER_CHECK))
+                continue
+            if remaining <= 0 or not self._read_lock.acquire(timeout=remaining):
+                self._forget(call)
+                if hasattr(self.dev, 'forget'):
+                    self.dev.forget(call.message)
+                raise TimeoutError(f"No response to ITMP request {call.id}.")
+            try:
+                if not call.done():
+                    self._read_one(deadline - time.monotonic())
+            finally:
+                self._read_lock.release()
+        return call.response
+
+    def poll(self, timeout: float) -> None:
+        """Reads and routes responses for up to `timeout` seconds (or until nothing is
+        pending), for callers that check done() instead of waiting on one call."""
+        deadline = time.monotonic() + timeout
+        while self._pending:
+            remaining = deadline - time.monotonic()
+            if remaining > 0 and self._routed_by_reader():
+                with self._routed:
+                    self._routed.wait(remaining)
+                return
+            if remaining <= 0 or not self._read_lock.acquire(timeout=remaining):
+                return
+            try:
+                self._read_one(deadline - time.monotonic())
+            finally:
+                self._read_lock.release()
+
+    def _read_one(self, timeout: float) -> None:
+        if timeout <= 0:
+            return
+        try:
+            message = self.dev.read(timeout)
+        except ValueError as e:
+            self.logger.log(level=logging.ERROR, msg=f"Dropped malformed ITMP frame: {e}")
+            return
+        if message is None:
+            return
+        if message.type is ITMPMessageType.EVENT:
+            self._deliver_event(message)
+            return
+
+        with self._lock:
+            call = self._pending.pop(message.id, None)
+        if call is None:
+            self.logger.log(level=logging.WARNING, msg=f"Unexpected ITMP message id {message.id}: {message.to_list()}")
+            return
+        call.response = message
+        with self._routed:
+            self._routed.notify_all()
+
+    def _deliver_event(self, message: ITMPMessage) -> None:
+        handler = self.on_event
+        if handler is None:
+            self.logger.log(level=logging.DEBUG, msg=f"Unhandled ITMP event: {message.to_list()}")
+            return
+        try:
+            handler(message)
+        except Exception as e:
+            self.logger.log(level=logging.ERROR, msg=f"ITMP event handler failed: {e}")
+
+    def _read_loop(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            with self._read_lock:
+                try:
+                    self._read_one(self.READER_CHECK)
+                except Exception as e:
+                    if not stop.is_set():
+                        self.logger.log(level=logging.ERROR, msg=f"ITMP reader stopped: {e}")
+                    return
+
+    def _forget(self, call: ITMPPendingCall) -> None:
+        with self._lock:
+            if self._pending.get(call.id) is call:
+                del self._pending[call.id]
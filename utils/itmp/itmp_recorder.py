@@ -0,0 +1,199 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .itmp_message import ITMPMessage, ITMPMessageType
+from .itmp_metrics import procedure_name
+
+
+TX = 0
+RX = 1
+
+# Index entry of a frame that could not be decoded.
+UNKNOWN_TYPE = 0xFF
+NO_PROCEDURE = 0xFFFF
+
+_MAGIC = b'ITMPLOG1'
+_ENTRY = struct.Struct('<dQIIHBB4x')
+
+# One fixed-size entry per frame in the side index (<log>.idx).
+INDEX_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('offset', '<u8'),
+    ('length', '<u4'),
+    ('id', '<u4'),
+    ('procedure', '<u2'),
+    ('direction', 'u1'),
+    ('type', 'u1'),
+    ('pad', 'V4'),
+])
+assert INDEX_DTYPE.itemsize == _ENTRY.size
+
+
+def _index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def _procedures_path(path: str) -> str:
+    return path + ".procedures"
+
+
+class ITMPRecorder:
+    """Appends the frames of a session to a binary log.
+
+    The log (`path`) holds the raw unstuffed frames back to back. The side index
+    (`path.idx`) has a fixed-size entry per frame: wall-clock time, offset,
+    length, ITMP id, procedure code, direction and message type. Procedure
+    names are listed one per line in `path.procedures` (code = line number).
+    Responses get the procedure of the request with the same id, events their topic.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._procedures = {}
+        self._requests = {}
+        if os.path.exists(_procedures_path(path)):
+            with open(_procedures_path(path), 'r', encoding='utf-8') as file:
+                for line in file:
+                    self._procedures[line.rstrip("\n")] = len(self._procedures)
+
+        self._log = open(path, 'ab')
+        if self._log.tell() == 0:
+            self._log.write(_MAGIC)
+            # A reader may open the log while this recording is running.
+            self._log.flush()
+        self._offset = self._log.tell()
+        self._index = open(_index_path(path), 'ab')
+        self._names = open(_procedures_path(path), 'a', encoding='utf-8')
+
+    def record(self, direction: int, frame: bytes, message: Optional[ITMPMessage] = None) -> None:
+        """Appends one unstuffed frame (address, CBOR, CRC); `message` is its decoded
+        form or None if it could not be decoded."""
+        with self._lock:
+            now = time.time()
+            if message is None:
+                msg_id, msg_type, procedure = 0, UNKNOWN_TYPE, NO_PROCEDURE
+            else:
+                msg_id, msg_type = message.id, message.type.value
+                if message.type is ITMPMessageType.EVENT:
+                    # Events answer no request: they are indexed by topic.
+                    procedure = self._code(message.topic)
+                elif direction == TX:
+                    procedure = self._code(procedure_name(message))
+                    self._requests[msg_id] = procedure
+                else:
+                    procedure = self._requests.pop(msg_id, NO_PROCEDURE)
+
+            self._log.write(frame)
+            self._index.write(_ENTRY.pack(now, self._offset, len(frame), msg_id, procedure, direction, msg_type))
+            self._offset += len(frame)
+
+    def flush(self) -> None:
+        with self._lock:
+            # The log goes first, so that the index never points past its end.
+            self._log.flush()
+            self._names.flush()
+            self._index.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._log.close()
+        self._index.close()
+        self._names.close()
+
+    def _code(self, procedure: str) -> int:
+        code = self._procedures.get(procedure)
+        if code is None:
+            code = self._procedures[procedure] = len(self._procedures)
+            self._names.write(procedure + "\n")
+        return code
+
+
+class ITMPRecording:
+    """Read-only view of a recorded session: the log and the index are memory-mapped,
+    searches by time and procedure work on the index only."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.getsize(path) == 0:
+            # Created by a recorder that has not written anything yet.
+            self._log = bytes()
+        else:
+            with open(path, 'rb') as file:
+                self._log = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._log[:len(_MAGIC)] != _MAGIC:
+                self._log.close()
+                raise ValueError(f"Not an ITMP traffic log: {path}")
+
+        index_path = _index_path(path)
+        size = os.path.getsize(index_path) // INDEX_DTYPE.itemsize if os.path.exists(index_path) else 0
+        index = np.memmap(index_path, dtype=INDEX_DTYPE, mode='r', shape=(size,)) if size else np.empty(0, INDEX_DTYPE)
+        # Entries of frames the log does not hold yet (recording still running) are left out.
+        self.index = index[:np.searchsorted(index['offset'] + index['length'], len(self._log), side='right')]
+
+        self.procedures = []
+        if os.path.exists(_procedures_path(path)):
+            with open(_procedures_path(path), 'r', encoding='utf-8') as file:
+                self.procedures = [line.rstrip("\n") for line in file]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def close(self) -> None:
+        self.index = None
+        if isinstance(self._log, mmap.mmap):
+            self._log.close()
+
+    def frame(self, i: int) -> bytes:
+        entry = self.index[i]
+        return self._log[int(entry['offset']):int(entry['offset']) + int(entry['length'])]
+
+    def procedure(self, i: int) -> Optional[str]:
+        code = int(self.index[i]['procedure'])
+        # Names of a running recording may not be flushed yet.
+        return self.procedures[code] if code < len(self.procedures) else None
+
+    def between(self, start: float, end: float) -> np.ndarray:
+        """Indices of the frames recorded in [start, end) (wall-clock seconds)."""
+        times = self.index['time']
+        return np.arange(np.searchsorted(times, start, side='left'), np.searchsorted(times, end, side='left'))
+
+    def by_procedure(self, procedure: str, direction: Optional[int] = None) -> np.ndarray:
+        """Indices of the requests of `procedure` and of their responses."""
+        if procedure not in self.procedures:
+            return np.empty(0, dtype=np.intp)
+        mask = self.index['procedure'] == self.procedures.index(procedure)
+        if direction is not None:
+            mask &= self.index['direction'] == direction
+        return np.flatnonzero(mask)
+
+    def messages(self, indices: Optional[np.ndarray] = None) -> Iterator[Tuple[float, int, Optional[ITMPMessage]]]:
+        """(time, direction, message) of the frames, decoded again; None for frames that fail to decode."""
+        for i in range(len(self)) if indices is None else indices:
+            entry = self.index[i]
+            try:
+                message = ITMPMessage.from_frame(self.frame(i))
+            except ValueError:
+                message = None
+            yield float(entry['time']), int(entry['direction']), message
+
+    def frames(self, indices: Optional[np.ndarray] = None) -> Iterator[Tuple[float, int, bytes]]:
+        for i in range(len(self)) if indices is None else indices:
+            entry = self.index[i]
+            yield float(entry['time']), int(entry['direction']), self.frame(i)
+
+
+def summarize(recording: ITMPRecording, indices: Optional[np.ndarray] = None) -> List[Tuple[str, int]]:
+    """Request count per procedure (of the frames at `indices`, all by default), most frequent first."""
+    index = recording.index if indices is None else recording.index[indices]
+    requests = index['procedure'][index['direction'] == TX]
+    requests = requests[requests < len(recording.procedures)]
+    counts = np.bincount(requests, minlength=len(recording.procedures))
+    return sorted(((recording.procedures[code], int(count)) for code, count in enumerate(counts) if count),
+                  key=lambda item: -item[1])
@@ -1,31 +1,99 @@
 import logging
-import pywintypes
-from .itmp_message import ITMPMessage
-from .utils.win_serial_port import Win32SerialPort
+import time
+from typing import Dict, Optional, Tuple
+
+from .itmp_message import ITMPMessage, ITMPMessageType
+from .itmp_metrics import ITMPMetrics, procedure_name
+from .itmp_recorder import ITMPRecorder, RX, TX
+from .utils import hdlc_byte_stuff
+from .utils.serial_port import SerialPort, SerialPortError, open_serial_port
 
 class ITMPSerialDevice:
-    def __init__(self, device_name: str, baudrate: int = 115200, read_timeout: int = 1):
+    def __init__(
+            self,
+            device_name: str,
+            baudrate: int = 115200,
+            read_timeout: int = 1,
+            port: Optional[SerialPort] = None,
+            address: int = 0x08,
+            metrics: Optional[ITMPMetrics] = None,
+            recorder: Optional[ITMPRecorder] = None
+    ):
         self.logger = logging.getLogger(__name__)
 
-        self.port_path = f'\\\\.\\{device_name}'
+        self.port_path = device_name
         self.read_timeout = read_timeout
-        try:
-            self.port = Win32SerialPort(self.port_path, baudrate, self.read_timeout)
-        except Exception:
-            logging.log(logging.FATAL, f"Failed to connect the ITMP device.")
-            raise pywintypes.error("Failed to connect the ITMP device.") 
+        self.address = address
+        self.metrics = metrics
+        self.recorder = recorder
+        # Procedure and write time of the requests in flight, by id (for the response metrics).
+        self._sent: Dict[int, Tuple[str, float]] = {}
+        if port is not None:
+            self.port = port
+        else:
+            try:
+                self.port = open_serial_port(self.port_path, baudrate, self.read_timeout)
+            except Exception:
+                logging.log(logging.FATAL, f"Failed to connect the ITMP device.")
+                raise SerialPortError("Failed to connect the ITMP device.")
         
         self.logger.log(level=logging.DEBUG, msg="ITMP device was connected successfully.")
 
     def write(self, message: "ITMPMessage") -> None:
-        data = message.to_hdlc()
+        start = time.perf_counter()
+        data = message.to_hdlc(self.address)
+        encoded = time.perf_counter()
+        # Logged before writing, so that the response can not be logged first.
+        self._record(TX, data, message)
         self.port.write(data)
+        if self.metrics is not None:
+            written = time.perf_counter()
+            procedure = procedure_name(message)
+            self.metrics.observe(procedure, "encode", encoded - start)
+            self.metrics.observe(procedure, "write", written - encoded)
+            self._sent[message.id] = (procedure, written)
+
+    def read(self, timeout: Optional[float] = None) -> "ITMPMessage":
+        frame = self.port.read_frame(timeout)
+        if not frame:
+            return None
+        start = time.perf_counter()
+        try:
+            message = ITMPMessage.from_frame(frame)
+        except ValueError:
+            if self.recorder is not None:
+                self.recorder.record(RX, frame)
+            raise
+        decoded = time.perf_counter()
+        if self.recorder is not None:
+            self.recorder.record(RX, frame, message)
+        if self.metrics is None or message.type is ITMPMessageType.EVENT:
+            return message
+
+        request = self._sent.pop(message.id, None)
+        if request is not None:
+            procedure, written = request
+            # Responses read late (e.g. after send_call() slept the move time) have
+            # no arrival time and are left out of first_byte and read.
+            if self.port.frame_times is not None:
+                first_byte, last_byte = self.port.frame_times
+                self.metrics.observe(procedure, "first_byte", max(0.0, first_byte - written))
+                self.metrics.observe(procedure, "read", max(0.0, last_byte - written))
+            self.metrics.observe(procedure, "decode", decoded - start)
+        return message
+
+    def forget(self, message: "ITMPMessage") -> None:
+        """Drops a request that will not be answered (timed out) and counts the timeout."""
+        request = self._sent.pop(message.id, None)
+        if self.metrics is not None and request is not None:
+            self.metrics.timeout(request[0])
 
-    def read(self) -> "ITMPMessage":
-        raw_data = self.port.read()
-        if raw_data:
-            return ITMPMessage.from_hdlc(raw_data)
-        return None
+    def _record(self, direction: int, data: bytes, message: "ITMPMessage") -> None:
+        if self.recorder is not None:
+            # Frames are logged unstuffed and without flags, as they are read.
+            self.recorder.record(direction, hdlc_byte_stuff.unstuff_bytes(data[1:-1]), message)
 
     def close(self) -> None:
         self.port.close()
+        if self.recorder is not None:
+            self.recorder.flush()
@@ -1,3 +1,12 @@
+import os
+
 from . import crc8
 from . import hdlc_byte_stuff
-from . import win_serial_port
+from . import hdlc_deframer
+from . import serial_port
+from . import socket_serial_port
+
+if os.name == 'nt':
+    from . import win_serial_port
+else:
+    from . import posix_serial_port
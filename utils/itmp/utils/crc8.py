@@ -1,3 +1,12 @@
+import sys
+from typing import List, Sequence
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
 crc8_table = [
 	0, 94,188,226, 97, 63,221,131,194,156,126, 32,163,253, 31, 65,
 	157,195, 33,127,252,162, 64, 30, 95, 1,227,189, 62, 96,130,220,
@@ -18,14 +27,100 @@ crc8_table = [
 ]
 
 
+
+# Buffers shorter than this are processed byte by byte; longer ones two bytes
+# per step through the 16-bit table.
+_WIDE_MIN_LEN = 16
+# crc8_get_many() uses NumPy for batches at least this large...
+_BATCH_MIN_COUNT = 32
+# ...of buffers not longer than this.
+_BATCH_MAX_LEN = 1024
+
+_crc8_table16 = None
+_crc8_table_np = None
+
+
+def _build_table16() -> bytes:
+	"""CRC of two bytes in one lookup: indexed by a native-endian 16-bit word
+	xored with the current CRC (shifted into the first byte of the word)."""
+	table = bytearray(65536)
+	for first in range(256):
+		row = crc8_table[first]
+		for second in range(256):
+			if sys.byteorder == 'little':
+				table[(second << 8) | first] = crc8_table[row ^ second]
+			else:
+				table[(first << 8) | second] = crc8_table[row ^ second]
+	return bytes(table)
+
+
 def crc8_get_part(crc, data):
 	return crc8_table[crc ^ data]
 
 
 def crc8_get(data):
 	crc = 0xFF
+	table = crc8_table
+
+	if len(data) < _WIDE_MIN_LEN or not isinstance(data, (bytes, bytearray, memoryview)):
+		for byte in data:
+			crc = table[crc ^ byte]
+		return crc
 
-	for i in range(len(data)):
-		crc = crc8_get_part(crc, data[i])
-		
+	global _crc8_table16
+	if _crc8_table16 is None:
+		_crc8_table16 = _build_table16()
+	table16 = _crc8_table16
+
+	view = memoryview(data).cast('B')
+	even = len(view) & ~1
+	words = view[:even].cast('H')
+	if sys.byteorder == 'little':
+		for word in words:
+			crc = table16[crc ^ word]
+	else:
+		for word in words:
+			crc = table16[(crc << 8) ^ word]
+	if even != len(view):
+		crc = table[crc ^ view[-1]]
 	return crc
+
+
+def crc8_get_many(buffers: Sequence[bytes]) -> List[int]:
+	"""CRC8 of every buffer. Large batches of short buffers (e.g. frames from
+	a traffic log) are processed column by column with NumPy."""
+	if numpy is None or len(buffers) < _BATCH_MIN_COUNT:
+		return [crc8_get(buffer) for buffer in buffers]
+
+	lengths = numpy.fromiter(map(len, buffers), dtype=numpy.intp, count=len(buffers))
+	width = int(lengths.max())
+	if width > _BATCH_MAX_LEN:
+		return [crc8_get(buffer) for buffer in buffers]
+
+	global _crc8_table_np
+	if _crc8_table_np is None:
+		_crc8_table_np = numpy.array(crc8_table, dtype=numpy.uint8)
+
+	# Longest buffers first, so the buffers still being processed at column j
+	# are always a prefix of the matrix.
+	order = numpy.argsort(-lengths, kind='stable')
+	lengths = lengths[order]
+	matrix = numpy.zeros((len(buffers), width), dtype=numpy.uint8)
+	mask = numpy.arange(width) < lengths[:, None]
+	matrix[mask] = numpy.frombuffer(b''.join([buffers[i] for i in order]), dtype=numpy.uint8)
+	active = numpy.searchsorted(-lengths, -numpy.arange(width), side='left')
+
+	crc = numpy.full(len(buffers), 0xFF, dtype=numpy.uint8)
+	for j in range(width):
+		rows = active[j]
+		crc[:rows] = _crc8_table_np[crc[:rows] ^ matrix[:rows, j]]
+
+	result = numpy.empty_like(crc)
+	result[order] = crc
+	return result.tolist()
+
+
+def crc8_check_frames(frames: Sequence[bytes]) -> List[bool]:
+	"""Checks frames ending with their CRC8 byte (address, payload, CRC).
+	CRC8 over the data followed by its own CRC is always zero."""
+	return [crc == 0 for crc in crc8_get_many(frames)]
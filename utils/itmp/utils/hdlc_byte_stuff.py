@@ -1,32 +1,50 @@
-def byte_stuff(data: bytes):
-    ESCAPE = 0x7D
-    FLAG = 0x7E
-    ESCAPE_XOR = 0x20
+import re
+
+
+FLAG = 0x7E
+ESCAPE = 0x7D
+ESCAPE_XOR = 0x20
+
+_ESCAPED_FLAG = bytes([ESCAPE, FLAG ^ ESCAPE_XOR])
+_ESCAPED_ESCAPE = bytes([ESCAPE, ESCAPE ^ ESCAPE_XOR])
+
+# Any escaped byte (not only the flag and the escape itself) is unstuffed as
+# byte ^ 0x20; a dangling escape at the end of a truncated buffer is dropped.
+_ESCAPE_PAIR = re.compile(rb'\x7d(?:.|\Z)', re.DOTALL)
+# re works on any buffer, so memoryviews are searched without a copy.
+_ESCAPE_BYTE = re.compile(rb'\x7d')
+_UNESCAPED = {bytes([ESCAPE, byte]): bytes([byte ^ ESCAPE_XOR]) for byte in range(256)}
+_UNESCAPED[bytes([ESCAPE])] = bytes()
 
-    stuffed = bytearray()
-    for byte in data:
-        if byte in (ESCAPE, FLAG):
-            stuffed.append(ESCAPE)
-            stuffed.append(byte ^ ESCAPE_XOR)
-        else:
-            stuffed.append(byte)
-    return bytes(stuffed)
+
+def byte_stuff(data: bytes):
+    data = bytes(data)
+    if ESCAPE in data:
+        data = data.replace(b'\x7d', _ESCAPED_ESCAPE)
+    if FLAG in data:
+        data = data.replace(b'\x7e', _ESCAPED_FLAG)
+    return data
 
 
 def unstuff_bytes(data: bytes) -> bytes:
-    result = bytearray()
-    i = 0
-    while i < len(data):
-        if data[i] == 0x7D:
-            i += 1
-            result.append(data[i] ^ 0x20)
-        else:
-            result.append(data[i])
-        i += 1
-    return bytes(result)
+    data = bytes(data)
+    if ESCAPE not in data:
+        return data
+
+    escapes = data.count(ESCAPE)
+    if escapes == data.count(_ESCAPED_FLAG) + data.count(_ESCAPED_ESCAPE):
+        # Only the two escapes produced by byte_stuff(): every 0x7D starts a pair.
+        return data.replace(_ESCAPED_FLAG, b'\x7e').replace(_ESCAPED_ESCAPE, b'\x7d')
+    return _ESCAPE_PAIR.sub(lambda pair: _UNESCAPED[pair.group()], data)
+
+
+def unstuff_view(data) -> memoryview:
+    """Unstuffed data as a view: `data` itself (no copy) when it has no escapes."""
+    view = memoryview(data)
+    if _ESCAPE_BYTE.search(view) is None:
+        return view
+    return memoryview(unstuff_bytes(view))
 
 
 def bytes2hdlc(data: bytes):
-    stuffed = byte_stuff(data)
-    FLAG = 0x7E
-    return bytes([FLAG]) + stuffed + bytes([FLAG])
+    return b'\x7e' + byte_stuff(data) + b'\x7e'
@@ -0,0 +1,85 @@
+from typing import List
+
+from . import hdlc_byte_stuff
+
+
+FLAG = 0x7E
+ESCAPE = 0x7D
+
+
+class HDLCDeframer:
+    """Incremental HDLC deframer.
+
+    Takes arbitrary chunks of the received byte stream and returns every frame
+    completed by them (unstuffed, without flags). A frame may be split across any
+    number of chunks, and a single flag may close one frame and open the next one.
+    Bytes before the first flag, empty frames and aborted frames (escape right
+    before a flag, or longer than `max_frame_size`) are dropped.
+    """
+
+    def __init__(self, max_frame_size: int = 4096):
+        self.max_frame_size = max_frame_size
+        self.dropped_bytes = 0
+        self.dropped_frames = 0
+        self._buffer = bytearray()
+        self._in_frame = False
+
+    @property
+    def partial(self) -> bool:
+        """True while bytes of an unfinished frame are buffered."""
+        return bool(self._buffer)
+
+    def feed(self, data: bytes) -> List[bytes]:
+        frames = []
+        start = 0
+        end = data.find(FLAG)
+        while end != -1:
+            if self._in_frame:
+                self._buffer += data[start:end]
+                if self._buffer:
+                    frame = self._unstuff()
+                    if frame:
+                        frames.append(frame)
+            else:
+                self.dropped_bytes += end - start
+            self._buffer.clear()
+            self._in_frame = True
+            start = end + 1
+            end = data.find(FLAG, start)
+
+        if self._in_frame:
+            self._buffer += data[start:]
+            if len(self._buffer) > 2 * self.max_frame_size:
+                self._drop_frame()
+        else:
+            self.dropped_bytes += len(data) - start
+        return frames
+
+    def reset(self) -> None:
+        """Drops the partially received frame and waits for the next flag."""
+        self._buffer.clear()
+        self._in_frame = False
+
+    def _unstuff(self) -> bytes:
+        buffer = self._buffer
+        if buffer[-1] == ESCAPE:
+            # Aborted frame: escape byte right before the flag.
+            self.dropped_frames += 1
+            self.dropped_bytes += len(buffer)
+            return bytes()
+
+        if ESCAPE in buffer:
+            frame = hdlc_byte_stuff.unstuff_bytes(bytes(buffer))
+        else:
+            frame = bytes(buffer)
+
+        if len(frame) > self.max_frame_size:
+            self.dropped_frames += 1
+            self.dropped_bytes += len(buffer)
+            return bytes()
+        return frame
+
+    def _drop_frame(self) -> None:
+        self.dropped_frames += 1
+        self.dropped_bytes += len(self._buffer)
+        self.reset()
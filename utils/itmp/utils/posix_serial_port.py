@@ -0,0 +1,99 @@
+import logging
+import os
+import select
+import termios
+import time
+
+from .serial_port import SerialPort, SerialPortError
+
+
+class PosixSerialPort(SerialPort):
+    """termios based serial transport for Linux and other POSIX systems.
+
+    The port is opened in non-blocking raw mode; reads sleep in poll() until data
+    arrives and then take everything the driver has buffered with a single read().
+    """
+
+    READ_CHUNK = 4096
+
+    def __init__(self, device_name: str, baudrate: int, read_timeout: float, write_timeout: float = 1.0):
+        super().__init__(read_timeout)
+        self.logger = logging.getLogger()
+        self.device_path = device_name
+        self.write_timeout = write_timeout
+
+        try:
+            self.fd = os.open(self.device_path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        except OSError:
+            self.logger.log(logging.FATAL, msg=f"Failed to open the serial port: \"{device_name}\"")
+            raise SerialPortError(f"Failed to open the serial port: \"{device_name}\"")
+
+        self.logger.log(level=logging.DEBUG, msg=f"Serial device was connected successfully. fd: {self.fd}")
+
+        try:
+            self.__set_termios(baudrate)
+        except (termios.error, ValueError):
+            os.close(self.fd)
+            raise
+
+        self._poll_in = select.poll()
+        self._poll_in.register(self.fd, select.POLLIN)
+        self._poll_out = select.poll()
+        self._poll_out.register(self.fd, select.POLLOUT)
+
+    def __set_termios(self, baudrate: int):
+        speed = getattr(termios, f"B{baudrate}", None)
+        if speed is None:
+            raise ValueError(f"Unsupported baudrate: {baudrate}")
+
+        iflag, oflag, cflag, lflag, ispeed, ospeed, cc = termios.tcgetattr(self.fd)
+
+        # Raw 8N1 without flow control.
+        iflag &= ~(termios.IGNBRK | termios.BRKINT | termios.PARMRK | termios.ISTRIP
+                   | termios.INLCR | termios.IGNCR | termios.ICRNL | termios.IXON | termios.IXOFF)
+        oflag &= ~termios.OPOST
+        lflag &= ~(termios.ECHO | termios.ECHONL | termios.ICANON | termios.ISIG | termios.IEXTEN)
+        cflag &= ~(termios.CSIZE | termios.PARENB | termios.CSTOPB | getattr(termios, 'CRTSCTS', 0))
+        cflag |= termios.CS8 | termios.CREAD | termios.CLOCAL
+        cc[termios.VMIN] = 0
+        cc[termios.VTIME] = 0
+
+        termios.tcsetattr(self.fd, termios.TCSANOW, [iflag, oflag, cflag, lflag, speed, speed, cc])
+        termios.tcflush(self.fd, termios.TCIOFLUSH)
+
+    def write(self, packet: bytes) -> None:
+        view = memoryview(packet)
+        deadline = time.monotonic() + self.write_timeout
+        while view:
+            try:
+                written = os.write(self.fd, view)
+            except BlockingIOError:
+                written = 0
+            except OSError as e:
+                raise SerialPortError(f"Failed to write to the serial port: \"{self.device_path}\" ({e})")
+            view = view[written:]
+            if not view:
+                break
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._poll_out.poll(remaining * 1000):
+                raise SerialPortError(f"Serial write timeout ({self.write_timeout} s).")
+
+    def read_bytes(self, timeout: float) -> bytes:
+        if not self._poll_in.poll(max(timeout, 0) * 1000):
+            return bytes()
+        try:
+            return os.read(self.fd, self.READ_CHUNK)
+        except BlockingIOError:
+            return bytes()
+        except OSError as e:
+            raise SerialPortError(f"Failed to read from the serial port: \"{self.device_path}\" ({e})")
+
+    def data_waiting(self) -> bool:
+        return bool(self._poll_in.poll(0))
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def close(self) -> None:
+        os.close(self.fd)
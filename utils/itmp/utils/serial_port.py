@@ -0,0 +1,95 @@
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional
+
+from .hdlc_deframer import HDLCDeframer
+
+
+class SerialPortError(OSError):
+    """Raised when a serial transport can not be opened or used."""
+    pass
+
+
+class SerialPort(ABC):
+    """Base class of the serial transports used by ITMPSerialDevice.
+
+    Backends only have to implement raw byte I/O (`write`, `read_bytes`, `close`);
+    splitting the incoming byte stream into HDLC frames is done here.
+    """
+
+    def __init__(self, read_timeout: float):
+        self.read_timeout = read_timeout
+        self.deframer = HDLCDeframer()
+        self._frames = deque()
+        # perf_counter() when the first and the last byte of the last frame returned
+        # by read_frame() were received (at the granularity of read_bytes() calls).
+        # None when the frame was already buffered before read_frame() started
+        # waiting for it: it arrived at an unknown earlier time.
+        self.frame_times = (0.0, 0.0)
+        self._frame_started = 0.0
+
+    @abstractmethod
+    def write(self, packet: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def read_bytes(self, timeout: float) -> bytes:
+        """Waits up to `timeout` seconds for incoming data and returns everything
+        that is buffered by the driver. Returns empty bytes on timeout."""
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    def data_waiting(self) -> bool:
+        """True if received data is buffered by the driver (checked without waiting).
+        Backends that can not tell return False."""
+        return False
+
+    def read_frame(self, timeout: Optional[float] = None) -> bytes:
+        """Reads a single HDLC frame (unstuffed, without flags).
+        Returns empty bytes if no full frame was received within `timeout`
+        (`read_timeout` by default)."""
+        if timeout is None:
+            timeout = self.read_timeout
+        deadline = time.monotonic() + timeout
+        # Data that was waiting in the driver has no arrival time: it is not stamped.
+        stale = not self._frames and self.data_waiting()
+        while not self._frames:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Reported by the callers: a short read timeout is normal while polling.
+                logging.getLogger().log(logging.DEBUG, msg=f"Serial read timeout ({timeout} s).")
+                return bytes()
+            data = self.read_bytes(remaining)
+            if not data:
+                continue
+            now = None if stale else time.perf_counter()
+            stale = False
+            started = self._frame_started if self.deframer.partial else now
+            for frame in self.deframer.feed(data):
+                self._frames.append((frame, None if started is None or now is None else (started, now)))
+                started = now
+            self._frame_started = started
+        frame, self.frame_times = self._frames.popleft()
+        return frame
+
+
+def open_serial_port(device_name: str, baudrate: int, read_timeout: float) -> SerialPort:
+    """Opens the serial transport suitable for the current platform
+    (or a TCP connection for socket://host:port)."""
+    from .socket_serial_port import SOCKET_URL_PREFIX
+    if device_name.startswith(SOCKET_URL_PREFIX):
+        from .socket_serial_port import SocketSerialPort
+        return SocketSerialPort(device_name, read_timeout)
+
+    if os.name == 'nt':
+        from .win_serial_port import Win32SerialPort
+        return Win32SerialPort(device_name, baudrate, read_timeout)
+
+    from .posix_serial_port import PosixSerialPort
+    return PosixSerialPort(device_name, baudrate, read_timeout)
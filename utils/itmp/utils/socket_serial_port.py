@@ -0,0 +1,65 @@
+import logging
+import select
+import socket
+
+from .serial_port import SerialPort, SerialPortError
+
+
+SOCKET_URL_PREFIX = "socket://"
+
+
+def parse_socket_url(url: str):
+    """("host", port) of a socket://host:port device name."""
+    host, separator, port = url[len(SOCKET_URL_PREFIX):].rpartition(":")
+    if not url.startswith(SOCKET_URL_PREFIX) or not separator or not port.isdigit():
+        raise ValueError(f"Expected socket://host:port, got {url!r}.")
+    return host or "localhost", int(port)
+
+
+class SocketSerialPort(SerialPort):
+    """Serial transport over TCP (socket://host:port), e.g. to a serial server or
+    the head simulator. Works on every platform."""
+
+    READ_CHUNK = 4096
+
+    def __init__(self, device_name: str, read_timeout: float, write_timeout: float = 1.0):
+        super().__init__(read_timeout)
+        self.logger = logging.getLogger()
+        self.device_path = device_name
+        try:
+            address = parse_socket_url(device_name)
+            self.sock = socket.create_connection(address, timeout=write_timeout)
+        except (OSError, ValueError) as e:
+            self.logger.log(logging.FATAL, msg=f"Failed to open the serial port: \"{device_name}\" ({e})")
+            raise SerialPortError(f"Failed to open the serial port: \"{device_name}\"")
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(write_timeout)
+
+    def write(self, packet: bytes) -> None:
+        try:
+            self.sock.sendall(packet)
+        except OSError as e:
+            raise SerialPortError(f"Failed to write to the serial port: \"{self.device_path}\" ({e})")
+
+    def read_bytes(self, timeout: float) -> bytes:
+        try:
+            if not select.select([self.sock], [], [], max(timeout, 0))[0]:
+                return bytes()
+            data = self.sock.recv(self.READ_CHUNK)
+        except OSError as e:
+            raise SerialPortError(f"Failed to read from the serial port: \"{self.device_path}\" ({e})")
+        if not data:
+            raise SerialPortError(f"The serial port was closed by the peer: \"{self.device_path}\"")
+        return data
+
+    def data_waiting(self) -> bool:
+        try:
+            return bool(select.select([self.sock], [], [], 0)[0])
+        except OSError:
+            return False
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def close(self) -> None:
+        self.sock.close()
@@ -1,10 +1,11 @@
 import ctypes
 import logging
-import time
 import win32con
 import win32file
 import pywintypes
 
+from .serial_port import SerialPort, SerialPortError
+
 
 class COMMTIMEOUTS(ctypes.Structure):
     _fields_ = [
@@ -16,11 +17,14 @@ class COMMTIMEOUTS(ctypes.Structure):
     ]
 
 
-class Win32SerialPort:
+class Win32SerialPort(SerialPort):
+    READ_CHUNK = 4096
+
     def __init__(self, device_name: str, baudrate: int, read_timeout: float):
+        super().__init__(read_timeout)
         self.logger = logging.getLogger()
         self.device_path =  f'\\\\.\\{device_name}'
-        self.read_timeout_ms = read_timeout
+        self._read_timeout_ms = None
 
         try:
             self.handle = win32file.CreateFile(
@@ -34,7 +38,7 @@ class Win32SerialPort:
             )
         except pywintypes.error:
             self.logger.log(logging.FATAL, msg=f"Failed to open the COM-port: \"{device_name}\"")
-            raise pywintypes.error(f"Failed to open the COM-port: \"{device_name}\"")
+            raise SerialPortError(f"Failed to open the COM-port: \"{device_name}\"")
         
         self.logger.log(level=logging.DEBUG, msg=f"Serial device was connected successfully. Handle: {self.handle}")
 
@@ -52,13 +56,15 @@ class Win32SerialPort:
 
         win32file.SetCommState(self.handle, dcb)
 
-        self.__set_timeouts(1000)
+        self.__set_timeouts(int(self.read_timeout * 1000), 1000)
     
-    def __set_timeouts(self, write_timeout_ms: float):
+    def __set_timeouts(self, read_timeout_ms: int, write_timeout_ms: float):
+        # MAXDWORD/MAXDWORD/constant: ReadFile() returns as soon as any byte is
+        # buffered (with everything that is buffered) or after `read_timeout_ms`.
         timeouts = COMMTIMEOUTS()
         timeouts.ReadIntervalTimeout = win32con.MAXDWORD
-        timeouts.ReadTotalTimeoutMultiplier = 0
-        timeouts.ReadTotalTimeoutConstant = 0
+        timeouts.ReadTotalTimeoutMultiplier = win32con.MAXDWORD
+        timeouts.ReadTotalTimeoutConstant = max(read_timeout_ms, 1)
         timeouts.WriteTotalTimeoutMultiplier = 0
         timeouts.WriteTotalTimeoutConstant = write_timeout_ms
 
@@ -69,22 +75,30 @@ class Win32SerialPort:
 
         if result == 0:
             raise ctypes.WinError()
+        self._read_timeout_ms = read_timeout_ms
 
     def write(self, packet: bytes) -> None:
         win32file.WriteFile(self.handle, packet)
 
-    def read(self) -> bytes:
-        data = bytes([])
-        ts = time.time()
-        tc = time.time()
-        while (tc - ts < self.read_timeout_ms) and ((len(data) < 2) or (hex(data[-1]) != hex(0x7e))):
-            rc, recieved = win32file.ReadFile(self.handle, 1)
-            data += recieved
-            tc = time.time()
-        if (tc - ts > self.read_timeout_ms):
-            print("TIMEOUT!")
-            return bytes([0])
-        return data
+    def read_bytes(self, timeout: float) -> bytes:
+        # Callers pass what is left of their deadline, which differs on every call.
+        # Rounded down to a power of two (ms), SetCommTimeouts is only needed when
+        # the rounded value changes; an early empty return is read again by the caller.
+        timeout_ms = 1 << (max(int(timeout * 1000), 1).bit_length() - 1)
+        if timeout_ms != self._read_timeout_ms:
+            self.__set_timeouts(timeout_ms, 1000)
+        try:
+            rc, recieved = win32file.ReadFile(self.handle, self.READ_CHUNK)
+        except pywintypes.error as e:
+            raise SerialPortError(f"Failed to read from the COM-port: {e}")
+        return bytes(recieved)
+
+    def data_waiting(self) -> bool:
+        try:
+            errors, status = win32file.ClearCommError(self.handle)
+        except pywintypes.error:
+            return False
+        return status.cbInQue > 0
 
     def close(self):
         win32file.CloseHandle(self.handle)
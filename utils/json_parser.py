@@ -37,7 +37,6 @@ class JSONParser:
         return script
 
     def next(self) -> list:
-        print(self.script)
         if self.current_id >= len(self.script):
             return []
         
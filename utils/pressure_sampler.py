@@ -0,0 +1,226 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from .head_device import HeadDevice
+
+
+class SampleRing:
+    """Fixed-size ring buffer of (time, value) samples.
+
+    One thread appends; any thread reads. Reads return copies in chronological
+    order, so they stay valid while new samples overwrite the oldest ones.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        # Samples written since the start (the next slot is _count % capacity).
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def count(self) -> int:
+        """Samples appended in total (including the overwritten ones)."""
+        return self._count
+
+    def append(self, t: float, value: float) -> None:
+        with self._lock:
+            i = self._count % self.capacity
+            self._times[i] = t
+            self._values[i] = value
+            self._count += 1
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            if self._count == 0:
+                return None
+            i = (self._count - 1) % self.capacity
+            return float(self._times[i]), float(self._values[i])
+
+    def last(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Times and values of the last `n` samples (all buffered ones if None)."""
+        with self._lock:
+            size = min(self._count, self.capacity)
+            n = size if n is None else min(n, size)
+            end = self._count % self.capacity
+            start = end - n
+            if start >= 0:
+                return self._times[start:end].copy(), self._values[start:end].copy()
+            return (np.concatenate((self._times[start:], self._times[:end])),
+                    np.concatenate((self._values[start:], self._values[:end])))
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Samples of the last `seconds` (before `now`, or before the latest sample)."""
+        times, values = self.last()
+        if len(times) == 0:
+            return times, values
+        end = times[-1] if now is None else now
+        start = np.searchsorted(times, end - seconds, side='left')
+        return times[start:], values[start:]
+
+    def decimated(self, points: int, seconds: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """At most `points` samples spread over the window (or the whole buffer),
+        each the mean of its block of consecutive samples."""
+        times, values = self.last() if seconds is None else self.window(seconds)
+        step = -(-len(values) // points) if points > 0 else len(values)
+        if step <= 1:
+            return times, values
+        blocks = len(values) // step
+        # The incomplete block at the start (oldest samples) is left out.
+        start = len(values) - blocks * step
+        return (times[start + step - 1::step],
+                values[start:].reshape(blocks, step).mean(axis=1))
+
+
+class PressureSampler:
+    """Polls `adc/p` of a head at a target rate on its own thread.
+
+    Requests are pipelined (up to `in_flight` outstanding), so the rate is not
+    bound by the round trip time. Samples are stored with the time their request
+    was sent (`clock`, time.monotonic by default) in a SampleRing; consumers read
+    the latest value, a window or a decimated view without touching the port.
+    """
+
+    def __init__(
+            self,
+            head: HeadDevice,
+            rate: float = 100.0,
+            capacity: int = 65536,
+            in_flight: int = 4,
+            timeout: float = 1.0,
+            procedure: str = "adc/p",
+            clock: Callable[[], float] = time.monotonic
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.head = head
+        self.rate = rate
+        self.in_flight = in_flight
+        self.timeout = timeout
+        self.procedure = procedure
+        self.clock = clock
+        self.samples = SampleRing(capacity)
+
+        self.sent = 0
+        self.timeouts = 0
+        self.errors = 0
+
+        self._new_sample = threading.Condition()
+        self._running = threading.Event()
+        self._thread = None
+
+    def __enter__(self) -> "PressureSampler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._running.is_set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._sample_loop, name="pressure-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """(time, pressure) of the newest sample, or None before the first one."""
+        return self.samples.latest()
+
+    def window(self, seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        return self.samples.window(seconds)
+
+    def decimated(self, points: int, seconds: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        return self.samples.decimated(points, seconds)
+
+    def wait_sample(self, after: Optional[float] = None, timeout: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """Waits for a sample requested after `after` (`clock` time, default: now),
+        e.g. the first pressure reading after a move. None on timeout."""
+        after = self.clock() if after is None else after
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._new_sample:
+            while True:
+                latest = self.samples.latest()
+                if latest is not None and latest[0] > after:
+                    return latest
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or not self.running:
+                    return None
+                self._new_sample.wait(remaining if remaining is not None else 0.1)
+
+    def _sample_loop(self) -> None:
+        calls = self.head.calls
+        # Pipelined devices are read by their callers: the time between requests
+        # is spent reading responses. Bus devices have their own reader.
+        poll = getattr(calls, "poll", None)
+        period = 1 / self.rate
+        pending = deque()
+        next_request = self.clock()
+        try:
+            while self.running:
+                now = self.clock()
+                if now >= next_request and len(pending) < self.in_flight:
+                    pending.append((now, self.head.call_async(self.procedure, [])))
+                    self.sent += 1
+                    next_request += period
+                    if next_request < now:
+                        # Late (e.g. the line was busy): skip the missed requests.
+                        next_request = now + period
+                self._collect(pending)
+
+                wait = next_request - self.clock()
+                if wait <= 0 and len(pending) >= self.in_flight:
+                    wait = period
+                if wait > 0:
+                    if poll is not None and pending:
+                        poll(wait)
+                    else:
+                        time.sleep(wait)
+        except Exception as e:
+            self.logger.log(level=logging.ERROR, msg=f"Pressure sampling stopped: {e}")
+        finally:
+            self._running.clear()
+            with self._new_sample:
+                self._new_sample.notify_all()
+
+    def _collect(self, pending: deque) -> None:
+        """Stores the answered requests in order; drops the expired ones."""
+        now = self.clock()
+        added = False
+        while pending:
+            sent, call = pending[0]
+            if not call.done() and now - sent < self.timeout:
+                break
+            pending.popleft()
+            try:
+                result = call.result(0).to_list()[2]
+            except TimeoutError:
+                self.timeouts += 1
+                continue
+            except Exception as e:
+                self.errors += 1
+                self.logger.log(level=logging.WARNING, msg=f"{self.procedure} failed: {e}")
+                continue
+            self.samples.append(sent, result[0] if isinstance(result, list) else result)
+            added = True
+        if added:
+            with self._new_sample:
+                self._new_sample.notify_all()
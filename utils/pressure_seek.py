@@ -0,0 +1,95 @@
+import math
+from enum import Enum
+from typing import Callable, Optional
+
+
+class SeekStrategy(Enum):
+    # Probe the far end of the range first, then halve the bracket.
+    BISECT = 0
+    # Walk towards the far end in coarse steps, then halve the last step.
+    COARSE_FINE = 1
+
+
+class SeekResult:
+    def __init__(self, position: int, pressure: Optional[float], iterations: int, found: bool):
+        # First position (within the tolerance) where the pressure crosses the threshold.
+        self.position = position
+        self.pressure = pressure
+        # Moves, each followed by one pressure reading.
+        self.iterations = iterations
+        self.found = found
+
+    def __repr__(self) -> str:
+        return (f"SeekResult(position={self.position}, pressure={self.pressure}, "
+                f"iterations={self.iterations}, found={self.found})")
+
+
+def seek_threshold(
+        move: Callable[[int], object],
+        read: Callable[[], float],
+        threshold: float,
+        start: int,
+        end: int,
+        tolerance: int = 1,
+        strategy: SeekStrategy = SeekStrategy.COARSE_FINE,
+        coarse_steps: int = 8,
+        below: bool = True
+) -> SeekResult:
+    """Finds the position between `start` (where the threshold is not crossed)
+    and `end` where the pressure drops below `threshold` (rises above it with
+    below=False), assuming it changes monotonically along the way.
+
+    `move(position)` returns once the motor is there and `read()` returns the
+    pressure at that position. BISECT needs about log2(range / tolerance) moves
+    but first goes to `end`; COARSE_FINE does not go further than one coarse
+    step past the crossing. The motor is left at the returned position.
+    """
+    if tolerance < 1:
+        raise ValueError("Tolerance must be at least 1.")
+
+    def crossed(pressure: float) -> bool:
+        return pressure < threshold if below else pressure > threshold
+
+    iterations = 0
+    last = None
+
+    def probe(position: int) -> float:
+        nonlocal iterations, last
+        move(position)
+        iterations += 1
+        last = position
+        return read()
+
+    # Invariant: not crossed at `low`, crossed at `high`.
+    low = start
+    if strategy is SeekStrategy.BISECT:
+        high, pressure = end, probe(end)
+        if not crossed(pressure):
+            return SeekResult(end, pressure, iterations, False)
+    else:
+        step = max(tolerance, math.ceil(abs(end - start) / coarse_steps))
+        direction = 1 if end >= start else -1
+        while True:
+            position = low + direction * step
+            if (position - end) * direction > 0:
+                position = end
+            pressure = probe(position)
+            if crossed(pressure):
+                high = position
+                break
+            if position == end:
+                return SeekResult(end, pressure, iterations, False)
+            low = position
+
+    high_pressure = pressure
+    while abs(high - low) > tolerance:
+        middle = low + (high - low) // 2
+        pressure = probe(middle)
+        if crossed(pressure):
+            high, high_pressure = middle, pressure
+        else:
+            low = middle
+
+    if last != high:
+        move(high)
+    return SeekResult(high, high_pressure, iterations, True)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .script_stream import read_script
+from .script_timing import estimate_script
+
+
+DEFAULT_SCRIPT_CACHE = os.path.join(os.path.expanduser("~"), ".head_controller", "compiled")
+
+# File layout (little endian, every section aligned to 8 bytes):
+#   header:      magic, version, steps, args count, procedure table size
+#   procedures:  JSON list of procedure names
+#   proc_ids:    uint16[steps]   index into procedures
+#   delays:      float64[steps]  estimated step durations (motors starting at 0)
+#   arg_offsets: uint64[steps + 1]
+#   args:        int64[args count]
+_MAGIC = b'HCSC'
+_VERSION = 1
+_HEADER = struct.Struct('<4sIQQQ')
+
+
+class UncompilableScriptError(ValueError):
+    """Raised when a script has arguments the compiled form can not store (non-integers)."""
+    pass
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class CompiledScript:
+    """Script compiled into flat arrays: interned procedure ids, all arguments in
+    one int64 array and the precomputed delay of every step."""
+
+    def __init__(self, procedures: List[str], proc_ids: np.ndarray, delays: np.ndarray,
+                 arg_offsets: np.ndarray, args: np.ndarray, source=None):
+        self.procedures = procedures
+        self.proc_ids = proc_ids
+        self.delays = delays
+        self.arg_offsets = arg_offsets
+        self.args = args
+        # mmap the arrays are views of (kept open while they are in use).
+        self._source = source
+
+    @classmethod
+    def compile(cls, script: List[list]) -> "CompiledScript":
+        procedures = []
+        index = {}
+        proc_ids = np.empty(len(script), dtype=np.uint16)
+        arg_offsets = np.zeros(len(script) + 1, dtype=np.uint64)
+        flat_args = []
+        for step, command in enumerate(script):
+            procedure, args = command[0], command[1]
+            if procedure not in index:
+                index[procedure] = len(procedures)
+                procedures.append(procedure)
+            if not all(isinstance(arg, int) and not isinstance(arg, bool) for arg in args):
+                raise UncompilableScriptError(f"Step {step}: only integer arguments can be compiled ({command}).")
+            proc_ids[step] = index[procedure]
+            flat_args.extend(args)
+            arg_offsets[step + 1] = len(flat_args)
+
+        delays = estimate_script(script).durations
+        return cls(procedures, proc_ids, delays, arg_offsets, np.array(flat_args, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.proc_ids)
+
+    def command(self, step: int) -> Tuple[str, List[int]]:
+        start, end = int(self.arg_offsets[step]), int(self.arg_offsets[step + 1])
+        return self.procedures[self.proc_ids[step]], self.args[start:end].tolist()
+
+    def save(self, path: str) -> None:
+        table = json.dumps(self.procedures).encode('utf-8')
+        sections = [
+            table,
+            self.proc_ids.astype('<u2').tobytes(),
+            self.delays.astype('<f8').tobytes(),
+            self.arg_offsets.astype('<u8').tobytes(),
+            self.args.astype('<i8').tobytes(),
+        ]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, len(self), len(self.args), len(table)))
+            for section in sections:
+                file.write(section)
+                file.write(bytes(_aligned(len(section)) - len(section)))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledScript":
+        """Memory-maps a compiled script; the arrays are read-only views of the file."""
+        with open(path, 'rb') as file:
+            source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, steps, args_count, table_size = _HEADER.unpack_from(source, 0)
+        if magic != _MAGIC or version != _VERSION:
+            source.close()
+            raise ValueError(f"Not a compiled script (or an old version): {path}")
+
+        offset = _HEADER.size
+        procedures = json.loads(source[offset:offset + table_size].decode('utf-8'))
+        offset += _aligned(table_size)
+        arrays = []
+        for dtype, count in (('<u2', steps), ('<f8', steps), ('<u8', steps + 1), ('<i8', args_count)):
+            array = np.frombuffer(source, dtype=dtype, count=count, offset=offset)
+            arrays.append(array)
+            offset += _aligned(array.nbytes)
+        return cls(procedures, *arrays, source=source)
+
+
+def script_hash(filename: str) -> str:
+    digest = hashlib.sha256(struct.pack('<I', _VERSION))
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_or_compile(filename: str, cache_dir: Optional[str] = DEFAULT_SCRIPT_CACHE) -> CompiledScript:
+    """Returns the compiled script from the cache (keyed by the file content hash),
+    compiling and caching it first if needed."""
+    logger = logging.getLogger(__name__)
+    if cache_dir is None:
+        return CompiledScript.compile(read_script(filename))
+
+    path = os.path.join(cache_dir, script_hash(filename) + ".hcs")
+    if os.path.exists(path):
+        try:
+            return CompiledScript.load(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.log(level=logging.WARNING, msg=f"Failed to load the compiled script {path} ({e}), recompiling.")
+
+    compiled = CompiledScript.compile(read_script(filename))
+    try:
+        compiled.save(path)
+    except OSError as e:
+        logger.log(level=logging.WARNING, msg=f"Failed to save the compiled script {path} ({e}).")
+    return compiled
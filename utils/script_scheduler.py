@@ -0,0 +1,96 @@
+import time
+from array import array
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+
+class LatenessStats:
+    """Per-step lateness (actual start - planned deadline, seconds) of a scheduled script."""
+
+    def __init__(self):
+        self.lateness = array('d')
+
+    def add(self, lateness: float) -> None:
+        self.lateness.append(lateness)
+
+    def __len__(self) -> int:
+        return len(self.lateness)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.lateness:
+            return {"steps": 0}
+        values = np.frombuffer(self.lateness, dtype=np.float64)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "steps": len(values),
+            "mean": float(values.mean()),
+            "max": float(values.max()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "late_1ms": int(np.count_nonzero(values > 0.001)),
+        }
+
+    def __repr__(self) -> str:
+        summary = self.summary()
+        if not summary["steps"]:
+            return "LatenessStats(steps=0)"
+        return (f"LatenessStats(steps={summary['steps']}, mean={summary['mean'] * 1e3:.3f} ms, "
+                f"p99={summary['p99'] * 1e3:.3f} ms, max={summary['max'] * 1e3:.3f} ms)")
+
+
+class DeadlineScheduler:
+    """Runs steps on an absolute timeline instead of chaining sleeps.
+
+    Step deadlines are the start time plus the sum of the planned delays, so the
+    time spent on serial I/O, logging or decoding in one step does not shift the
+    later ones. wait() sleeps coarsely until shortly before the deadline and
+    spins for the rest; the lead time grows with the measured oversleep of the
+    coarse sleep.
+    """
+
+    # Weight of the last measurement in the oversleep estimate.
+    OVERSLEEP_GAIN = 0.1
+    MAX_OVERSLEEP = 0.02
+
+    def __init__(self, spin: float = 0.002, clock: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.spin = spin
+        self.clock = clock
+        self.sleep = sleep
+        self.oversleep = 0.0
+        self.stats = LatenessStats()
+        self.deadline = None
+
+    def start(self, at: Optional[float] = None) -> None:
+        """Sets the deadline of the first step (now by default) and resets the statistics."""
+        self.deadline = self.clock() if at is None else at
+        self.stats = LatenessStats()
+
+    def wait(self, record: bool = True) -> float:
+        """Waits for the deadline of the current step; returns (and records) its lateness."""
+        if self.deadline is None:
+            self.start()
+        deadline = self.deadline
+        wake = deadline - self.spin - self.oversleep
+        now = self.clock()
+        if wake > now:
+            self.sleep(wake - now)
+            overshoot = max(0.0, self.clock() - wake)
+            self.oversleep = min(self.MAX_OVERSLEEP,
+                                 self.oversleep + self.OVERSLEEP_GAIN * (overshoot - self.oversleep))
+        now = self.clock()
+        while now < deadline:
+            # Let the other threads (e.g. a reader) run while spinning.
+            self.sleep(0)
+            now = self.clock()
+
+        lateness = now - deadline
+        if record:
+            self.stats.add(lateness)
+        return lateness
+
+    def advance(self, delay: float) -> None:
+        """Moves the deadline to the next step, `delay` after the current deadline."""
+        self.deadline += delay
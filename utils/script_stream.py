@@ -0,0 +1,243 @@
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Iterator, List, Optional
+
+
+SCRIPT_FORMATS = ("jsonl", "csv", "json")
+
+_EXTENSIONS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".json": "json",
+}
+
+_END = object()
+
+
+def script_format(filename: str) -> str:
+    """Script format by file extension (JSON for unknown extensions)."""
+    return _EXTENSIONS.get(os.path.splitext(filename)[1].lower(), "json")
+
+
+def _command(value, where: str) -> list:
+    if isinstance(value, dict):
+        value = [value.get("procedure"), value.get("args", [])]
+    if (not isinstance(value, list) or len(value) != 2
+            or not isinstance(value[0], str) or not isinstance(value[1], list)):
+        raise ValueError(f"{where}: expected [procedure, [args]], got {value!r}.")
+    return value
+
+
+def _number(text: str):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def read_jsonl(file) -> Iterator[list]:
+    """Commands of a JSON Lines script: one [procedure, [args]] per line."""
+    for line_number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: {e}") from None
+        yield _command(value, f"Line {line_number}")
+
+
+def read_csv(file) -> Iterator[list]:
+    """Commands of a CSV script: procedure,arg1,arg2,... per row."""
+    reader = csv.reader(file)
+    line_number = 0
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            raise ValueError(f"Line {reader.line_num}: {e}") from None
+        line_number += 1
+        row = [cell.strip() for cell in row]
+        if not row or not row[0] or row[0].startswith('#'):
+            continue
+        try:
+            args = [_number(cell) for cell in row[1:] if cell]
+        except ValueError:
+            if line_number == 1:
+                # Header row.
+                continue
+            raise ValueError(f"Line {line_number}: non-numeric argument in {row}.") from None
+        yield [row[0], args]
+
+
+class _JSONTokens:
+    """Incremental reader of JSON values from a text file, chunk by chunk."""
+
+    def __init__(self, file, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at the end of the file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in the JSON script, got {char!r}.")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next chunk.
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def read_json(file, chunk_size: int = 1 << 16) -> Iterator[list]:
+    """Commands of a JSON script ({"script": [...]} or a top-level [...]), parsed
+    one array element at a time."""
+    tokens = _JSONTokens(file, chunk_size)
+    if tokens.expect("{[") == "{":
+        end = tokens.peek() == "}"
+        while not end:
+            key = tokens.value()
+            tokens.expect(":")
+            if key == "script":
+                tokens.expect("[")
+                break
+            tokens.value()
+            end = tokens.expect(",}") == "}"
+        if end:
+            raise ValueError("Topic \"script\" was not found.")
+
+    step = 0
+    if tokens.peek() == "]":
+        return
+    while True:
+        yield _command(tokens.value(), f"Step {step}")
+        step += 1
+        if tokens.expect(",]") == "]":
+            return
+
+
+def read_script(filename: str) -> List[list]:
+    """All commands of a JSON script file (for the compiler and the timing estimate)."""
+    with open(filename, 'r', encoding='utf-8') as file:
+        return list(read_json(file))
+
+
+_READERS = {
+    "jsonl": read_jsonl,
+    "csv": read_csv,
+    "json": read_json,
+}
+
+
+class ScriptStream:
+    """Lazily parsed script ([procedure, args] commands) in JSON Lines, CSV or JSON.
+
+    A background thread parses ahead of the consumer into a queue of at most
+    `read_ahead` commands, so memory does not grow with the script length and
+    the first command is available before the file is parsed.
+    """
+
+    def __init__(self, filename: str, fmt: Optional[str] = None, read_ahead: int = 256):
+        fmt = fmt or script_format(filename)
+        if fmt not in _READERS:
+            raise ValueError(f"Unknown script format: {fmt} (expected one of {SCRIPT_FORMATS}).")
+        if read_ahead < 1:
+            raise ValueError("read_ahead must be at least 1.")
+        self.logger = logging.getLogger(__name__)
+        self.filename = filename
+        self.format = fmt
+        self.read_ahead = read_ahead
+        self.parsed = 0
+
+    def __iter__(self) -> Iterator[list]:
+        # Commands are handed over in small batches to keep the queue overhead per command low.
+        batch_size = max(1, min(64, self.read_ahead // 4))
+        batches = queue.Queue(maxsize=max(1, self.read_ahead // batch_size))
+        stop = threading.Event()
+        self.parsed = 0
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def parse():
+            batch = []
+            try:
+                with open(self.filename, 'r', encoding='utf-8', newline='') as file:
+                    for command in _READERS[self.format](file):
+                        batch.append(command)
+                        if len(batch) >= batch_size:
+                            if not put(batch):
+                                return
+                            self.parsed += len(batch)
+                            batch = []
+                if not batch or put(batch):
+                    self.parsed += len(batch)
+            except Exception as e:
+                self.logger.log(level=logging.ERROR, msg=f"Failed to parse the script {self.filename}: {e}")
+                if not batch or put(batch):
+                    self.parsed += len(batch)
+                    put(e)
+            finally:
+                # Always wakes up the consumer, even if the parser failed unexpectedly.
+                put(_END)
+
+        parser = threading.Thread(target=parse, daemon=True)
+        parser.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield from item
+        finally:
+            stop.set()
+            parser.join()
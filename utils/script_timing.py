@@ -0,0 +1,107 @@
+import itertools
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+from .head_device import MOTION_PROCEDURES, MOVE_TIME_MARGIN
+
+
+class ScriptTiming:
+    """Estimated timing of a script: per-step motion arrays and durations."""
+
+    def __init__(self, procedures: List[str], positions: np.ndarray, velocities: np.ndarray,
+                 accelerations: np.ndarray, durations: np.ndarray):
+        self.procedures = procedures
+        self.positions = positions
+        self.velocities = velocities
+        self.accelerations = accelerations
+        self.durations = durations
+
+    @property
+    def total(self) -> float:
+        return float(self.durations.sum())
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def __repr__(self) -> str:
+        return f"ScriptTiming(steps={len(self)}, total={self.total:.3f} s)"
+
+
+def move_times(distances: np.ndarray, velocities: np.ndarray, accelerations: np.ndarray) -> np.ndarray:
+    """Vectorized calc_move_time(): trapezoid (or triangle) velocity profile durations."""
+    distances = np.asarray(distances, dtype=np.float64)
+    velocities = np.asarray(velocities, dtype=np.float64)
+    accelerations = np.asarray(accelerations, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        constant = distances / velocities
+        t_acc = velocities / accelerations
+        d_acc = velocities ** 2 / (2 * accelerations)
+        triangle = 2 * np.sqrt(distances / accelerations)
+        trapezoid = 2 * t_acc + (distances - 2 * d_acc) / velocities
+
+    times = np.where(accelerations == 0, constant, np.where(distances <= 2 * d_acc, triangle, trapezoid))
+    return np.where(distances == 0, 0.0, times)
+
+
+def estimate_script(script: List[list], start_positions: Optional[Dict[str, int]] = None,
+                    margin: float = MOVE_TIME_MARGIN) -> ScriptTiming:
+    """Estimates the duration of every step of a script ([procedure, args] commands)
+    in one vectorized pass, the same way HeadDevice.calc_delay() does it for a
+    running script. Non-motion steps take no time. No device is needed."""
+    procedures = [command[0] for command in script]
+    count = len(script)
+    motion = np.zeros((count, 3), dtype=np.float64)
+    rows = [i for i, procedure in enumerate(procedures) if procedure in MOTION_PROCEDURES]
+    if rows:
+        motion[rows] = [script[i][1][:3] for i in rows]
+    positions, velocities, accelerations = motion.T
+
+    if rows and (np.any(velocities[rows] <= 0) or np.any(accelerations[rows] < 0)):
+        raise ValueError("Velocity must be positive and acceleration non-negative.")
+
+    durations = np.zeros(count, dtype=np.float64)
+    names = np.array(procedures, dtype=object)
+    for procedure, motor in MOTION_PROCEDURES.items():
+        steps = np.flatnonzero(names == procedure)
+        if len(steps) == 0:
+            continue
+        start = (start_positions or {}).get(motor, 0)
+        targets = positions[steps]
+        distances = np.abs(np.diff(targets, prepend=start))
+        times = move_times(distances, velocities[steps], accelerations[steps])
+        durations[steps] = np.where(distances > 0, times + margin, 0.0)
+
+    return ScriptTiming(procedures, positions, velocities, accelerations, durations)
+
+
+def estimate_stream(commands: Iterable[list], chunk_size: int = 4096,
+                    start_positions: Optional[Dict[str, int]] = None,
+                    margin: float = MOVE_TIME_MARGIN) -> ScriptTiming:
+    """estimate_script() over a command stream, vectorized chunk by chunk; the
+    motor positions are carried over from one chunk to the next."""
+    positions = dict(start_positions or {})
+    parts = []
+    chunk = []
+    for command in itertools.chain(commands, [None]):
+        if command is not None:
+            chunk.append(command)
+            if len(chunk) < chunk_size:
+                continue
+        if not chunk:
+            break
+        timing = estimate_script(chunk, positions, margin)
+        for procedure, motor in MOTION_PROCEDURES.items():
+            steps = [i for i, name in enumerate(timing.procedures) if name == procedure]
+            if steps:
+                positions[motor] = timing.positions[steps[-1]]
+        parts.append(timing)
+        chunk = []
+
+    if not parts:
+        return estimate_script([], margin=margin)
+    return ScriptTiming(
+        [procedure for part in parts for procedure in part.procedures],
+        *(np.concatenate([getattr(part, name) for part in parts])
+          for name in ("positions", "velocities", "accelerations", "durations")),
+    )
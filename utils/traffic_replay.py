@@ -0,0 +1,99 @@
+"""Replays a recorded ITMP session (see ITMPRecorder) through the decoder or into a simulated head.
+
+    python -m utils.traffic_replay session.itmplog --summary
+    python -m utils.traffic_replay session.itmplog --procedure mot1/go
+    python -m utils.traffic_replay session.itmplog --simulate --speed 10
+"""
+import argparse
+import datetime
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .head_simulator import SimulatedHead
+from .itmp.itmp_message import ITMPMessage
+from .itmp.itmp_recorder import ITMPRecording, RX, TX, summarize
+from .itmp.utils import hdlc_byte_stuff
+from .script_scheduler import DeadlineScheduler, LatenessStats
+
+
+class TrafficReplayer:
+    """Plays the frames of a recording with their original spacing divided by
+    `speed` (0: as fast as possible), on the deadline scheduler."""
+
+    def __init__(self, recording: ITMPRecording, speed: float = 1.0):
+        self.recording = recording
+        self.speed = speed
+        self.scheduler = DeadlineScheduler()
+
+    def decode(self, indices: Optional[np.ndarray] = None) -> Iterator[Tuple[float, int, Optional[ITMPMessage]]]:
+        """(time, direction, message) of the recorded frames, decoded again."""
+        return self.recording.messages(indices)
+
+    def play(self, sink: Callable[[bytes], object], direction: int = TX,
+             indices: Optional[np.ndarray] = None) -> LatenessStats:
+        """Sends the HDLC frames recorded in `direction` to `sink` (e.g. SerialPort.write)."""
+        self.scheduler.start()
+        previous = None
+        for recorded, frame_direction, frame in self.recording.frames(indices):
+            if frame_direction != direction:
+                continue
+            if self.speed > 0:
+                if previous is not None:
+                    self.scheduler.advance((recorded - previous) / self.speed)
+                self.scheduler.wait()
+            previous = recorded
+            sink(hdlc_byte_stuff.bytes2hdlc(frame))
+        return self.scheduler.stats
+
+    def play_to_simulator(self, head: SimulatedHead,
+                          indices: Optional[np.ndarray] = None) -> Tuple[List[Tuple[float, bytes]], LatenessStats]:
+        """Feeds the recorded requests to a simulated head; returns its responses and the timing."""
+        responses = []
+        stats = self.play(lambda data: responses.extend(head.feed(data)), TX, indices)
+        return responses, stats
+
+
+def _format_time(seconds: float) -> str:
+    return datetime.datetime.fromtimestamp(seconds).isoformat(timespec="microseconds")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log")
+    parser.add_argument("--procedure", help="only the requests of this procedure and their responses")
+    parser.add_argument("--start", type=float, help="from this wall-clock time (seconds since the epoch)")
+    parser.add_argument("--end", type=float, help="up to this wall-clock time (seconds since the epoch)")
+    parser.add_argument("--summary", action="store_true", help="print the request count per procedure (of the selected frames)")
+    parser.add_argument("--simulate", action="store_true", help="replay the requests into a simulated head")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor (0: no waiting)")
+    args = parser.parse_args(argv)
+
+    recording = ITMPRecording(args.log)
+    indices = np.arange(len(recording))
+    if args.start is not None or args.end is not None:
+        indices = recording.between(args.start if args.start is not None else -np.inf,
+                                    args.end if args.end is not None else np.inf)
+    if args.procedure:
+        indices = np.intersect1d(indices, recording.by_procedure(args.procedure))
+
+    if args.summary:
+        for procedure, count in summarize(recording, indices):
+            print(f"{procedure:<24}{count:>10}")
+        return 0
+
+    replayer = TrafficReplayer(recording, args.speed)
+    if args.simulate:
+        head = SimulatedHead(time_scale=1 / args.speed if args.speed > 0 else 0)
+        responses, stats = replayer.play_to_simulator(head, indices)
+        print(f"{len(responses)} responses, {head.stats}, {stats}")
+        return 0
+
+    for recorded, direction, message in replayer.decode(indices):
+        arrow = "->" if direction == TX else "<-"
+        print(f"{_format_time(recorded)} {arrow} {message.to_list() if message is not None else 'bad frame'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
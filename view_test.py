@@ -9,6 +9,8 @@ import queue
 import random
 import serial.tools.list_ports
 from utils import head_device
+from utils.frame_pipeline import LatestSlot, StageStats
+from utils.pressure_sampler import PressureSampler
 
 class WebcamApp:
     def __init__(self, root):
@@ -16,8 +18,16 @@ class WebcamApp:
         self.root.title("Real-time Webcam with Parallel Logic")
         self.root.geometry("1200x800")
         
-        self.data_queue = queue.Queue()
         self.command_queue = queue.Queue()
+
+        # Capture -> analysis -> presentation -> GUI, each hand-over keeps only the latest frame.
+        self.capture_slot = LatestSlot()
+        self.analysis_slot = LatestSlot()
+        self.display_slot = LatestSlot()
+        self.capture_stats = StageStats()
+        self.analysis_stats = StageStats()
+        self.presentation_stats = StageStats()
+        self.last_frame = None
         
         self.cap = cv2.VideoCapture(0)
         if not self.cap.isOpened():
@@ -94,36 +104,68 @@ class WebcamApp:
         self.frame_count = 0
         
     def start_threads(self):
-        self.video_thread = threading.Thread(target=self.video_processing_loop, daemon=True)
-        self.video_thread.start()
+        self.stage_threads = [
+            threading.Thread(target=self.capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self.analysis_loop, name="analysis", daemon=True),
+            threading.Thread(target=self.presentation_loop, name="presentation", daemon=True),
+        ]
+        for thread in self.stage_threads:
+            thread.start()
         
         self.logic_thread = threading.Thread(target=self.parallel_logic_loop, daemon=True)
         self.logic_thread.start()
         
-    def video_processing_loop(self):
+    def capture_loop(self):
+        """Reads frames as fast as the camera delivers them (paced by cap.read())."""
         while self.running:
             ret, frame = self.cap.read()
-            if ret:
-                if self.flip_horizontal:
-                    frame = cv2.flip(frame, 1)
-                
-                processed_frame = self.process_frame(frame)
-                square_region = self.extract_center_bottom_square(frame)
-                
-                frame_rgb = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
-                square_rgb = cv2.cvtColor(square_region, cv2.COLOR_BGR2RGB)
-                
-                pil_image = Image.fromarray(frame_rgb)
-                pil_square = Image.fromarray(square_rgb)
-                
-                pil_image = self.resize_image(pil_image, 400, 400)
-                pil_square = self.resize_image(pil_square, 400, 400)
-                
-                self.data_queue.put(('video', pil_image, pil_square))
-            
-            time.sleep(0.03)
+            if not ret:
+                time.sleep(0.01)
+                continue
+            if self.flip_horizontal:
+                frame = cv2.flip(frame, 1)
+            self.capture_stats.tick()
+            self.frame_count = self.capture_stats.frames
+            self.last_frame = frame
+            self.capture_slot.put((self.frame_count, frame))
+
+    def analysis_loop(self):
+        """Focus metric of the ROI, on the frame before any overlay is drawn."""
+        while self.running:
+            item = self.capture_slot.get(timeout=0.1)
+            if item is None:
+                continue
+            number, frame = item
+            roi = self.center_bottom_square(frame)
+            x_start, y_start, x_end, y_end = roi
+            self.curr_lapl = self.calculate_laplacian_variance(frame[y_start:y_end, x_start:x_end])
+            self.analysis_stats.tick()
+            self.analysis_slot.put((number, frame, roi, self.curr_lapl))
+
+    def presentation_loop(self):
+        """Overlays, downscaling and color conversion of the images shown by the GUI."""
+        while self.running:
+            item = self.analysis_slot.get(timeout=0.1)
+            if item is None:
+                continue
+            number, frame, roi, focus = item
+            x_start, y_start, x_end, y_end = roi
+            square = self.resize_image(frame[y_start:y_end, x_start:x_end], 400, 400)
+            cv2.rectangle(square, (0, 0), (square.shape[1] - 1, square.shape[0] - 1), (0, 255, 0), 2)
+            cv2.putText(square, f"Laplacian: {focus:.1f}",
+                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
+            scale = min(1.0, 400 / frame.shape[1], 400 / frame.shape[0])
+            full = self.resize_image(frame, 400, 400)
+            self.draw_overlay(full, number, [int(v * scale) for v in roi])
+
+            pil_image = Image.fromarray(cv2.cvtColor(full, cv2.COLOR_BGR2RGB))
+            pil_square = Image.fromarray(cv2.cvtColor(square, cv2.COLOR_BGR2RGB))
+            self.presentation_stats.tick()
+            self.display_slot.put((pil_image, pil_square))
     
-    def extract_center_bottom_square(self, frame):
+    def center_bottom_square(self, frame):
+        """(x_start, y_start, x_end, y_end) of the square at the bottom center of the frame."""
         height, width = frame.shape[:2]
         
         square_size = min(width, height // 2)
@@ -131,51 +173,25 @@ class WebcamApp:
         x_center = width // 2
         y_bottom = height
         
-        x_start = x_center - square_size // 2
-        x_end = x_center + square_size // 2
-        y_start = y_bottom - square_size
-        y_end = y_bottom
-        
-        x_start = max(0, x_start)
-        y_start = max(0, y_start)
-        x_end = min(width, x_end)
-        y_end = min(height, y_end)
-        
-        square_region = frame[y_start:y_end, x_start:x_end]
-        
-        square_with_border = square_region.copy()
-        cv2.rectangle(square_with_border, (0, 0), 
-                     (square_region.shape[1]-1, square_region.shape[0]-1), 
-                     (0, 255, 0), 2)
-        
-        self.curr_lapl = self.calculate_laplacian_variance(square_region)
-        cv2.putText(square_with_border, f"Laplacian: {self.curr_lapl:.1f}", 
-                   (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-        print(f"Laplacian: {self.curr_lapl:.1f}")
-        
-        return square_with_border
+        x_start = max(0, x_center - square_size // 2)
+        y_start = max(0, y_bottom - square_size)
+        x_end = min(width, x_center + square_size // 2)
+        y_end = min(height, y_bottom)
+        return x_start, y_start, x_end, y_end
     
     def calculate_laplacian_variance(self, image):
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         laplacian = cv2.Laplacian(gray, cv2.CV_64F)
         return laplacian.var()
     
-    def process_frame(self, frame):
-        self.frame_count += 1
-        cv2.putText(frame, f"Frame: {self.frame_count}", (10, 30), 
+    def draw_overlay(self, image, number, roi):
+        cv2.putText(image, f"Frame: {number}", (10, 30), 
                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
         
-        height, width = frame.shape[:2]
-        square_size = min(width, height // 2)
-        x_center = width // 2
-        y_bottom = height
-        
-        cv2.rectangle(frame, 
-                     (x_center - square_size // 2, y_bottom - square_size),
-                     (x_center + square_size // 2, y_bottom),
-                     (0, 255, 0), 2)
+        x_start, y_start, x_end, y_end = roi
+        cv2.rectangle(image, (x_start, y_start), (x_end, y_end), (0, 255, 0), 2)
         
-        return frame
+        return image
     
     def parallel_logic_loop(self):
         self.set_logger()
@@ -192,48 +208,52 @@ class WebcamApp:
         head = head_device.HeadDevice("COM4")
         
         head.mot1_go(1500, 1000, 0)
-        min_p = 1000
 
         head.set_valves(1, 0)
-        while (min_p > 800):
-            head.mot1_go(20, 700, 0)
-            p = head.adc_p()
-            print(p)
-            min_p = head.adc_p()
+        with PressureSampler(head, rate=100) as pressure:
+            def read_pressure():
+                sample = pressure.wait_sample(timeout=1.0)
+                if sample is None:
+                    raise TimeoutError("No pressure samples from the head.")
+                return sample[1]
+
+            contact = head.seek_pressure(800, start=1500, end=20, velocity=700, tolerance=5, read=read_pressure)
+        print(contact)
 
     
     def update_gui(self):
-        try:
-            while True:
-                data = self.data_queue.get_nowait()
-                
-                if data[0] == 'video':
-                    self.photo = ImageTk.PhotoImage(image=data[1])
-                    self.video_label.configure(image=self.photo)
-                    
-                    self.square_photo = ImageTk.PhotoImage(image=data[2])
-                    self.square_label.configure(image=self.square_photo)
-                        
-        except queue.Empty:
-            pass
-        
-        status = f"Frames: {self.frame_count} | Logic: {'Active' if self.parallel_logic_active else 'Paused'}"
+        images = self.display_slot.get_nowait()
+        if images is not None:
+            self.photo = ImageTk.PhotoImage(image=images[0])
+            self.video_label.configure(image=self.photo)
+            
+            self.square_photo = ImageTk.PhotoImage(image=images[1])
+            self.square_label.configure(image=self.square_photo)
+        
+        # Dropped: frames overwritten in the input slot of a stage before it took them.
+        status = (f"Frames: {self.frame_count} | "
+                  f"Capture: {self.capture_stats.fps:.1f} fps | "
+                  f"Analysis: {self.analysis_stats.fps:.1f} fps, {self.capture_slot.dropped} dropped | "
+                  f"Presentation: {self.presentation_stats.fps:.1f} fps, {self.analysis_slot.dropped} dropped | "
+                  f"GUI: {self.display_slot.dropped} dropped | "
+                  f"Logic: {'Active' if self.parallel_logic_active else 'Paused'}")
         self.status_label.configure(text=status)
         
         self.root.after(50, self.update_gui)
     
     def resize_image(self, image, max_width, max_height):
-        width, height = image.size
+        height, width = image.shape[:2]
         if width > max_width or height > max_height:
             ratio = min(max_width/width, max_height/height)
             new_width = int(width * ratio)
             new_height = int(height * ratio)
-            return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        return image
+            return cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+        return image.copy()
     
     def capture_image(self):
-        ret, frame = self.cap.read()
-        if ret:
+        # The camera belongs to the capture thread: the latest frame it read is saved.
+        frame = self.last_frame
+        if frame is not None:
             timestamp = time.strftime("%Y%m%d_%H%M%S")
             filename = f"capture_{timestamp}.jpg"
             cv2.imwrite(filename, frame)
@@ -260,6 +280,10 @@ class WebcamApp:
      
     def shutdown(self):
         self.running = False
+        for slot in (self.capture_slot, self.analysis_slot, self.display_slot):
+            slot.close()
+        for thread in getattr(self, 'stage_threads', ()):
+            thread.join(timeout=1.0)
         if hasattr(self, 'cap'):
             self.cap.release()
 